@@ -0,0 +1,127 @@
+"""
+Almacenamiento compacto de las filas de un archivo Excel.
+
+En modo json cada RegistroDato guarda su fila como objeto {columna: valor}, así que
+los nombres de las columnas se repiten en cada fila. En modo compacto el esquema (las
+columnas en orden) se guarda una sola vez en ArchivoExcel.columnas_disponibles y cada
+registro guarda sólo la lista de valores en RegistroDato.valores; datos queda vacío.
+
+Las columnas extraídas (anio, dependencia, indicador, valor) se llenan igual en los
+dos modos. Para leer un campo de la fila en SQL se usa expresion_texto(), que según
+el archivo toma el valor por nombre (datos->>'campo') o por posición (valores->>N), y
+en Python la propiedad RegistroDato.fila. Las comparaciones sobre el valor JSON
+tipado están en condiciones.py. Las columnas se buscan alineadas por nombre
+normalizado, para las consultas sobre varios archivos (historico.py).
+
+El modo de los archivos nuevos lo decide REGISTROS_ALMACENAMIENTO; la comparación de
+tamaño y velocidad de lectura está en benchmarks/almacenamiento.py.
+"""
+import json
+from typing import Any, Dict, Iterable, List
+
+from django.db.models import Case, TextField, Transform, When
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+from django.db.models.functions import Cast
+from django.db.models.lookups import IsNull
+
+from .historico import posicion_columna
+from .models import ALMACENAMIENTO_COMPACTO, ArchivoExcel
+
+
+class _ClaveTexto:
+    """
+    La clave del objeto JSON siempre como texto. KeyTransform toma las claves de sólo
+    dígitos (una columna "2023") como posición de arreglo: datos -> 2023 en
+    PostgreSQL y $[2023] en SQLite, que sobre un objeto devuelven NULL.
+    """
+
+    def as_postgresql(self, compiler, connection):
+        lhs, params = compiler.compile(self.lhs)
+        return f"({lhs} {self.postgres_operator} %s)", (*params, self.key_name)
+
+    def as_sqlite(self, compiler, connection):
+        # Igual que KeyTransform.as_sqlite, con la ruta $."clave" entre comillas
+        lhs, params = compiler.compile(self.lhs)
+        ruta = '$.' + json.dumps(self.key_name)
+        tipos = ','.join(repr(tipo) for tipo in connection.ops.jsonfield_datatype_values)
+        return (
+            f"(CASE WHEN JSON_TYPE({lhs}, %s) IN ({tipos}) "
+            f"THEN JSON_TYPE({lhs}, %s) ELSE JSON_EXTRACT({lhs}, %s) END)"
+        ), (*params, ruta) * 3
+
+
+class ClaveJSON(_ClaveTexto, KeyTransform):
+    """
+    datos -> 'clave' (valor JSON), con los lookups de KeyTransform
+    """
+
+
+# isnull de KeyTransform interpreta la clave como posición (HasKeyOrArrayIndex); la
+# expresión ya es NULL cuando falta la clave
+ClaveJSON.register_lookup(IsNull)
+
+
+class TextoClaveJSON(_ClaveTexto, Transform):
+    """
+    datos ->> 'clave' (valor como texto). No hereda de KeyTextTransform porque sus
+    lookups (icontains, startswith...) vuelven a construir un KeyTextTransform.
+    """
+    postgres_operator = '->>'
+    output_field = TextField()
+
+    def __init__(self, key_name, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.key_name = str(key_name)
+
+
+class AlmacenamientoRegistros:
+    """
+    Lectura de campos de la fila en los dos modos de almacenamiento
+    """
+
+    @staticmethod
+    def ubicaciones(campo: str, archivo_ids: Iterable[int] = None) -> Dict[Any, List[int]]:
+        """
+        {ubicación: [archivo_id, ...]} de los archivos cuya columna no se lee como
+        datos->>'campo': ('valores', posición) en los compactos y ('datos', nombre) en
+        los de modo json donde la columna alineada tiene otro nombre (ver historico.py)
+        """
+        archivos = ArchivoExcel.todos.all()
+        if archivo_ids is not None:
+            archivos = archivos.filter(id__in=list(archivo_ids))
+
+        ubicaciones = {}
+        for archivo_id, almacenamiento, columnas in archivos.values_list(
+            'id', 'almacenamiento', 'columnas_disponibles'
+        ):
+            posicion = posicion_columna(columnas, campo)
+            if posicion is None:
+                continue
+            if almacenamiento == ALMACENAMIENTO_COMPACTO:
+                ubicaciones.setdefault(('valores', posicion), []).append(archivo_id)
+            elif str(columnas[posicion]) != campo:
+                ubicaciones.setdefault(('datos', str(columnas[posicion])), []).append(archivo_id)
+        return ubicaciones
+
+    @staticmethod
+    def expresion_texto(campo: str, archivo_ids: Iterable[int] = None):
+        """
+        Expresión SQL con el valor del campo como texto (NULL si la fila no lo tiene).
+        Con archivo_ids sólo se consultan los esquemas de esos archivos.
+        """
+        # Cast a texto para que las comparaciones sean de texto y no de JSON
+        por_nombre = Cast(TextoClaveJSON(campo, 'datos'), TextField())
+
+        ubicaciones = AlmacenamientoRegistros.ubicaciones(campo, archivo_ids)
+        if not ubicaciones:
+            return por_nombre
+
+        # En `valores` el índice entero de KeyTextTransform lee la posición del arreglo
+        return Case(
+            *[When(archivo_id__in=ids, then=Cast(
+                KeyTextTransform(clave, columna) if columna == 'valores' else TextoClaveJSON(clave, columna),
+                TextField()
+            )) for (columna, clave), ids in ubicaciones.items()],
+            default=por_nombre,
+            output_field=TextField(),
+        )
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class ArchivosConfig(AppConfig):
+    name = 'apps.archivos'
+
+    def ready(self):
+        from django.db.models.signals import pre_delete
+
+        from .models import ArchivoExcel
+        from .particiones import eliminar_particion_archivo
+
+        pre_delete.connect(eliminar_particion_archivo, sender=ArchivoExcel,
+                           dispatch_uid='archivos_eliminar_particion')
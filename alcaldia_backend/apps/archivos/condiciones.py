@@ -0,0 +1,255 @@
+"""
+Filtros por condiciones sobre las columnas de la fila (los campos JSON).
+
+Cada condición es un objeto {"campo", "op", "valor"}; una lista de condiciones se
+combina con AND:
+
+    "condiciones": [
+        {"campo": "Presupuesto", "op": ">", "valor": 1000000},
+        {"campo": "Fecha de corte", "op": "between", "valor": ["2024-01-01", "2024-06-30"]},
+        {"campo": "Estado", "op": "in", "valor": ["Activo", "En curso"]},
+        {"campo": "Observaciones", "op": "is null"},
+        {"campo": "Código", "op": "prefix", "valor": "SEC-"}
+    ]
+
+Operadores: =, !=, <, <=, >, >=, between, in, is null, is not null y prefix
+(distingue mayúsculas, para poder usar un índice). Los de rango (<, <=, >, >= y
+between) sólo se admiten en columnas numéricas o de fecha y no incluyen las celdas
+vacías; en otras columnas la condición es un ValueError.
+
+El valor se convierte al tipo que tiene la columna en cada archivo (tipos_columnas,
+ver tipos.py): "1.000.000" a número en una columna decimal, "01/03/2024" a
+"2024-03-01" en una de fecha. Las condiciones se compilan a lookups de Django sobre
+el JSON tipado, es decir, a SQL con parámetros y sin CAST: en PostgreSQL
+("datos" -> 'Presupuesto') > '1000000', que puede usar el índice de expresión que
+crea el comando indexar_columna. En los archivos compactos se compara la posición
+de la columna en `valores`.
+"""
+import json
+from typing import Any, Dict, Iterable, List
+
+from django.db.models import BooleanField, Expression, Q
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+
+from .almacenamiento import ClaveJSON, TextoClaveJSON
+from .historico import posicion_columna
+from .models import ALMACENAMIENTO_COMPACTO, ArchivoExcel
+from .tipos import (
+    TIPO_BOOLEANO, TIPO_FECHA, TIPOS_NUMERICOS, a_booleano, a_fecha, a_numero, fecha_iso
+)
+
+# Operador -> lookup de Django sobre la clave JSON
+COMPARACIONES = {'=': 'exact', '<': 'lt', '<=': 'lte', '>': 'gt', '>=': 'gte'}
+OPERADORES = ('=', '!=', '<', '<=', '>', '>=', 'between', 'in', 'is null', 'is not null', 'prefix')
+OPERADORES_SIN_VALOR = ('is null', 'is not null')
+OPERADORES_RANGO = ('<', '<=', '>', '>=', 'between')
+# Tipos cuyo valor JSON ordena como el dato: números y fechas ISO
+TIPOS_ORDENABLES = TIPOS_NUMERICOS + (TIPO_FECHA,)
+
+MAXIMO_CONDICIONES = 20
+MAXIMO_VALORES_IN = 500
+
+# Con una fecha sin hora, "<= 2024-06-30" debe incluir todo ese día
+FIN_DEL_DIA = 'T23:59:59'
+
+
+class CondicionClave(Expression):
+    """
+    Lookup sobre una clave JSON, construido al resolver la consulta (cuando la clave ya
+    tiene su columna). Con Q(**{'datos__2023__gte': ...}) Django leería la clave "2023"
+    como posición de arreglo; aquí la clave es ClaveJSON.
+    """
+    conditional = True
+    output_field = BooleanField()
+
+    def __init__(self, clave, lookup: str, valor):
+        super().__init__()
+        self.clave, self.lookup, self.valor = clave, lookup, valor
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None, summarize=False, for_save=False):
+        lhs = self.clave.resolve_expression(query, allow_joins, reuse, summarize, for_save)
+        return lhs.get_lookup(self.lookup)(lhs, self.valor)
+
+
+class CondicionesJSON:
+    """
+    Validación y compilación de condiciones sobre campos JSON
+    """
+
+    @staticmethod
+    def desde_texto(texto: str) -> List[Dict[str, Any]]:
+        """
+        Lee las condiciones de un parámetro de consulta (lista JSON)
+        """
+        try:
+            condiciones = json.loads(texto)
+        except json.JSONDecodeError:
+            raise ValueError("condiciones debe ser una lista JSON")
+        return CondicionesJSON.validar(condiciones)
+
+    @staticmethod
+    def validar(condiciones) -> List[Dict[str, Any]]:
+        """
+        Comprueba la forma de las condiciones y las devuelve normalizadas
+        """
+        if not isinstance(condiciones, list):
+            raise ValueError("condiciones debe ser una lista")
+        if len(condiciones) > MAXIMO_CONDICIONES:
+            raise ValueError(f"Como máximo {MAXIMO_CONDICIONES} condiciones")
+
+        normalizadas = []
+        for condicion in condiciones:
+            if not isinstance(condicion, dict):
+                raise ValueError("Cada condición debe ser un objeto con campo, op y valor")
+
+            campo = condicion.get('campo')
+            op = str(condicion.get('op', '=')).strip().lower()
+            valor = condicion.get('valor')
+
+            if not isinstance(campo, str) or not campo:
+                raise ValueError("Cada condición debe indicar el campo")
+            if op not in OPERADORES:
+                raise ValueError(f"Operador no válido: {op}. Opciones: {', '.join(OPERADORES)}")
+
+            if op == 'between':
+                if not isinstance(valor, list) or len(valor) != 2:
+                    raise ValueError(f"between requiere una lista [desde, hasta] ({campo})")
+            elif op == 'in':
+                if not isinstance(valor, list) or not valor:
+                    raise ValueError(f"in requiere una lista de valores ({campo})")
+                if len(valor) > MAXIMO_VALORES_IN:
+                    raise ValueError(f"in admite como máximo {MAXIMO_VALORES_IN} valores ({campo})")
+            elif op not in OPERADORES_SIN_VALOR and (valor is None or isinstance(valor, (list, dict))):
+                raise ValueError(f"El operador {op} requiere un valor simple ({campo})")
+
+            normalizadas.append({'campo': campo, 'op': op, 'valor': valor})
+        return normalizadas
+
+    @staticmethod
+    def compilar(condiciones, archivo_ids: Iterable[int] = None) -> Q:
+        """
+        Q con todas las condiciones (AND). Con archivo_ids sólo se consideran esos
+        archivos; hace una consulta a archivos_excel para leer sus esquemas.
+        """
+        condiciones = CondicionesJSON.validar(condiciones)
+        if not condiciones:
+            return Q()
+
+        archivos = ArchivoExcel.todos.all()
+        if archivo_ids is not None:
+            archivos = archivos.filter(id__in=list(archivo_ids))
+        esquemas = list(archivos.values_list('id', 'almacenamiento', 'columnas_disponibles', 'tipos_columnas'))
+
+        resultado = Q()
+        for condicion in condiciones:
+            resultado &= CondicionesJSON._condicion(condicion, esquemas)
+        return resultado
+
+    @staticmethod
+    def _condicion(condicion: Dict[str, Any], esquemas) -> Q:
+        campo, op = condicion['campo'], condicion['op']
+
+        # Archivos agrupados por dónde está la columna y con qué tipo
+        grupos, sin_columna = {}, []
+        for archivo_id, almacenamiento, columnas, tipos in esquemas:
+            # Columna alineada por nombre normalizado (ver historico.py)
+            posicion = posicion_columna(columnas, campo)
+            if posicion is None:
+                sin_columna.append(archivo_id)
+                continue
+            nombre = str(columnas[posicion])
+            if almacenamiento == ALMACENAMIENTO_COMPACTO:
+                ruta = ('valores', posicion)
+            else:
+                ruta = ('datos', nombre)
+            grupos.setdefault((ruta, (tipos or {}).get(nombre)), []).append(archivo_id)
+
+        # Ningún archivo cumple: se compila a una condición siempre falsa
+        resultado = Q(pk__in=[])
+        for (ruta, tipo), ids in grupos.items():
+            resultado |= Q(archivo_id__in=ids) & CondicionesJSON._comparacion(
+                ruta, op, condicion['valor'], tipo, campo
+            )
+
+        # En los archivos sin la columna el valor es nulo
+        if op == 'is null' and sin_columna:
+            resultado |= Q(archivo_id__in=sin_columna)
+        return resultado
+
+    @staticmethod
+    def _comparacion(ruta, op: str, valor, tipo: str, campo: str) -> Q:
+        columna, clave = ruta
+
+        def comparar(lookup, valor_lookup):
+            if columna == 'valores':
+                return Q(CondicionClave(KeyTransform(str(clave), columna), lookup, valor_lookup))
+            return Q(CondicionClave(ClaveJSON(clave, columna), lookup, valor_lookup))
+
+        # null JSON (celda vacía o que no encajó en el tipo). En `valores` todas las
+        # posiciones existen; en `datos` la clave puede además faltar
+        nulo = comparar('exact', None)
+        if columna == 'datos':
+            nulo |= comparar('isnull', True)
+
+        if op == 'is null':
+            return nulo
+        if op == 'is not null':
+            return ~nulo
+        if op == 'prefix':
+            texto = KeyTextTransform(str(clave), columna) if columna == 'valores' else TextoClaveJSON(clave, columna)
+            return Q(CondicionClave(texto, 'startswith', str(valor)))
+        if op == 'in':
+            return comparar('in', [CondicionesJSON._convertir(v, tipo, campo) for v in valor])
+
+        if op in OPERADORES_RANGO and tipo not in TIPOS_ORDENABLES:
+            # Sin tipo, "300" > "1.000.000" como texto: mejor rechazar que devolver otras filas
+            raise ValueError(
+                f"El operador {op} sólo se admite en columnas numéricas o de fecha; "
+                f"{campo} es {tipo or 'sin tipo (archivo cargado antes de la inferencia)'}"
+            )
+
+        if op == 'between':
+            desde = CondicionesJSON._convertir(valor[0], tipo, campo)
+            hasta = CondicionesJSON._convertir(valor[1], tipo, campo, fin_del_dia=True)
+            return ~nulo & comparar('gte', desde) & comparar('lte', hasta)
+
+        convertido = CondicionesJSON._convertir(valor, tipo, campo, fin_del_dia=op in ('<=', '>'))
+        if tipo == TIPO_FECHA and op in ('=', '!=') and len(convertido) == 10:
+            # Una fecha sin hora es igual a todo ese día
+            igual = comparar('gte', convertido) & comparar('lte', convertido + FIN_DEL_DIA)
+        else:
+            igual = comparar('exact', convertido)
+
+        if op == '=':
+            return igual
+        if op == '!=':
+            return ~nulo & ~igual
+        # null es el menor valor en jsonb: sin excluirlo, < y <= incluirían las celdas vacías
+        return ~nulo & comparar(COMPARACIONES[op], convertido)
+
+    @staticmethod
+    def _convertir(valor, tipo: str, campo: str, fin_del_dia: bool = False):
+        """
+        El valor de la condición en la representación que tiene la columna en el JSON
+        """
+        if tipo in TIPOS_NUMERICOS:
+            numero = a_numero(valor)
+            if numero is None:
+                raise ValueError(f"'{valor}' no es un número válido para {campo}")
+            return numero
+
+        if tipo == TIPO_FECHA:
+            fecha = a_fecha(valor)
+            if fecha is None:
+                raise ValueError(f"'{valor}' no es una fecha válida para {campo}")
+            texto = fecha_iso(fecha)
+            return texto + FIN_DEL_DIA if fin_del_dia and len(texto) == 10 else texto
+
+        if tipo == TIPO_BOOLEANO:
+            booleano = a_booleano(valor)
+            if booleano is None:
+                raise ValueError(f"'{valor}' no es un booleano válido para {campo}")
+            return booleano
+
+        # Texto, categoría o archivo cargado antes de la inferencia de tipos
+        return str(valor) if tipo else valor
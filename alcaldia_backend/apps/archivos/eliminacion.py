@@ -0,0 +1,142 @@
+"""
+Eliminación de archivos Excel con lápida y purga por lotes.
+
+Eliminar un archivo con millones de registros mediante el borrado en cascada de Django
+es un único DELETE enorme dentro de la petición. En su lugar:
+
+1. marcar(): en una transacción corta se pone la lápida (eliminado_en), se borra el
+   cubo pre-agregado y, si registros_datos está particionada, se desvincula la
+   partición del archivo. Desde ese momento ni el archivo ni sus filas aparecen en
+   listados, búsquedas, estadísticas ni gráficos (RegistroDato.objects las excluye).
+2. purgar(): borra los registros en lotes (o elimina la partición), luego el
+   ArchivoExcel con el resto de sus relaciones y, por último, el .xlsx guardado.
+
+Los archivos pequeños se purgan en la misma petición. Los grandes, con
+ELIMINACION_PURGA_EN_HILO, en un hilo aparte del worker; si el worker termina antes, o
+con el ajuste desactivado, el comando purgar_archivos (cron) completa las purgas
+pendientes. Cada purga registra en el log su inicio y su fin con el id del archivo,
+así que una purga sin "Archivo eliminado" es una que se interrumpió.
+"""
+import contextvars
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import ArchivoExcel, RegistroDato, ResumenRegistros
+from .particiones import ParticionesRegistros
+
+logger = logging.getLogger(__name__)
+
+
+class EliminacionArchivos:
+    """
+    Eliminación rápida de ArchivoExcel y sus registros
+    """
+
+    @staticmethod
+    def eliminar(archivo: ArchivoExcel) -> bool:
+        """
+        Marca el archivo y lo purga ahora o en segundo plano según su tamaño.
+        Devuelve True si la purga quedó en segundo plano.
+        """
+        desvinculada = EliminacionArchivos.marcar(archivo)
+
+        # Sin partición, borrar las filas cuesta en proporción a total_filas
+        if desvinculada or archivo.total_filas <= settings.ELIMINACION_FILAS_SINCRONA:
+            EliminacionArchivos.purgar(archivo.id)
+            return False
+
+        if settings.ELIMINACION_PURGA_EN_HILO:
+            transaction.on_commit(lambda: EliminacionArchivos.purgar_en_segundo_plano(archivo.id))
+        else:
+            logger.info("Purga pendiente para purgar_archivos", extra={'archivo_id': archivo.id})
+        return True
+
+    @staticmethod
+    def marcar(archivo: ArchivoExcel) -> bool:
+        """
+        Pone la lápida y oculta el archivo. Devuelve True si se desvinculó su partición.
+        """
+        with transaction.atomic():
+            ArchivoExcel.todos.filter(pk=archivo.pk).update(
+                eliminado_en=timezone.now(), fecha_actualizacion=timezone.now()
+            )
+            ResumenRegistros.objects.filter(archivo_id=archivo.pk).delete()
+            desvinculada = ParticionesRegistros.desvincular(archivo.pk)
+
+        logger.info("Archivo marcado para eliminar",
+                    extra={'archivo_id': archivo.pk, 'filas': archivo.total_filas})
+        return desvinculada
+
+    @staticmethod
+    def purgar(archivo_id: int) -> int:
+        """
+        Borra los registros del archivo por lotes, el ArchivoExcel y el .xlsx guardado.
+        Cada lote es su propia transacción, así que puede interrumpirse y retomarse.
+        Devuelve el número de registros borrados.
+        """
+        archivo = ArchivoExcel.todos.filter(pk=archivo_id).only('id', 'archivo').first()
+        if archivo is None:
+            return 0
+
+        inicio = time.perf_counter()
+        logger.info("Purga iniciada", extra={
+            'archivo_id': archivo_id, 'hilo': threading.current_thread().name,
+        })
+        borrados = 0
+        if not ParticionesRegistros.eliminar(archivo_id):
+            tamano = settings.ELIMINACION_TAMANO_LOTE
+            while True:
+                lote = RegistroDato.todos.filter(archivo_id=archivo_id).values('pk')[:tamano]
+                cantidad, _ = RegistroDato.todos.filter(pk__in=lote).delete()
+                borrados += cantidad
+                if cantidad < tamano:
+                    break
+
+        ruta = archivo.archivo.name
+        almacenamiento = archivo.archivo.storage
+        with transaction.atomic():
+            # Reportes, relaciones M2M y las filas que quedaran (ya son pocas o ninguna)
+            ArchivoExcel.todos.filter(pk=archivo_id).delete()
+            if ruta:
+                transaction.on_commit(lambda: EliminacionArchivos._borrar_guardado(almacenamiento, ruta))
+
+        logger.info("Archivo eliminado", extra={
+            'archivo_id': archivo_id, 'registros': borrados,
+            'duracion_ms': round((time.perf_counter() - inicio) * 1000, 1),
+        })
+        return borrados
+
+    @staticmethod
+    def purgar_en_segundo_plano(archivo_id: int):
+        # Con el contexto actual el hilo conserva el id de correlación de la petición.
+        # No es daemon: un worker que se reinicia de forma ordenada (max_requests, HUP)
+        # espera a que termine dentro de graceful_timeout; si lo matan antes, los lotes
+        # ya borrados quedan confirmados y purgar_archivos completa el resto
+        contexto = contextvars.copy_context()
+        threading.Thread(
+            target=contexto.run, args=(EliminacionArchivos._purgar_hilo, archivo_id),
+            name=f'purga-archivo-{archivo_id}'
+        ).start()
+
+    @staticmethod
+    def _purgar_hilo(archivo_id: int):
+        try:
+            EliminacionArchivos.purgar(archivo_id)
+        except Exception:
+            logger.exception("Falló la purga del archivo; la completará purgar_archivos",
+                             extra={'archivo_id': archivo_id})
+        finally:
+            # Las conexiones son por hilo: las de este hilo no las cierra nadie más
+            connections.close_all()
+
+    @staticmethod
+    def _borrar_guardado(almacenamiento, ruta):
+        try:
+            almacenamiento.delete(ruta)
+        except OSError:
+            logger.exception("No se pudo borrar el archivo guardado", extra={'ruta': ruta})
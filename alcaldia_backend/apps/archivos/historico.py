@@ -0,0 +1,91 @@
+"""
+Consultas sobre el histórico: todos los archivos con un esquema compatible.
+
+Cada año (o corte) se sube como un archivo nuevo, y por defecto los filtros se limitan
+al último archivo subido. Con "historico" la consulta abarca todos los archivos cuyo
+esquema es compatible con el de referencia (el archivo_id indicado o el último):
+
+    {"historico": true, "dependencia": "Secretaría de Salud"}
+
+Dos esquemas son compatibles si tienen las mismas columnas sin contar el orden, las
+mayúsculas, los espacios de los extremos ni la diferencia entre espacio y guion bajo
+("Fecha de corte" y "FECHA_DE_CORTE"). Las columnas se alinean por ese nombre
+normalizado: al leer un campo (almacenamiento.py) o compilar una condición
+(condiciones.py) cada archivo usa su propio nombre de columna o su posición en
+`valores`, así que filtros, agrupaciones y agregaciones siguen siendo una sola
+consulta SQL sobre archivo_id IN (...). Las agrupaciones por anio, dependencia o
+indicador se responden desde el cubo pre-agregado. Ver benchmarks/historico.py.
+"""
+from typing import Dict, Iterable, List, Optional
+
+from .models import ArchivoExcel
+
+
+def normalizar_columna(nombre) -> str:
+    return str(nombre).strip().lower().replace(' ', '_')
+
+
+def posicion_columna(columnas: Iterable, campo: str) -> Optional[int]:
+    """
+    Posición de la columna en el esquema: por nombre exacto o, si no, por el nombre
+    normalizado. None si el archivo no tiene la columna.
+    """
+    nombres = [str(columna) for columna in columnas or []]
+    if campo in nombres:
+        return nombres.index(campo)
+
+    normalizado = normalizar_columna(campo)
+    for posicion, nombre in enumerate(nombres):
+        if normalizar_columna(nombre) == normalizado:
+            return posicion
+    return None
+
+
+class HistoricoArchivos:
+    """
+    Selección de los archivos con esquema compatible para consultas históricas
+    """
+
+    @staticmethod
+    def firma(columnas: Iterable) -> tuple:
+        """
+        Firma del esquema: las columnas normalizadas, sin orden
+        """
+        return tuple(sorted({normalizar_columna(columna) for columna in columnas or []}))
+
+    @staticmethod
+    def compatibles(archivo_id: int) -> List[int]:
+        """
+        Ids de los archivos procesados con el mismo esquema que archivo_id (incluido),
+        del más antiguo al más reciente
+        """
+        columnas = ArchivoExcel.objects.filter(id=archivo_id).values_list(
+            'columnas_disponibles', flat=True
+        ).first()
+        if columnas is None:
+            return []
+
+        firma = HistoricoArchivos.firma(columnas)
+        archivos = ArchivoExcel.objects.filter(procesado=True).order_by('fecha_subida', 'id').values_list(
+            'id', 'columnas_disponibles'
+        )
+        ids = [id_ for id_, columnas in archivos if HistoricoArchivos.firma(columnas) == firma]
+
+        # El archivo de referencia cuenta aunque todavía se esté procesando
+        return ids if archivo_id in ids else ids + [archivo_id]
+
+    @staticmethod
+    def aplicar(filtros: Dict) -> bool:
+        """
+        Si los filtros piden el histórico, reemplaza archivo_id por archivo_ids con
+        todos los archivos compatibles. Retorna True si se aplicó.
+        """
+        if not filtros.pop('historico', False):
+            return False
+
+        referencia = filtros.pop('archivo_id', None)
+        if not referencia:
+            referencia = ArchivoExcel.objects.order_by('-fecha_subida').values_list('id', flat=True).first()
+        if referencia:
+            filtros['archivo_ids'] = HistoricoArchivos.compatibles(int(referencia))
+        return True
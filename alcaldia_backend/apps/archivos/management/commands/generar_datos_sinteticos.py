@@ -0,0 +1,159 @@
+"""
+Genera datos municipales sintéticos para pruebas de escala.
+
+Por defecto crea ArchivoExcel y sus RegistroDato pasando los bloques generados por
+ExcelProcessor.insertar_registros (el mismo código que usa la carga de archivos) y
+reconstruye el cubo de cada archivo. Con --con-libro además genera el .xlsx, lo
+adjunta y lo procesa igual que una subida real. Con --solo-libros sólo escribe los
+.xlsx en un directorio, sin tocar la base de datos.
+
+    python manage.py generar_datos_sinteticos --archivos 10 --filas 1000000 --sesgo 1.1
+    python manage.py generar_datos_sinteticos --solo-libros /tmp/libros --filas 5000
+    python manage.py generar_datos_sinteticos --limpiar
+"""
+import os
+import time
+from itertools import islice
+
+import pandas as pd
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.archivos.models import ALMACENAMIENTO_COMPACTO, ALMACENAMIENTO_JSON, ArchivoExcel
+from apps.archivos.sinteticos import generar_filas, generar_libro
+from apps.archivos.utils import ExcelProcessor, CuboRegistros
+from apps.authentication.models import CustomUser
+
+# Marca en la descripción para poder eliminar después los archivos generados
+DESCRIPCION_SINTETICA = 'Datos sintéticos (generar_datos_sinteticos)'
+
+
+class Command(BaseCommand):
+    help = 'Genera archivos Excel y registros sintéticos con tamaño, cardinalidad y sesgo configurables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archivos', type=int, default=1)
+        parser.add_argument('--filas', type=int, default=10000, help='Filas por archivo')
+        parser.add_argument('--columnas', type=int, default=6, help='Columnas adicionales a Año/Dependencia/Indicador/Valor')
+        parser.add_argument('--dependencias', type=int, default=10, help='Cardinalidad de Dependencia')
+        parser.add_argument('--indicadores', type=int, default=25, help='Cardinalidad de Indicador')
+        parser.add_argument('--anios', type=int, default=5, help='Cantidad de años distintos')
+        parser.add_argument('--sesgo', type=float, default=0.0, help='Sesgo Zipf de Dependencia e Indicador (0 = uniforme)')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--lote', type=int, default=50000, help='Filas generadas e insertadas por bloque')
+        parser.add_argument('--email', help='Usuario propietario (por defecto el primer admin)')
+        parser.add_argument('--almacenamiento', choices=[ALMACENAMIENTO_JSON, ALMACENAMIENTO_COMPACTO],
+                            help='Modo de almacenamiento de las filas (por defecto REGISTROS_ALMACENAMIENTO)')
+        parser.add_argument('--con-libro', action='store_true',
+                            help='Adjuntar el .xlsx y procesarlo como una subida real (lento para millones de filas)')
+        parser.add_argument('--solo-libros', metavar='DIRECTORIO', help='Sólo escribir los .xlsx en este directorio')
+        parser.add_argument('--limpiar', action='store_true', help='Eliminar los archivos sintéticos generados antes')
+
+    def handle(self, *args, **options):
+        if options['limpiar']:
+            eliminados, _ = ArchivoExcel.objects.filter(descripcion=DESCRIPCION_SINTETICA).delete()
+            self.stdout.write(f"Eliminados {eliminados} objetos sintéticos")
+            return
+
+        if options['solo_libros']:
+            self._escribir_libros(options)
+            return
+
+        usuario = self._usuario(options.get('email'))
+        for indice in range(options['archivos']):
+            inicio = time.perf_counter()
+            if options['con_libro']:
+                archivo = self._cargar_libro(usuario, indice, options)
+            else:
+                archivo = self._cargar_directo(usuario, indice, options)
+            duracion = time.perf_counter() - inicio
+
+            self.stdout.write(self.style.SUCCESS(
+                f"Archivo {archivo.id}: {archivo.total_filas} filas en {duracion:.1f} s "
+                f"({archivo.total_filas / duracion:.0f} filas/s)"
+            ))
+
+    def _opciones_generador(self, indice, options):
+        return {
+            'columnas_extra': options['columnas'],
+            'dependencias': options['dependencias'],
+            'indicadores': options['indicadores'],
+            'anios': options['anios'],
+            'sesgo': options['sesgo'],
+            'semilla': options['semilla'] + indice,
+        }
+
+    def _nuevo_archivo(self, usuario, indice, options):
+        archivo = ArchivoExcel(
+            nombre_archivo=f"Sintético {indice + 1} ({options['filas']} filas)",
+            descripcion=DESCRIPCION_SINTETICA,
+            usuario_subida=usuario
+        )
+        if options.get('almacenamiento'):
+            archivo.almacenamiento = options['almacenamiento']
+        return archivo
+
+    def _usuario(self, email):
+        if email:
+            usuario = CustomUser.objects.filter(email=email).first()
+        else:
+            usuario = CustomUser.objects.filter(role='admin').first() or CustomUser.objects.first()
+
+        if usuario is None:
+            raise CommandError('No hay usuarios a los que asignar los archivos')
+        return usuario
+
+    def _escribir_libros(self, options):
+        directorio = options['solo_libros']
+        os.makedirs(directorio, exist_ok=True)
+        for indice in range(options['archivos']):
+            ruta = os.path.join(directorio, f"sintetico_{indice + 1}_{options['filas']}.xlsx")
+            with open(ruta, 'wb') as salida:
+                salida.write(generar_libro(options['filas'], **self._opciones_generador(indice, options)))
+            self.stdout.write(f"Escrito {ruta}")
+
+    def _cargar_libro(self, usuario, indice, options):
+        """
+        Mismo camino que ArchivoExcelSerializer.create: adjuntar, procesar y guardar registros
+        """
+        contenido = generar_libro(options['filas'], **self._opciones_generador(indice, options))
+        archivo = self._nuevo_archivo(usuario, indice, options)
+        archivo.archivo.save(f"sintetico_{indice + 1}.xlsx", ContentFile(contenido))
+
+        processor = ExcelProcessor(archivo)
+        for exito, mensaje in (processor.procesar_excel(), processor.guardar_registros()):
+            if not exito:
+                raise CommandError(mensaje)
+        return archivo
+
+    def _cargar_directo(self, usuario, indice, options):
+        """
+        Genera los registros por bloques sin pasar por un .xlsx, para volúmenes de millones de filas
+        """
+        archivo = self._nuevo_archivo(usuario, indice, options)
+        archivo.save()
+        processor = ExcelProcessor(archivo)
+        filas = generar_filas(options['filas'], **self._opciones_generador(indice, options))
+
+        insertadas = 0
+        while insertadas < options['filas']:
+            bloque = list(islice(filas, options['lote']))
+            if not bloque:
+                break
+
+            # Mismo DataFrame que produciría pd.read_excel; el índice continúa entre bloques
+            processor.df = pd.DataFrame(bloque, index=range(insertadas, insertadas + len(bloque)))
+            if insertadas == 0:
+                processor._extraer_metadatos_comunes()
+            insertadas += processor.insertar_registros()
+            self.stdout.write(f"  {insertadas}/{options['filas']} filas", ending='\r')
+        self.stdout.write('')
+
+        archivo.total_filas = insertadas
+        archivo.total_columnas = len(processor.df.columns) if processor.df is not None else 0
+        archivo.columnas_disponibles = list(processor.df.columns) if processor.df is not None else []
+        archivo.procesado = True
+        archivo.save()
+
+        CuboRegistros.reconstruir(archivo)
+        return archivo
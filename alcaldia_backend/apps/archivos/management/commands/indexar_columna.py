@@ -0,0 +1,95 @@
+"""
+Crea (o elimina) índices de expresión sobre una columna de la fila (PostgreSQL).
+
+Las condiciones de condiciones.py se compilan a comparaciones sobre el JSON sin CAST,
+("datos" -> 'Presupuesto') > '1000000', así que un índice sobre esa misma expresión
+sirve para los filtros por rango, igualdad e in de esa columna:
+
+    python manage.py indexar_columna "Presupuesto"
+    python manage.py indexar_columna "Código" --prefijo     # para el operador prefix
+    python manage.py indexar_columna "Presupuesto" --eliminar
+
+Para los archivos compactos se crea un índice por cada posición que ocupa la columna
+(("valores" -> 3)). Con la tabla sin particionar los índices se crean con
+CONCURRENTLY, sin bloquear las escrituras; en la tabla particionada Postgres no lo
+permite y se crean en cada partición bloqueándola mientras tanto.
+"""
+import hashlib
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.archivos.models import ALMACENAMIENTO_COMPACTO, ArchivoExcel
+from apps.archivos.particiones import ParticionesRegistros, TABLA_REGISTROS
+
+
+class Command(BaseCommand):
+    help = 'Crea índices de expresión sobre una columna de la fila para los filtros por condiciones (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('columna', help='Nombre de la columna tal como aparece en el Excel')
+        parser.add_argument('--prefijo', action='store_true',
+                            help='Índice de texto para el operador prefix en lugar de comparaciones')
+        parser.add_argument('--eliminar', action='store_true', help='Eliminar los índices de la columna')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Los índices de expresión sobre JSON sólo están disponibles en PostgreSQL')
+
+        columna = options['columna']
+        expresiones = self._expresiones(columna, options['prefijo'])
+        if not expresiones:
+            raise CommandError(f"Ningún archivo tiene la columna '{columna}'")
+
+        concurrente = '' if ParticionesRegistros.activo() else ' CONCURRENTLY'
+        # CONCURRENTLY no puede ir dentro de una transacción: cada sentencia va sola
+        with connection.cursor() as cursor:
+            for nombre, expresion in expresiones:
+                if options['eliminar']:
+                    cursor.execute(f"DROP INDEX{concurrente} IF EXISTS {nombre}")
+                    self.stdout.write(f"Eliminado {nombre}")
+                else:
+                    cursor.execute(
+                        f"CREATE INDEX{concurrente} IF NOT EXISTS {nombre} ON {TABLA_REGISTROS} ({expresion})"
+                    )
+                    self.stdout.write(f"Creado {nombre}: {expresion}")
+
+            if not options['eliminar']:
+                cursor.execute(f"ANALYZE {TABLA_REGISTROS}")
+
+        self.stdout.write(self.style.SUCCESS(f"{len(expresiones)} índices procesados para '{columna}'"))
+
+    def _expresiones(self, columna, prefijo):
+        """
+        [(nombre del índice, expresión)] según dónde está la columna en los archivos
+        """
+        con_nombre, posiciones = False, set()
+        for almacenamiento, columnas in ArchivoExcel.objects.values_list('almacenamiento', 'columnas_disponibles'):
+            nombres = [str(c) for c in columnas or []]
+            if columna not in nombres:
+                continue
+            if almacenamiento == ALMACENAMIENTO_COMPACTO:
+                posiciones.add(nombres.index(columna))
+            else:
+                con_nombre = True
+
+        with connection.schema_editor() as schema_editor:
+            literal = schema_editor.quote_value(columna)
+
+        if prefijo:
+            # Mismo texto que compara el lookup startswith: datos ->> 'col' LIKE 'x%'
+            sufijo, operador, clase = '_p', '->>', ' text_pattern_ops'
+        else:
+            sufijo, operador, clase = '', '->', ''
+
+        expresiones = []
+        if con_nombre:
+            expresiones.append((self._nombre(f'datos:{columna}', sufijo), f"(datos {operador} {literal}){clase}"))
+        for posicion in sorted(posiciones):
+            expresiones.append((self._nombre(f'valores:{posicion}', sufijo), f"(valores {operador} {posicion}){clase}"))
+        return expresiones
+
+    @staticmethod
+    def _nombre(clave, sufijo):
+        # Nombre estable y válido para cualquier nombre de columna (tildes, espacios)
+        return f"{TABLA_REGISTROS}_c_{hashlib.md5(clave.encode('utf-8')).hexdigest()[:12]}{sufijo}"
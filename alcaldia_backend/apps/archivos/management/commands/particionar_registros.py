@@ -0,0 +1,150 @@
+"""
+Convierte registros_datos en una tabla particionada por archivo (PostgreSQL).
+
+La conversión se hace en una sola transacción: renombra la tabla actual, crea la
+tabla particionada con las mismas columnas, una partición por archivo y la
+partición por defecto, copia las filas, recrea índices y claves foráneas con sus
+nombres y ajusta la secuencia de id. La clave primaria pasa a ser (id, archivo_id),
+porque Postgres exige que incluya la columna de partición; para Django id sigue
+siendo único.
+
+Bloquea registros_datos mientras dura: ejecutar en una ventana de mantenimiento.
+
+    python manage.py particionar_registros               # convertir
+    python manage.py particionar_registros --estado      # particiones y tamaños
+    python manage.py particionar_registros --conservar-anterior   # deja registros_datos_anterior
+
+Si la tabla ya está particionada, crea las particiones que falten (y mueve a ellas
+las filas que hubieran caído en la partición por defecto).
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.archivos.models import ArchivoExcel
+from apps.archivos.particiones import ParticionesRegistros, PARTICION_DEFECTO, TABLA_REGISTROS
+
+TABLA_ANTERIOR = f'{TABLA_REGISTROS}_anterior'
+
+
+class Command(BaseCommand):
+    help = 'Particiona registros_datos por archivo_id (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--estado', action='store_true', help='Mostrar particiones y tamaños sin cambiar nada')
+        parser.add_argument('--conservar-anterior', action='store_true',
+                            help=f'Conservar la tabla original como {TABLA_ANTERIOR} en lugar de eliminarla')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('El particionado sólo está disponible en PostgreSQL')
+
+        if options['estado']:
+            self._estado()
+            return
+
+        if ParticionesRegistros.activo():
+            creadas = sum(ParticionesRegistros.asegurar(archivo_id)
+                          for archivo_id in ArchivoExcel.objects.values_list('id', flat=True))
+            self.stdout.write(self.style.SUCCESS(
+                f"{TABLA_REGISTROS} ya está particionada; {creadas} particiones creadas"
+            ))
+            return
+
+        inicio = time.perf_counter()
+        with transaction.atomic(), connection.cursor() as cursor:
+            filas = self._convertir(cursor, options['conservar_anterior'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{TABLA_REGISTROS} particionada: {filas} filas en {time.perf_counter() - inicio:.1f} s"
+        ))
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {TABLA_REGISTROS}")
+
+    def _convertir(self, cursor, conservar_anterior):
+        cursor.execute(f"LOCK TABLE {TABLA_REGISTROS} IN ACCESS EXCLUSIVE MODE")
+
+        # Definiciones actuales; los nombres de los índices se reutilizan en la tabla nueva
+        cursor.execute(
+            "SELECT i.relname, pg_get_indexdef(i.oid), ix.indisunique, ix.indisprimary "
+            "FROM pg_index ix JOIN pg_class i ON i.oid = ix.indexrelid "
+            "WHERE ix.indrelid = %s::regclass",
+            [TABLA_REGISTROS]
+        )
+        indices = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('f', 'c')",
+            [TABLA_REGISTROS]
+        )
+        restricciones = cursor.fetchall()
+
+        cursor.execute(f"ALTER TABLE {TABLA_REGISTROS} RENAME TO {TABLA_ANTERIOR}")
+        for nombre, *_ in indices:
+            cursor.execute(f"ALTER INDEX {connection.ops.quote_name(nombre)} "
+                           f"RENAME TO {connection.ops.quote_name(nombre[:59] + '_ant')}")
+
+        cursor.execute(
+            f"CREATE TABLE {TABLA_REGISTROS} (LIKE {TABLA_ANTERIOR} INCLUDING DEFAULTS INCLUDING IDENTITY "
+            f"INCLUDING STORAGE) PARTITION BY LIST (archivo_id)"
+        )
+        cursor.execute(f"CREATE TABLE {PARTICION_DEFECTO} PARTITION OF {TABLA_REGISTROS} DEFAULT")
+
+        # Particiones antes de copiar: así cada fila va directo a la suya
+        archivos = list(ArchivoExcel.objects.order_by('id').values_list('id', flat=True))
+        for archivo_id in archivos:
+            cursor.execute(f"CREATE TABLE {ParticionesRegistros.nombre(archivo_id)} "
+                           f"PARTITION OF {TABLA_REGISTROS} FOR VALUES IN ({int(archivo_id)})")
+
+        filas = 0
+        for posicion, archivo_id in enumerate(archivos, start=1):
+            cursor.execute(f"INSERT INTO {TABLA_REGISTROS} SELECT * FROM {TABLA_ANTERIOR} WHERE archivo_id = %s",
+                           [archivo_id])
+            filas += cursor.rowcount
+            self.stdout.write(f"  {posicion}/{len(archivos)} archivos, {filas} filas", ending='\r')
+        self.stdout.write('')
+
+        # Los índices se crean después de copiar, que es mucho más rápido
+        for nombre, definicion, unico, primario in indices:
+            if primario:
+                cursor.execute(f"ALTER TABLE {TABLA_REGISTROS} ADD CONSTRAINT {connection.ops.quote_name(nombre)} "
+                               f"PRIMARY KEY (id, archivo_id)")
+            elif unico:
+                self.stderr.write(f"Índice único {nombre} omitido: en una tabla particionada "
+                                  f"debe incluir archivo_id")
+            else:
+                cursor.execute(definicion)
+
+        for nombre, definicion in restricciones:
+            cursor.execute(f"ALTER TABLE {TABLA_REGISTROS} ADD CONSTRAINT "
+                           f"{connection.ops.quote_name(nombre)} {definicion}")
+
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1, false) "
+            f"FROM {TABLA_REGISTROS}",
+            [TABLA_REGISTROS]
+        )
+
+        if not conservar_anterior:
+            cursor.execute(f"DROP TABLE {TABLA_ANTERIOR}")
+        return filas
+
+    def _estado(self):
+        if not ParticionesRegistros.activo():
+            self.stdout.write(f"{TABLA_REGISTROS} no está particionada")
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname, c.reltuples::bigint, pg_total_relation_size(c.oid) "
+                "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = %s::regclass ORDER BY c.relname",
+                [TABLA_REGISTROS]
+            )
+            particiones = cursor.fetchall()
+
+        total = sum(tamano for _, _, tamano in particiones)
+        self.stdout.write(f"{len(particiones)} particiones, {total / 1024 ** 2:.1f} MB en total")
+        for nombre, filas, tamano in particiones:
+            self.stdout.write(f"  {nombre:<32}{max(filas, 0):>12} filas (estimadas){tamano / 1024 ** 2:>10.1f} MB")
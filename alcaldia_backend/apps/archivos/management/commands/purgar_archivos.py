@@ -0,0 +1,36 @@
+"""
+Completa la purga de los archivos marcados para eliminar (ver apps/archivos/eliminacion.py).
+
+La purga en segundo plano corre en un hilo del worker; si el worker se reinicia antes
+de terminar, el archivo queda con lápida y sin purgar. Con ELIMINACION_PURGA_EN_HILO=False
+no hay hilo y los archivos grandes sólo se purgan aquí. Este comando, pensado para
+cron, los termina:
+
+    python manage.py purgar_archivos                  # marcados hace más de 10 minutos
+    python manage.py purgar_archivos --antiguedad 0   # todos los marcados
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.archivos.eliminacion import EliminacionArchivos
+from apps.archivos.models import ArchivoExcel
+
+
+class Command(BaseCommand):
+    help = 'Purga los archivos Excel marcados para eliminar'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--antiguedad', type=int, default=10,
+                            help='Minutos desde la marca (para no competir con una purga en curso)')
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(minutes=options['antiguedad'])
+        pendientes = list(ArchivoExcel.todos.filter(eliminado_en__lte=limite).values_list('id', flat=True))
+
+        for archivo_id in pendientes:
+            borrados = EliminacionArchivos.purgar(archivo_id)
+            self.stdout.write(f"Archivo {archivo_id}: {borrados} registros borrados")
+
+        self.stdout.write(self.style.SUCCESS(f"{len(pendientes)} archivos purgados"))
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archivos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenRegistros',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.IntegerField(blank=True, null=True)),
+                ('dependencia', models.CharField(blank=True, max_length=200, null=True)),
+                ('indicador', models.CharField(blank=True, max_length=300, null=True)),
+                ('total_registros', models.IntegerField(default=0)),
+                ('registros_con_valor', models.IntegerField(default=0)),
+                ('suma_valor', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True)),
+                ('minimo_valor', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('maximo_valor', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('archivo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes', to='archivos.archivoexcel')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Registros',
+                'verbose_name_plural': 'Resúmenes de Registros',
+                'db_table': 'resumen_registros',
+                'indexes': [models.Index(fields=['archivo', 'dependencia'], name='resumen_reg_archivo_1bbf3d_idx'), models.Index(fields=['anio'], name='resumen_reg_anio_cdf418_idx'), models.Index(fields=['dependencia'], name='resumen_reg_depende_f0fd78_idx'), models.Index(fields=['indicador'], name='resumen_reg_indicad_3c3b95_idx')],
+            },
+        ),
+    ]
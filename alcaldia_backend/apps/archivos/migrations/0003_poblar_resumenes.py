@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:05
+
+from django.db import migrations
+from django.db.models import Count, Sum, Min, Max
+
+
+def poblar_resumenes(apps, schema_editor):
+    """
+    Construye el cubo pre-agregado para los archivos cargados antes de existir la tabla
+    """
+    ArchivoExcel = apps.get_model('archivos', 'ArchivoExcel')
+    RegistroDato = apps.get_model('archivos', 'RegistroDato')
+    ResumenRegistros = apps.get_model('archivos', 'ResumenRegistros')
+
+    for archivo_id in ArchivoExcel.objects.values_list('id', flat=True):
+        grupos = RegistroDato.objects.filter(archivo_id=archivo_id).order_by().values(
+            'anio', 'dependencia', 'indicador'
+        ).annotate(
+            total=Count('id'),
+            con_valor=Count('valor'),
+            suma=Sum('valor'),
+            minimo=Min('valor'),
+            maximo=Max('valor')
+        )
+
+        ResumenRegistros.objects.bulk_create([
+            ResumenRegistros(
+                archivo_id=archivo_id,
+                anio=grupo['anio'],
+                dependencia=grupo['dependencia'],
+                indicador=grupo['indicador'],
+                total_registros=grupo['total'],
+                registros_con_valor=grupo['con_valor'],
+                suma_valor=grupo['suma'],
+                minimo_valor=grupo['minimo'],
+                maximo_valor=grupo['maximo']
+            )
+            for grupo in grupos
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archivos', '0002_resumenregistros'),
+    ]
+
+    operations = [
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
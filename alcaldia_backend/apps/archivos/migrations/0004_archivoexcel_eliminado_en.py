@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archivos', '0003_poblar_resumenes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivoexcel',
+            name='eliminado_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+import apps.archivos.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archivos', '0004_archivoexcel_eliminado_en'),
+    ]
+
+    operations = [
+        # Los archivos existentes quedan en modo json; el valor por defecto de la
+        # configuración sólo aplica a los que se carguen después
+        migrations.AddField(
+            model_name='archivoexcel',
+            name='almacenamiento',
+            field=models.CharField(
+                choices=[('json', 'JSON por fila'), ('compacto', 'Compacto')], default='json', max_length=10
+            ),
+        ),
+        migrations.AlterField(
+            model_name='archivoexcel',
+            name='almacenamiento',
+            field=models.CharField(
+                choices=[('json', 'JSON por fila'), ('compacto', 'Compacto')],
+                default=apps.archivos.models.almacenamiento_por_defecto, max_length=10
+            ),
+        ),
+        migrations.AddField(
+            model_name='registrodato',
+            name='valores',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archivos', '0005_almacenamiento_compacto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivoexcel',
+            name='tipos_columnas',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -1,9 +1,36 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import FileExtensionValidator
 
 User = get_user_model()
 
+# Formas de guardar las filas de un archivo (ver apps/archivos/almacenamiento.py)
+ALMACENAMIENTO_JSON = 'json'
+ALMACENAMIENTO_COMPACTO = 'compacto'
+
+
+def almacenamiento_por_defecto():
+    return settings.REGISTROS_ALMACENAMIENTO
+
+
+class ArchivosVigentesManager(models.Manager):
+    """
+    Excluye los archivos marcados para eliminar (ver apps/archivos/eliminacion.py)
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(eliminado_en__isnull=True)
+
+
+class RegistrosVigentesManager(models.Manager):
+    """
+    Excluye las filas de los archivos marcados para eliminar que aún no se purgan
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(archivo__eliminado_en__isnull=True)
+
 
 class ArchivoExcel(models.Model):
     """
@@ -28,11 +55,29 @@ class ArchivoExcel(models.Model):
     total_columnas = models.IntegerField(default=0)
     columnas_disponibles = models.JSONField(default=list, blank=True)
     procesado = models.BooleanField(default=False)
+    # En modo compacto columnas_disponibles es el esquema: define la posición de cada
+    # valor en RegistroDato.valores
+    almacenamiento = models.CharField(
+        max_length=10,
+        choices=[(ALMACENAMIENTO_JSON, 'JSON por fila'), (ALMACENAMIENTO_COMPACTO, 'Compacto')],
+        default=almacenamiento_por_defecto
+    )
+    # {columna: tipo} inferido al cargar (entero, decimal, fecha, booleano, categoria,
+    # texto); los valores de la fila están normalizados a ese tipo (ver tipos.py)
+    tipos_columnas = models.JSONField(default=dict, blank=True)
 
     # Campos para filtros comunes (si existen en el archivo)
     anio = models.IntegerField(blank=True, null=True)
     dependencia = models.CharField(max_length=200, blank=True, null=True)
 
+    # Lápida: el archivo deja de verse en cuanto se pide eliminarlo y sus registros
+    # se borran después, en segundo plano
+    eliminado_en = models.DateTimeField(blank=True, null=True)
+
+    # objects oculta los archivos eliminados; todos incluye también los pendientes de purgar
+    objects = ArchivosVigentesManager()
+    todos = models.Manager()
+
     class Meta:
         verbose_name = 'Archivo Excel'
         verbose_name_plural = 'Archivos Excel'
@@ -40,12 +85,18 @@ class ArchivoExcel(models.Model):
         ordering = ['-fecha_subida']
 
     def __str__(self):
-        return f"{self.nombre_archivo} - {self.usuario_subida.get_full_name()}"
+        # Sólo se usa el usuario si ya está cargado, para no consultar por cada objeto
+        if ArchivoExcel.usuario_subida.is_cached(self):
+            return f"{self.nombre_archivo} - {self.usuario_subida.get_full_name()}"
+        return self.nombre_archivo
 
 
 class RegistroDato(models.Model):
     """
-    Modelo flexible para almacenar cada fila del Excel como JSON
+    Modelo flexible para almacenar cada fila del Excel como JSON.
+
+    En PostgreSQL la tabla puede estar particionada por archivo (ver particiones.py);
+    en ese caso la clave primaria física es (id, archivo_id).
     """
     archivo = models.ForeignKey(
         ArchivoExcel,
@@ -54,6 +105,9 @@ class RegistroDato(models.Model):
     )
     numero_fila = models.IntegerField()
     datos = models.JSONField()  # Aquí se almacena toda la fila como JSON
+    # Modo compacto: la fila como lista en el orden de archivo.columnas_disponibles
+    # (datos queda vacío). Para leer la fila en cualquier modo, usar `fila`.
+    valores = models.JSONField(blank=True, null=True)
 
     # Campos extraídos comúnmente para facilitar filtros
     # Estos se llenan automáticamente si existen en el JSON
@@ -64,6 +118,11 @@ class RegistroDato(models.Model):
 
     fecha_creacion = models.DateTimeField(auto_now_add=True)
 
+    # Como en ArchivoExcel: objects oculta las filas de archivos eliminados y todos
+    # incluye también las pendientes de purgar
+    objects = RegistrosVigentesManager()
+    todos = models.Manager()
+
     class Meta:
         verbose_name = 'Registro de Dato'
         verbose_name_plural = 'Registros de Datos'
@@ -79,10 +138,27 @@ class RegistroDato(models.Model):
     def __str__(self):
         return f"Fila {self.numero_fila} - {self.archivo.nombre_archivo}"
 
+    @property
+    def fila(self) -> dict:
+        """
+        La fila como diccionario {columna: valor}, sea cual sea el modo de almacenamiento
+        """
+        if self.valores is None:
+            return self.datos
+        return dict(zip(map(str, self.archivo.columnas_disponibles), self.valores))
+
     def save(self, *args, **kwargs):
         """
         Extrae automáticamente campos comunes del JSON para facilitar filtros
         """
+        self.extraer_campos_comunes()
+        super().save(*args, **kwargs)
+
+    def extraer_campos_comunes(self):
+        """
+        Llena anio, dependencia, indicador y valor a partir del JSON. Se invoca desde
+        save() y, explícitamente, antes de bulk_create (que no llama a save()).
+        """
         if self.datos:
             # Buscar campos comunes en el JSON (case-insensitive)
             datos_lower = {k.lower(): v for k, v in self.datos.items()}
@@ -117,4 +193,36 @@ class RegistroDato(models.Model):
                     except (ValueError, TypeError):
                         pass
 
-        super().save(*args, **kwargs)
\ No newline at end of file
+class ResumenRegistros(models.Model):
+    """
+    Cubo pre-agregado de RegistroDato por archivo, dependencia, año e indicador.
+    Se reconstruye al cargar o reprocesar un archivo y se elimina en cascada con él.
+    """
+    archivo = models.ForeignKey(
+        ArchivoExcel,
+        on_delete=models.CASCADE,
+        related_name='resumenes'
+    )
+    anio = models.IntegerField(blank=True, null=True)
+    dependencia = models.CharField(max_length=200, blank=True, null=True)
+    indicador = models.CharField(max_length=300, blank=True, null=True)
+
+    total_registros = models.IntegerField(default=0)
+    registros_con_valor = models.IntegerField(default=0)
+    suma_valor = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
+    minimo_valor = models.DecimalField(max_digits=15, decimal_places=2, blank=True, null=True)
+    maximo_valor = models.DecimalField(max_digits=15, decimal_places=2, blank=True, null=True)
+
+    class Meta:
+        verbose_name = 'Resumen de Registros'
+        verbose_name_plural = 'Resúmenes de Registros'
+        db_table = 'resumen_registros'
+        indexes = [
+            models.Index(fields=['archivo', 'dependencia']),
+            models.Index(fields=['anio']),
+            models.Index(fields=['dependencia']),
+            models.Index(fields=['indicador']),
+        ]
+
+    def __str__(self):
+        return f"{self.dependencia} / {self.anio} / {self.indicador}: {self.total_registros}"
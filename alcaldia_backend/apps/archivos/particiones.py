@@ -0,0 +1,148 @@
+"""
+Particionado de registros_datos por archivo (PostgreSQL, LIST sobre archivo_id).
+
+Con la tabla particionada (ver el comando particionar_registros) cada ArchivoExcel
+tiene su propia partición registros_datos_a<id>. Las consultas filtradas por
+archivo_id leen sólo esa partición, y eliminar o reprocesar un archivo es un
+DROP o un TRUNCATE de la partición en lugar de un DELETE masivo que deja filas
+muertas para VACUUM. La partición registros_datos_default recibe las filas de
+archivos que todavía no tienen partición propia.
+
+En otros motores, o con la tabla sin particionar, todas las operaciones son no-ops
+y el código sigue el camino de siempre (DELETE en cascada).
+"""
+import logging
+
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+TABLA_REGISTROS = 'registros_datos'
+PARTICION_DEFECTO = 'registros_datos_default'
+
+
+class ParticionesRegistros:
+    """
+    Operaciones sobre las particiones de registros_datos
+    """
+
+    @staticmethod
+    def nombre(archivo_id) -> str:
+        return f'{TABLA_REGISTROS}_a{int(archivo_id)}'
+
+    @staticmethod
+    def activo(using: str = 'default') -> bool:
+        """
+        True si registros_datos es una tabla particionada en esta base de datos
+        """
+        conexion = connections[using]
+        if conexion.vendor != 'postgresql':
+            return False
+
+        with conexion.cursor() as cursor:
+            cursor.execute(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = %s AND pg_table_is_visible(c.oid))",
+                [TABLA_REGISTROS]
+            )
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def existe(archivo_id, using: str = 'default') -> bool:
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [ParticionesRegistros.nombre(archivo_id)])
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def asegurar(archivo_id, using: str = 'default') -> bool:
+        """
+        Crea la partición del archivo si no existe. Si la partición por defecto ya tiene
+        filas de ese archivo, las mueve a la nueva partición.
+
+        Crear una partición bloquea brevemente la tabla padre: debe llamarse antes de
+        abrir la transacción de la carga, no dentro. Devuelve False si no aplica.
+        """
+        if not ParticionesRegistros.activo(using) or ParticionesRegistros.existe(archivo_id, using):
+            return False
+
+        conexion = connections[using]
+        nombre = conexion.ops.quote_name(ParticionesRegistros.nombre(archivo_id))
+        tabla = conexion.ops.quote_name(TABLA_REGISTROS)
+        defecto = conexion.ops.quote_name(PARTICION_DEFECTO)
+
+        with conexion.cursor() as cursor:
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {defecto} WHERE archivo_id = %s)", [archivo_id])
+            if not cursor.fetchone()[0]:
+                cursor.execute(f"CREATE TABLE {nombre} PARTITION OF {tabla} FOR VALUES IN ({int(archivo_id)})")
+                return True
+
+        # No se puede crear la partición mientras la de defecto tenga filas que le
+        # corresponden: se mueven a una tabla suelta que luego se adjunta
+        with transaction.atomic(using=using), conexion.cursor() as cursor:
+            cursor.execute(f"CREATE TABLE {nombre} (LIKE {tabla} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+            cursor.execute(
+                f"WITH movidas AS (DELETE FROM {defecto} WHERE archivo_id = %s RETURNING *) "
+                f"INSERT INTO {nombre} SELECT * FROM movidas",
+                [archivo_id]
+            )
+            movidas = cursor.rowcount
+            cursor.execute(f"ALTER TABLE {tabla} ATTACH PARTITION {nombre} FOR VALUES IN ({int(archivo_id)})")
+            logger.info("Partición creada con filas movidas desde la partición por defecto",
+                        extra={'archivo_id': archivo_id, 'filas': movidas})
+        return True
+
+    @staticmethod
+    def vaciar(archivo_id, using: str = 'default') -> bool:
+        """
+        TRUNCATE de la partición del archivo. Devuelve False si no tiene partición
+        (el llamador debe borrar las filas con DELETE)
+        """
+        if not ParticionesRegistros.activo(using) or not ParticionesRegistros.existe(archivo_id, using):
+            return False
+
+        conexion = connections[using]
+        with conexion.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {conexion.ops.quote_name(ParticionesRegistros.nombre(archivo_id))}")
+        return True
+
+    @staticmethod
+    def desvincular(archivo_id, using: str = 'default') -> bool:
+        """
+        DETACH de la partición del archivo: sus filas dejan de verse de inmediato y la
+        tabla suelta se elimina después con eliminar(). Devuelve False si no tiene partición
+        """
+        if not ParticionesRegistros.activo(using) or not ParticionesRegistros.existe(archivo_id, using):
+            return False
+
+        conexion = connections[using]
+        nombre = conexion.ops.quote_name(ParticionesRegistros.nombre(archivo_id))
+        with conexion.cursor() as cursor:
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = %s::regclass)",
+                           [ParticionesRegistros.nombre(archivo_id)])
+            if cursor.fetchone()[0]:
+                cursor.execute(f"ALTER TABLE {conexion.ops.quote_name(TABLA_REGISTROS)} DETACH PARTITION {nombre}")
+        return True
+
+    @staticmethod
+    def eliminar(archivo_id, using: str = 'default') -> bool:
+        """
+        DROP de la partición del archivo (vinculada o ya desvinculada). Devuelve False
+        si no tiene partición
+        """
+        if not ParticionesRegistros.activo(using) or not ParticionesRegistros.existe(archivo_id, using):
+            return False
+
+        conexion = connections[using]
+        with conexion.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {conexion.ops.quote_name(ParticionesRegistros.nombre(archivo_id))}")
+        return True
+
+
+def eliminar_particion_archivo(sender, instance, using, **kwargs):
+    """
+    pre_delete de ArchivoExcel: elimina la partición antes del borrado en cascada, que
+    así sólo encuentra (en la partición por defecto) las filas que no tenían partición.
+    Corre dentro de la transacción del borrado: si éste falla, el DROP se revierte.
+    """
+    ParticionesRegistros.eliminar(instance.pk, using)
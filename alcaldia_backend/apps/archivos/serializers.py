@@ -1,8 +1,12 @@
 from rest_framework import serializers
 from django.core.files.uploadedfile import UploadedFile
+from django.urls import reverse
+from apps.core.descargas import firmar_descarga
 from .models import ArchivoExcel, RegistroDato
 from .utils import ExcelProcessor
 
+SALT_DESCARGA_ARCHIVO = 'archivos.descarga'
+
 
 class ArchivoExcelSerializer(serializers.ModelSerializer):
     """
@@ -20,18 +24,27 @@ class ArchivoExcelSerializer(serializers.ModelSerializer):
             'id', 'nombre_archivo', 'archivo', 'archivo_url', 'descripcion',
             'usuario_subida', 'usuario_subida_nombre', 'fecha_subida',
             'fecha_actualizacion', 'total_filas', 'total_columnas',
-            'columnas_disponibles', 'procesado', 'anio', 'dependencia'
+            'columnas_disponibles', 'tipos_columnas', 'procesado', 'anio', 'dependencia'
         ]
         read_only_fields = [
             'id', 'usuario_subida', 'fecha_subida', 'fecha_actualizacion',
-            'total_filas', 'total_columnas', 'columnas_disponibles',
+            'total_filas', 'total_columnas', 'columnas_disponibles', 'tipos_columnas',
             'procesado', 'anio', 'dependencia'
         ]
 
     def get_archivo_url(self, obj):
-        if obj.archivo:
-            return obj.archivo.url
-        return None
+        """
+        URL firmada y con expiración hacia el endpoint de descarga. La ruta en MEDIA_URL
+        de `archivo` se mantiene en la respuesta, pero en producción no se sirve.
+        """
+        if not obj.archivo:
+            return None
+
+        url = reverse('archivos:archivo_descargar', args=[obj.pk])
+        url = f"{url}?firma={firmar_descarga(obj.pk, SALT_DESCARGA_ARCHIVO)}"
+
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
 
     def validate_archivo(self, value):
         """
@@ -100,6 +113,8 @@ class RegistroDatoSerializer(serializers.ModelSerializer):
         source='archivo.nombre_archivo',
         read_only=True
     )
+    # La fila como diccionario también para los archivos en modo compacto
+    datos = serializers.JSONField(source='fila', read_only=True)
 
     class Meta:
         model = RegistroDato
@@ -155,6 +170,31 @@ class GraficoSerializer(serializers.Serializer):
     mostrar_leyenda = serializers.BooleanField(default=True)
 
 
+class AgregacionSerializer(serializers.Serializer):
+    """
+    Serializer para solicitudes de agregación (tablas dinámicas)
+    """
+    dimensiones = serializers.ListField(
+        child=serializers.JSONField(),
+        min_length=1,
+        max_length=2,
+        help_text="Campos por los que agrupar; p. ej. ['dependencia', {'campo': 'anio', 'intervalo': 5}]"
+    )
+    metricas = serializers.ListField(
+        child=serializers.CharField(),
+        default=['conteo'],
+        help_text="conteo, suma, promedio, minimo, maximo o percentiles (p50, p90...)"
+    )
+    filtros = serializers.JSONField(required=False, default=dict)
+    formato = serializers.ChoiceField(choices=['filas', 'pivote'], default='filas')
+    limite = serializers.IntegerField(required=False, min_value=1)
+
+    def validate_filtros(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("Los filtros deben ser un objeto JSON válido")
+        return value
+
+
 class ExportarDatosSerializer(serializers.Serializer):
     """
     Serializer para exportar datos
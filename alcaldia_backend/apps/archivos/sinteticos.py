@@ -0,0 +1,100 @@
+"""
+Generación de libros Excel sintéticos para benchmarks y pruebas de carga.
+
+Las filas imitan los archivos reales de la alcaldía (Año, Dependencia, Indicador,
+Valor y columnas adicionales de texto, número y fecha). La cardinalidad de cada
+dimensión y el sesgo de su distribución son configurables para reproducir tanto
+archivos homogéneos como los que concentran casi todo en unas pocas dependencias.
+"""
+import random
+from datetime import date, datetime, timedelta
+from io import BytesIO
+from typing import Any, Dict, Iterator, List
+
+from openpyxl import Workbook
+
+DEPENDENCIAS_BASE = [
+    'Secretaría de Salud', 'Secretaría de Educación', 'Secretaría de Hacienda',
+    'Secretaría de Planeación', 'Secretaría de Infraestructura', 'Secretaría de Gobierno',
+    'Secretaría de Cultura', 'Secretaría de Desarrollo Económico', 'Secretaría de Ambiente',
+    'Secretaría de Tránsito', 'Oficina Jurídica', 'Oficina de Control Interno',
+]
+
+TIPOS_COLUMNA_EXTRA = ('texto', 'numero', 'fecha')
+
+
+def _catalogo(base: List[str], cantidad: int, prefijo: str) -> List[str]:
+    """
+    Toma los nombres base y, si se piden más, los completa con nombres numerados
+    """
+    nombres = base[:cantidad]
+    nombres += [f'{prefijo} {i}' for i in range(len(nombres) + 1, cantidad + 1)]
+    return nombres
+
+
+def _pesos(cantidad: int, sesgo: float) -> List[float]:
+    """
+    Pesos tipo Zipf: sesgo 0 es uniforme; con sesgo 1 el primer valor aparece
+    el doble que el segundo, el triple que el tercero, etc.
+    """
+    return [1 / (posicion ** sesgo) for posicion in range(1, cantidad + 1)]
+
+
+def generar_filas(filas: int, columnas_extra: int = 6, dependencias: int = 10,
+                  indicadores: int = 25, anios: int = 5, sesgo: float = 0.0,
+                  semilla: int = None) -> Iterator[Dict[str, Any]]:
+    """
+    Genera las filas del libro como diccionarios columna -> valor
+    """
+    aleatorio = random.Random(semilla)
+
+    nombres_dependencias = _catalogo(DEPENDENCIAS_BASE, dependencias, 'Dependencia')
+    nombres_indicadores = [f'Indicador de gestión {i}' for i in range(1, indicadores + 1)]
+    valores_anios = list(range(date.today().year - anios + 1, date.today().year + 1))
+
+    pesos_dependencias = _pesos(len(nombres_dependencias), sesgo)
+    pesos_indicadores = _pesos(len(nombres_indicadores), sesgo)
+
+    columnas = [(f'Columna {i + 1}', TIPOS_COLUMNA_EXTRA[i % len(TIPOS_COLUMNA_EXTRA)])
+                for i in range(columnas_extra)]
+    # datetime (no date) para obtener los mismos valores que pd.read_excel sobre el .xlsx
+    fecha_base = datetime(valores_anios[0], 1, 1)
+
+    for _ in range(filas):
+        fila = {
+            'Año': aleatorio.choice(valores_anios),
+            'Dependencia': aleatorio.choices(nombres_dependencias, pesos_dependencias)[0],
+            'Indicador': aleatorio.choices(nombres_indicadores, pesos_indicadores)[0],
+            'Valor': round(aleatorio.uniform(0, 100000), 2),
+        }
+
+        for nombre, tipo in columnas:
+            if tipo == 'texto':
+                fila[nombre] = f'Observación {aleatorio.randint(1, 500)}'
+            elif tipo == 'numero':
+                fila[nombre] = aleatorio.randint(0, 10000)
+            else:
+                fila[nombre] = fecha_base + timedelta(days=aleatorio.randint(0, 365 * anios - 1))
+
+        yield fila
+
+
+def generar_libro(filas: int, **opciones) -> bytes:
+    """
+    Construye un .xlsx en memoria con las filas de generar_filas.
+
+    Usa el modo write-only de openpyxl, así que la memoria no crece con el número de filas.
+    """
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Datos')
+
+    encabezado = None
+    for fila in generar_filas(filas, **opciones):
+        if encabezado is None:
+            encabezado = list(fila.keys())
+            hoja.append(encabezado)
+        hoja.append([fila[columna] for columna in encabezado])
+
+    salida = BytesIO()
+    libro.save(salida)
+    return salida.getvalue()
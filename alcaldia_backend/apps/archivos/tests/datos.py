@@ -0,0 +1,38 @@
+"""
+Datos de prueba: usuarios y archivos cargados con el mismo código que la API
+"""
+from django.contrib.auth import get_user_model
+
+from apps.archivos.models import ALMACENAMIENTO_JSON, ArchivoExcel
+
+
+def crear_usuario(email='funcionario@alcaldia.gov.co', **extra):
+    extra.setdefault('username', email.split('@')[0])
+    return get_user_model().objects.create_user(email=email, password='clave-de-prueba', **extra)
+
+
+def crear_archivo(usuario, filas, almacenamiento=ALMACENAMIENTO_JSON, nombre='Archivo de prueba'):
+    """
+    Carga las filas (lista de diccionarios) como lo hace procesar_excel: infiere los
+    tipos, guarda los registros y reconstruye el cubo
+    """
+    import pandas as pd
+    from apps.archivos.utils import CuboRegistros, ExcelProcessor
+
+    archivo = ArchivoExcel.objects.create(
+        nombre_archivo=nombre,
+        usuario_subida=usuario,
+        almacenamiento=almacenamiento,
+    )
+    processor = ExcelProcessor(archivo)
+    processor.df = pd.DataFrame(filas)
+    processor._extraer_metadatos_comunes()
+    archivo.columnas_disponibles = [str(columna) for columna in processor.df.columns]
+    archivo.total_columnas = len(processor.df.columns)
+    archivo.save()
+
+    archivo.total_filas = processor.insertar_registros()
+    archivo.procesado = True
+    archivo.save()
+    CuboRegistros.reconstruir(archivo)
+    return archivo
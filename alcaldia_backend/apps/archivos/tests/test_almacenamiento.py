@@ -0,0 +1,61 @@
+from django.test import TestCase
+
+from apps.archivos.models import ALMACENAMIENTO_COMPACTO, ALMACENAMIENTO_JSON
+from apps.archivos.utils import FiltrosExcel
+
+from .datos import crear_archivo, crear_usuario
+
+FILAS = [
+    {'Dependencia': 'Salud', '2023': 'Meta cumplida', 'Año': 2023},
+    {'Dependencia': 'Educación', '2023': 'En curso', 'Año': 2023},
+    {'Dependencia': 'Hacienda', '2023': 'Meta cumplida', 'Año': 2023},
+]
+
+
+class ColumnaNumericaTests(TestCase):
+    """
+    Columnas cuyo nombre es sólo dígitos (un año): se leen como clave del objeto y no
+    como posición de arreglo, en los dos modos de almacenamiento
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = crear_usuario()
+        cls.archivos = {
+            modo: crear_archivo(usuario, FILAS, almacenamiento=modo)
+            for modo in (ALMACENAMIENTO_JSON, ALMACENAMIENTO_COMPACTO)
+        }
+
+    def test_busqueda_texto(self):
+        for modo, archivo in self.archivos.items():
+            with self.subTest(modo=modo):
+                registros = FiltrosExcel.filtrar_registros({
+                    'archivo_id': archivo.id,
+                    'busqueda_texto': {'campo': '2023', 'valor': 'cumplida'},
+                })
+                self.assertEqual(sorted(registros.values_list('numero_fila', flat=True)), [1, 3])
+
+    def test_filtros_json(self):
+        for modo, archivo in self.archivos.items():
+            with self.subTest(modo=modo):
+                registros = FiltrosExcel.filtrar_registros({
+                    'archivo_id': archivo.id,
+                    'filtros_json': {'2023': 'curso'},
+                })
+                self.assertEqual(list(registros.values_list('numero_fila', flat=True)), [2])
+
+    def test_valores_unicos(self):
+        for modo, archivo in self.archivos.items():
+            with self.subTest(modo=modo):
+                self.assertEqual(
+                    FiltrosExcel.obtener_valores_unicos('2023', archivo.id),
+                    ['En curso', 'Meta cumplida']
+                )
+
+    def test_fila_en_los_dos_modos(self):
+        filas = {
+            modo: [registro.fila for registro in archivo.registros.order_by('numero_fila')]
+            for modo, archivo in self.archivos.items()
+        }
+        self.assertEqual(filas[ALMACENAMIENTO_JSON], filas[ALMACENAMIENTO_COMPACTO])
+        self.assertEqual(filas[ALMACENAMIENTO_JSON][0]['2023'], 'Meta cumplida')
@@ -0,0 +1,97 @@
+import json
+
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.archivos.models import ALMACENAMIENTO_COMPACTO
+
+from .datos import crear_archivo, crear_usuario
+
+
+class VistasAsincronasTests(TestCase):
+    """
+    Las vistas async responden lo mismo que sus equivalentes síncronas
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = crear_usuario()
+        filas = [
+            {'Año': 2024, 'Dependencia': dependencia, 'Indicador': 'Cobertura', 'Valor': i, 'Meta': i * 10}
+            for i, dependencia in enumerate(['Secretaría de Salud', 'Secretaría de Educación'] * 15)
+        ]
+        cls.archivo = crear_archivo(cls.usuario, filas, ALMACENAMIENTO_COMPACTO)
+
+    def setUp(self):
+        token = RefreshToken.for_user(self.usuario).access_token
+        self.cabeceras = {'Authorization': f'Bearer {token}'}
+
+    async def pedir(self, metodo, ruta, datos=None):
+        if metodo == 'post':
+            return await self.async_client.post(
+                ruta, datos, content_type='application/json', headers=self.cabeceras
+            )
+        return await self.async_client.get(ruta, datos, headers=self.cabeceras)
+
+    async def comparar(self, metodo, ruta, datos=None):
+        sincrona = await self.pedir(metodo, f'/api/archivos/{ruta}', datos)
+        asincrona = await self.pedir(metodo, f'/api/archivos/async/{ruta}', datos)
+
+        self.assertEqual(asincrona.status_code, sincrona.status_code)
+        # Los enlaces next/previous apuntan a la ruta de cada versión
+        self.assertEqual(asincrona.content.decode().replace('/async/', '/'), sincrona.content.decode())
+        return asincrona
+
+    async def test_registros(self):
+        res = await self.comparar('get', 'registros/', {'archivo_id': self.archivo.id, 'page': 2})
+        self.assertEqual(res.json()['count'], 30)
+        self.assertIsNotNone(res.json()['previous'])
+
+        condiciones = json.dumps([{'campo': 'Meta', 'op': '>=', 'valor': 100}])
+        res = await self.comparar('get', 'registros/', {'archivo_id': self.archivo.id, 'condiciones': condiciones})
+        self.assertEqual(res.json()['count'], 20)
+
+        res = await self.comparar('get', 'registros/', {'condiciones': '[{"campo": "Meta", "op": "~"}]'})
+        self.assertEqual(res.status_code, 400)
+
+        res = await self.comparar('get', 'registros/', {'page': 99})
+        self.assertEqual(res.status_code, 404)
+
+    async def test_buscar(self):
+        cuerpo = {'termino': 'Salud', 'filtros': {'archivo_id': self.archivo.id}, 'page': 1, 'page_size': 10}
+        res = await self.comparar('post', 'registros/buscar/', cuerpo)
+        self.assertEqual(res.json()['total'], 15)
+
+    async def test_valores_unicos_y_estadisticas(self):
+        res = await self.comparar('get', 'valores-unicos/', {'campo': 'Dependencia', 'archivo_id': self.archivo.id})
+        self.assertEqual(len(res.json()['valores']), 2)
+        await self.comparar('get', 'valores-unicos/', {})
+        await self.comparar('get', 'estadisticas/')
+
+    async def test_archivos_y_columnas(self):
+        res = await self.comparar('get', 'archivos/', {'anio': 2024})
+        self.assertEqual(res.json()['count'], 1)
+        self.assertIn('ETag', res)
+
+        res = await self.comparar('get', 'columnas-disponibles/', {'archivo_id': self.archivo.id})
+        self.assertEqual(res.json()['total_filas'], 30)
+        await self.comparar('get', 'columnas-disponibles/')
+        await self.comparar('get', 'columnas-disponibles/', {'archivo_id': 0})
+
+        # Públicas como las síncronas, salvo columnas sin archivo_id
+        res = await self.async_client.get('/api/archivos/async/archivos/')
+        self.assertEqual(res.status_code, 200)
+        res = await self.async_client.get('/api/archivos/async/columnas-disponibles/')
+        self.assertEqual(res.status_code, 400)
+
+    async def test_autenticacion(self):
+        res = await self.async_client.get('/api/archivos/async/registros/')
+        self.assertEqual(res.status_code, 401)
+
+        res = await self.async_client.get(
+            '/api/archivos/async/registros/', headers={'Authorization': 'Bearer no-es-un-token'}
+        )
+        self.assertEqual(res.status_code, 401)
+
+        res = await self.pedir('post', '/api/archivos/async/estadisticas/')
+        self.assertEqual(res.status_code, 405)
@@ -0,0 +1,64 @@
+from django.test import TestCase
+
+from apps.archivos.condiciones import CondicionesJSON
+from apps.archivos.models import ALMACENAMIENTO_COMPACTO, ALMACENAMIENTO_JSON, RegistroDato
+
+from .datos import crear_archivo, crear_usuario
+
+MODOS = (ALMACENAMIENTO_JSON, ALMACENAMIENTO_COMPACTO)
+
+
+class CondicionesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = crear_usuario()
+
+    def filas(self, archivo, condiciones):
+        registros = RegistroDato.objects.filter(archivo=archivo).filter(
+            CondicionesJSON.compilar(condiciones, [archivo.id])
+        )
+        return sorted(registros.values_list('numero_fila', flat=True))
+
+    def test_columna_con_nombre_numerico(self):
+        filas = [{'Dependencia': f'D{i}', '2023': valor} for i, valor in enumerate([100, 5000, 7000, 20])]
+        for modo in MODOS:
+            with self.subTest(modo=modo):
+                archivo = crear_archivo(self.usuario, filas, almacenamiento=modo)
+                self.assertEqual(self.filas(archivo, [{'campo': '2023', 'op': '>=', 'valor': 5000}]), [2, 3])
+                self.assertEqual(self.filas(archivo, [{'campo': '2023', 'op': 'in', 'valor': [20, 100]}]), [1, 4])
+
+    def test_rango_excluye_celdas_nulas(self):
+        # Con 20 valores, un "N/D" sigue siendo una columna decimal y se guarda como null
+        filas = [{'Monto': 1000 * (i + 1)} for i in range(20)] + [{'Monto': 'N/D'}, {'Monto': None}]
+        for modo in MODOS:
+            with self.subTest(modo=modo):
+                archivo = crear_archivo(self.usuario, filas, almacenamiento=modo)
+                self.assertIn(archivo.tipos_columnas['Monto'], ('entero', 'decimal'))
+                self.assertEqual(self.filas(archivo, [{'campo': 'Monto', 'op': '<', 'valor': 3000}]), [1, 2])
+                self.assertEqual(self.filas(archivo, [{'campo': 'Monto', 'op': '<=', 'valor': 1000}]), [1])
+                self.assertEqual(
+                    self.filas(archivo, [{'campo': 'Monto', 'op': 'between', 'valor': [0, 2000]}]), [1, 2]
+                )
+                self.assertEqual(self.filas(archivo, [{'campo': 'Monto', 'op': 'is null'}]), [21, 22])
+
+    def test_rango_sobre_texto_es_error(self):
+        filas = [{'Presupuesto': valor} for valor in ['1.000.000', '2.500.000', 'N/D', 'Sin asignar', '300']]
+        archivo = crear_archivo(self.usuario, filas)
+        self.assertEqual(archivo.tipos_columnas['Presupuesto'], 'texto')
+
+        for op, valor in (('<', 500000), ('>=', '1000'), ('between', [0, 10])):
+            with self.subTest(op=op):
+                with self.assertRaisesMessage(ValueError, 'numéricas o de fecha'):
+                    self.filas(archivo, [{'campo': 'Presupuesto', 'op': op, 'valor': valor}])
+
+        # Igualdad y prefijo siguen disponibles en columnas de texto
+        self.assertEqual(self.filas(archivo, [{'campo': 'Presupuesto', 'op': '=', 'valor': 'N/D'}]), [3])
+        self.assertEqual(self.filas(archivo, [{'campo': 'Presupuesto', 'op': 'prefix', 'valor': '2.5'}]), [2])
+
+    def test_rango_en_archivo_sin_tipos(self):
+        archivo = crear_archivo(self.usuario, [{'Monto': 10}, {'Monto': 20}])
+        archivo.tipos_columnas = {}
+        archivo.save()
+        with self.assertRaises(ValueError):
+            self.filas(archivo, [{'campo': 'Monto', 'op': '>', 'valor': 5}])
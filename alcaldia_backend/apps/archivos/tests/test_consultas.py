@@ -0,0 +1,56 @@
+"""
+Número de consultas de los endpoints de lectura: no debe crecer con los elementos de
+la página (ver también el comando verificar_consultas)
+"""
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.archivos.models import ALMACENAMIENTO_COMPACTO, ALMACENAMIENTO_JSON
+
+from .datos import crear_archivo, crear_usuario
+
+
+class ConsultasArchivosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = crear_usuario('admin@alcaldia.gov.co', role='admin')
+        cls.archivos = []
+        for i in range(4):
+            # Cada archivo de un usuario distinto y alternando el almacenamiento
+            usuario = crear_usuario(f'funcionario{i}@alcaldia.gov.co')
+            filas = [{'Año': 2020 + i, 'Dependencia': 'Secretaría de Salud', 'Valor': fila} for fila in range(5)]
+            almacenamiento = ALMACENAMIENTO_COMPACTO if i % 2 else ALMACENAMIENTO_JSON
+            cls.archivos.append(crear_archivo(usuario, filas, almacenamiento, nombre=f'Archivo {i}'))
+
+    def setUp(self):
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.admin)
+
+    def test_listado_de_archivos(self):
+        # conteo, página y versión de los datos para el ETag
+        with self.assertNumQueries(3):
+            res = self.cliente.get('/api/archivos/archivos/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['count'], 4)
+
+    def test_detalle_de_archivo(self):
+        # fecha_actualizacion para el ETag y el archivo con su usuario
+        with self.assertNumQueries(2):
+            res = self.cliente.get(f'/api/archivos/archivos/{self.archivos[1].id}/')
+        self.assertEqual(res.status_code, 200)
+
+    def test_listado_de_registros(self):
+        # conteo y página con el archivo de cada registro
+        with self.assertNumQueries(2):
+            res = self.cliente.get('/api/archivos/registros/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['count'], 20)
+        self.assertEqual(len({registro['archivo'] for registro in res.data['results']}), 4)
+
+    def test_listado_de_registros_de_un_archivo(self):
+        compacto = self.archivos[1]
+        with self.assertNumQueries(2):
+            res = self.cliente.get('/api/archivos/registros/', {'archivo_id': compacto.id})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['count'], 5)
@@ -0,0 +1,47 @@
+from django.core.files.base import ContentFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .datos import crear_archivo, crear_usuario
+
+
+class DescargaArchivoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.propietario = crear_usuario('propietario@alcaldia.gov.co')
+        cls.otro = crear_usuario('otro@alcaldia.gov.co')
+        cls.admin = crear_usuario('admin@alcaldia.gov.co', role='admin')
+        cls.archivo = crear_archivo(cls.propietario, [{'Valor': 1}])
+        cls.archivo.archivo.save('indicadores.xlsx', ContentFile(b'contenido del libro'))
+
+    def setUp(self):
+        self.cliente = APIClient()
+
+    def descargar(self, usuario=None, firma=None):
+        if usuario:
+            self.cliente.force_authenticate(usuario)
+        parametros = {'firma': firma} if firma else {}
+        return self.cliente.get(f'/api/archivos/archivos/{self.archivo.id}/descargar/', parametros)
+
+    def test_detalle_incluye_archivo_y_enlace_firmado(self):
+        res = self.cliente.get(f'/api/archivos/archivos/{self.archivo.id}/')
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('indicadores', res.data['archivo'])
+        self.assertIn('firma=', res.data['archivo_url'])
+
+    def test_enlace_firmado_sin_sesion(self):
+        url = self.cliente.get(f'/api/archivos/archivos/{self.archivo.id}/').data['archivo_url']
+        res = self.cliente.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), b'contenido del libro')
+
+    def test_sin_firma_solo_propietario_o_admin(self):
+        self.assertEqual(self.descargar().status_code, 403)
+        self.assertEqual(self.descargar(self.otro).status_code, 403)
+        self.assertEqual(self.descargar(self.propietario).status_code, 200)
+        self.assertEqual(self.descargar(self.admin).status_code, 200)
+
+    def test_firma_invalida(self):
+        self.assertEqual(self.descargar(firma='no-es-una-firma').status_code, 403)
+        self.assertEqual(self.descargar(self.otro, firma='no-es-una-firma').status_code, 403)
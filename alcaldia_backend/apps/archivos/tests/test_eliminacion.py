@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.archivos.models import ArchivoExcel, RegistroDato
+
+from .datos import crear_archivo, crear_usuario
+
+
+class EliminacionArchivosTests(TestCase):
+
+    def setUp(self):
+        self.usuario = crear_usuario()
+        self.archivo = crear_archivo(self.usuario, [{'Valor': i} for i in range(5)])
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.usuario)
+
+    def eliminar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.cliente.delete(f'/api/archivos/archivos/{self.archivo.id}/')
+
+    def test_purga_sincrona_registra_inicio_y_fin(self):
+        with self.assertLogs('apps.archivos.eliminacion', 'INFO') as registros:
+            res = self.eliminar()
+
+        self.assertEqual(res.status_code, 204)
+        self.assertFalse(ArchivoExcel.todos.filter(pk=self.archivo.pk).exists())
+        self.assertFalse(RegistroDato.todos.filter(archivo_id=self.archivo.pk).exists())
+        mensajes = [registro.getMessage() for registro in registros.records]
+        self.assertEqual(mensajes, ['Archivo marcado para eliminar', 'Purga iniciada', 'Archivo eliminado'])
+
+    @override_settings(ELIMINACION_FILAS_SINCRONA=0, ELIMINACION_PURGA_EN_HILO=False)
+    def test_sin_hilo_la_purga_queda_para_el_comando(self):
+        with self.assertLogs('apps.archivos.eliminacion', 'INFO') as registros:
+            res = self.eliminar()
+
+        self.assertEqual(res.status_code, 202)
+        self.assertIn('Purga pendiente para purgar_archivos', [r.getMessage() for r in registros.records])
+        # Oculto de inmediato, pero con sus registros hasta que corra el comando
+        self.assertFalse(ArchivoExcel.objects.filter(pk=self.archivo.pk).exists())
+        self.assertEqual(RegistroDato.todos.filter(archivo_id=self.archivo.pk).count(), 5)
+
+        call_command('purgar_archivos', antiguedad=0, stdout=StringIO())
+        self.assertFalse(ArchivoExcel.todos.filter(pk=self.archivo.pk).exists())
+        self.assertFalse(RegistroDato.todos.filter(archivo_id=self.archivo.pk).exists())
+
+    @override_settings(ELIMINACION_FILAS_SINCRONA=0, ELIMINACION_PURGA_EN_HILO=False)
+    def test_filas_pendientes_de_purgar_no_se_consultan(self):
+        self.archivo = crear_archivo(self.usuario, [
+            {'Dependencia': 'Secretaría de Salud', 'Valor': i} for i in range(5)
+        ])
+        crear_archivo(self.usuario, [{'Dependencia': 'Secretaría de Educación', 'Valor': 1}])
+        self.assertEqual(self.eliminar().status_code, 202)
+        self.assertEqual(RegistroDato.todos.filter(archivo_id=self.archivo.pk).count(), 5)
+
+        res = self.cliente.get('/api/archivos/registros/', {'archivo_id': self.archivo.id})
+        self.assertEqual(res.data['count'], 0)
+
+        res = self.cliente.post('/api/archivos/registros/buscar/', {'termino': 'Salud'}, format='json')
+        self.assertEqual(res.data['total'], 0)
+
+        res = self.cliente.get('/api/archivos/valores-unicos/', {'campo': 'Dependencia'})
+        self.assertEqual(res.data['valores'], ['Secretaría de Educación'])
@@ -0,0 +1,129 @@
+from datetime import date, datetime
+
+import pandas as pd
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.archivos.tipos import (
+    TIPO_BOOLEANO, TIPO_CATEGORIA, TIPO_DECIMAL, TIPO_ENTERO, TIPO_FECHA, TIPO_TEXTO,
+    InferenciaTipos, a_fecha, a_numero, celdas_minimas, es_nulo,
+)
+
+from .datos import crear_archivo, crear_usuario
+
+
+class ConversionTests(SimpleTestCase):
+
+    def test_numeros(self):
+        casos = {
+            '42': 42,
+            '-7': -7,
+            '3,5': 3.5,
+            '0.125': 0.125,
+            '1.234,5': 1234.5,
+            '1,234.56': 1234.56,
+            '1.000.000': 1000000,
+            '$ 2.000': 2000,
+            '2.000': 2000,
+            '1,500': 1500,
+            '0': 0,
+            '0,5': 0.5,
+            12.5: 12.5,
+        }
+        for texto, esperado in casos.items():
+            with self.subTest(texto=texto):
+                numero = a_numero(texto)
+                self.assertEqual(numero, esperado)
+                self.assertIs(type(numero), type(esperado))
+
+    def test_no_numeros(self):
+        for valor in ('N/D', '', 'abc', True, float('nan'), None):
+            with self.subTest(valor=valor):
+                self.assertIsNone(a_numero(valor))
+
+    def test_ceros_a_la_izquierda(self):
+        # Códigos DANE, NIT e identificaciones: el cero se perdería como número
+        for texto in ('05001', '08001', '-01', '0800.123.456'):
+            with self.subTest(texto=texto):
+                self.assertIsNone(a_numero(texto))
+
+    def test_fechas(self):
+        self.assertEqual(a_fecha('2024-03-01'), datetime(2024, 3, 1))
+        self.assertEqual(a_fecha('01/03/2024'), datetime(2024, 3, 1))
+        self.assertEqual(a_fecha(date(2024, 3, 1)), datetime(2024, 3, 1))
+        self.assertIsNone(a_fecha('Secretaría'))
+        self.assertIsNone(a_fecha('32/13/2024'))
+
+    def test_nulos(self):
+        for valor in (None, float('nan'), pd.NaT, '', '   '):
+            with self.subTest(valor=valor):
+                self.assertTrue(es_nulo(valor))
+        self.assertFalse(es_nulo(0))
+
+
+class InferenciaTests(SimpleTestCase):
+
+    def inferir(self, valores):
+        return InferenciaTipos.inferir_columna(pd.Series(valores))
+
+    def test_tipos(self):
+        self.assertEqual(self.inferir([1, 2, 3]), TIPO_ENTERO)
+        self.assertEqual(self.inferir(['1.234,5', '2.000', '3,75']), TIPO_DECIMAL)
+        self.assertEqual(self.inferir(['2024-01-01', '15/02/2024', '2024-03-01']), TIPO_FECHA)
+        self.assertEqual(self.inferir(['sí', 'no', 'Sí']), TIPO_BOOLEANO)
+        self.assertEqual(self.inferir(['Activo', 'Inactivo', 'Activo', 'Activo']), TIPO_CATEGORIA)
+        self.assertEqual(self.inferir(['Una observación', 'Otra distinta', 'Y otra']), TIPO_TEXTO)
+
+    def test_codigos_con_cero_a_la_izquierda(self):
+        self.assertEqual(self.inferir(['05001', '08001', '11001']), TIPO_TEXTO)
+        self.assertEqual(self.inferir(['05001', '08001', '05001', '05001']), TIPO_CATEGORIA)
+
+    def test_nulos_no_cuentan(self):
+        self.assertEqual(self.inferir([1, None, float('nan'), '', 4]), TIPO_ENTERO)
+        self.assertEqual(self.inferir([None, None]), TIPO_TEXTO)
+
+    def test_una_celda_suelta_en_columna_corta(self):
+        # Con 10 celdas, el 95 % no admitía ninguna celda que no fuera número
+        self.assertEqual(self.inferir([100 * i for i in range(1, 10)] + ['N/D']), TIPO_ENTERO)
+        self.assertEqual(self.inferir(['2024-01-01', '2024-02-01', 'pendiente']), TIPO_FECHA)
+        # Pero no cuando la mitad no encaja
+        self.assertEqual(self.inferir([1, 'N/D']), TIPO_TEXTO)
+        self.assertEqual(self.inferir([1, 2, 'N/D', 'sin dato']), TIPO_TEXTO)
+
+    @override_settings(INFERENCIA_TIPOS_UMBRAL=0.95, INFERENCIA_TIPOS_TOLERANCIA=1)
+    def test_celdas_minimas(self):
+        self.assertEqual(celdas_minimas(1), 1)
+        self.assertEqual(celdas_minimas(2), 2)
+        self.assertEqual(celdas_minimas(10), 9)
+        self.assertEqual(celdas_minimas(1000), 950)
+
+
+class ValoresTipadosTests(TestCase):
+    """
+    Ida y vuelta: los valores de la fila quedan guardados con el tipo de su columna
+    """
+
+    def test_fila_tipada(self):
+        filas = [
+            {'Monto': '1.234,5', 'Cantidad': '12', 'Corte': '01/03/2024', 'Activo': 'sí', 'Nota': 'Uno'},
+            {'Monto': '$ 2.000', 'Cantidad': 7, 'Corte': datetime(2024, 4, 2, 8, 30), 'Activo': 'no', 'Nota': None},
+            {'Monto': 'N/D', 'Cantidad': 3, 'Corte': '2024-05-03', 'Activo': 'Sí', 'Nota': 'Tres'},
+        ]
+        archivo = crear_archivo(crear_usuario(), filas)
+
+        self.assertEqual(archivo.tipos_columnas, {
+            'Monto': TIPO_DECIMAL,
+            'Cantidad': TIPO_ENTERO,
+            'Corte': TIPO_FECHA,
+            'Activo': TIPO_BOOLEANO,
+            'Nota': TIPO_TEXTO,
+        })
+
+        guardadas = [registro.fila for registro in archivo.registros.order_by('numero_fila')]
+        self.assertEqual(guardadas[0], {
+            'Monto': 1234.5, 'Cantidad': 12, 'Corte': '2024-03-01', 'Activo': True, 'Nota': 'Uno',
+        })
+        self.assertEqual(guardadas[1]['Monto'], 2000)
+        self.assertEqual(guardadas[1]['Corte'], '2024-04-02T08:30:00')
+        self.assertIsNone(guardadas[1]['Nota'])
+        # La celda que no encaja en el tipo queda en null
+        self.assertIsNone(guardadas[2]['Monto'])
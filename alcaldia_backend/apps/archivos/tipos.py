@@ -0,0 +1,227 @@
+"""
+Inferencia de tipos de columna al cargar un archivo Excel.
+
+Antes de guardar las filas se infiere el tipo de cada columna a partir de una
+muestra del DataFrame (entero, decimal, fecha, booleano, categoría o texto) y se
+guarda en ArchivoExcel.tipos_columnas. Cada valor se normaliza según el tipo de su
+columna, así el JSON de la fila queda tipado:
+
+- entero y decimal: números JSON, aunque en el Excel vinieran como texto
+  ("1.234,5", "$ 2.000"); los códigos con cero a la izquierda ("05001") no son
+  números y quedan como categoría o texto,
+- fecha: texto ISO 8601 ("2024-03-01" o "2024-03-01T08:30:00"), que ordena igual
+  como texto que como fecha,
+- booleano: true/false (acepta "sí", "no", "verdadero"...),
+- categoría y texto: texto.
+
+Las celdas que no se pueden convertir al tipo de su columna (un "N/D" en una columna
+numérica) se guardan como null; ver INFERENCIA_TIPOS_UMBRAL e INFERENCIA_TIPOS_TOLERANCIA
+para cuántas se toleran.
+Con los valores tipados los filtros por rango comparan en SQL sin convertir texto
+(ver benchmarks/tipos.py).
+"""
+import math
+import re
+from datetime import date, datetime
+from typing import Any, Callable, Dict
+
+from django.conf import settings
+
+TIPO_ENTERO = 'entero'
+TIPO_DECIMAL = 'decimal'
+TIPO_FECHA = 'fecha'
+TIPO_BOOLEANO = 'booleano'
+TIPO_CATEGORIA = 'categoria'
+TIPO_TEXTO = 'texto'
+
+TIPOS_NUMERICOS = (TIPO_ENTERO, TIPO_DECIMAL)
+
+VERDADEROS = {'true', 'verdadero', 'si', 'sí', 's', 'x'}
+FALSOS = {'false', 'falso', 'no', 'n'}
+
+FORMATOS_FECHA = ('%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d', '%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S')
+
+# Descarta rápido los textos que no pueden ser fecha antes de probar los formatos
+PATRON_FECHA = re.compile(r'^\d{1,4}[-/]\d{1,2}[-/]\d{1,4}')
+
+# Un cero a la izquierda seguido de otro dígito ("05001", "0800") es un código
+# (DANE, NIT, identificación): convertirlo a número lo perdería
+PATRON_CERO_IZQUIERDA = re.compile(r'^[-+]?0\d')
+
+
+def es_nulo(valor) -> bool:
+    """
+    None, NaN, NaT o texto vacío
+    """
+    # NaN y NaT son distintos de sí mismos
+    return valor is None or valor != valor or (isinstance(valor, str) and not valor.strip())
+
+
+def a_numero(valor):
+    """
+    El valor como int o float, o None si no es un número
+    """
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return valor if math.isfinite(valor) else None
+    if not isinstance(valor, str):
+        return None
+
+    texto = valor.strip().replace(' ', '').lstrip('$')
+    if PATRON_CERO_IZQUIERDA.match(texto):
+        return None
+    # Separadores de miles y decimales: el último que aparece es el decimal
+    if ',' in texto and '.' in texto:
+        if texto.rfind(',') > texto.rfind('.'):
+            texto = texto.replace('.', '').replace(',', '.')
+        else:
+            texto = texto.replace(',', '')
+    elif ',' in texto or '.' in texto:
+        separador = ',' if ',' in texto else '.'
+        entero, *resto = texto.split(separador)
+        # Un solo separador seguido de tres dígitos es de miles ("2.000", "1,500"),
+        # salvo que la parte entera sea 0 ("0.125")
+        if len(resto) > 1 or (len(resto[0]) == 3 and entero.lstrip('-') not in ('', '0')):
+            texto = texto.replace(separador, '')
+        else:
+            texto = texto.replace(',', '.')
+
+    try:
+        numero = float(texto)
+    except ValueError:
+        return None
+    if not math.isfinite(numero):
+        return None
+    return int(numero) if numero.is_integer() and re.fullmatch(r'-?\d+', texto) else numero
+
+
+def a_fecha(valor):
+    """
+    El valor como datetime, o None si no es una fecha
+    """
+    if isinstance(valor, datetime):
+        return valor
+    if isinstance(valor, date):
+        return datetime(valor.year, valor.month, valor.day)
+    if not isinstance(valor, str) or not PATRON_FECHA.match(valor.strip()):
+        return None
+
+    texto = valor.strip()
+    try:
+        return datetime.fromisoformat(texto)
+    except ValueError:
+        pass
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, formato)
+        except ValueError:
+            continue
+    return None
+
+
+def a_booleano(valor):
+    """
+    El valor como bool, o None si no es un booleano
+    """
+    if isinstance(valor, bool):
+        return valor
+    if isinstance(valor, str):
+        texto = valor.strip().lower()
+        if texto in VERDADEROS:
+            return True
+        if texto in FALSOS:
+            return False
+    return None
+
+
+def celdas_minimas(total: int) -> int:
+    """
+    Celdas de una columna que deben encajar en un tipo para asignárselo. Tolera algunas
+    que no encajan (un "N/D" en una columna numérica): la fracción de
+    INFERENCIA_TIPOS_UMBRAL o, en columnas cortas, INFERENCIA_TIPOS_TOLERANCIA celdas;
+    siempre más de la mitad.
+    """
+    toleradas = max(settings.INFERENCIA_TIPOS_TOLERANCIA,
+                    math.floor(total * (1 - settings.INFERENCIA_TIPOS_UMBRAL)))
+    return max(total - toleradas, total // 2 + 1)
+
+
+def fecha_iso(fecha: datetime) -> str:
+    # Sin hora (medianoche) se guarda sólo la fecha
+    if (fecha.hour, fecha.minute, fecha.second, fecha.microsecond) == (0, 0, 0, 0):
+        return fecha.date().isoformat()
+    return fecha.replace(tzinfo=None).isoformat(timespec='seconds')
+
+
+class InferenciaTipos:
+    """
+    Inferencia del tipo de cada columna y normalización de sus valores
+    """
+
+    @staticmethod
+    def inferir(df) -> Dict[str, str]:
+        """
+        {columna: tipo} para las columnas del DataFrame, sobre una muestra de
+        INFERENCIA_TIPOS_MUESTRA filas
+        """
+        muestra = df
+        if len(df) > settings.INFERENCIA_TIPOS_MUESTRA:
+            muestra = df.sample(settings.INFERENCIA_TIPOS_MUESTRA, random_state=0)
+        return {str(columna): InferenciaTipos.inferir_columna(muestra[columna]) for columna in df.columns}
+
+    @staticmethod
+    def inferir_columna(serie) -> str:
+        from pandas.api import types as tipos_pandas
+
+        valores = [valor for valor in serie.tolist() if not es_nulo(valor)]
+        if not valores:
+            return TIPO_TEXTO
+
+        if tipos_pandas.is_bool_dtype(serie):
+            return TIPO_BOOLEANO
+        if tipos_pandas.is_datetime64_any_dtype(serie):
+            return TIPO_FECHA
+
+        minimo = celdas_minimas(len(valores))
+
+        if sum(a_booleano(valor) is not None for valor in valores) >= minimo:
+            return TIPO_BOOLEANO
+
+        numeros = [numero for numero in map(a_numero, valores) if numero is not None]
+        if len(numeros) >= minimo:
+            return TIPO_ENTERO if all(float(numero).is_integer() for numero in numeros) else TIPO_DECIMAL
+
+        if sum(a_fecha(valor) is not None for valor in valores) >= minimo:
+            return TIPO_FECHA
+
+        distintos = len({str(valor).strip() for valor in valores})
+        if distintos <= settings.INFERENCIA_CATEGORIAS_MAXIMO and distintos * 2 <= len(valores):
+            return TIPO_CATEGORIA
+        return TIPO_TEXTO
+
+    @staticmethod
+    def convertidor(tipo: str) -> Callable[[Any], Any]:
+        """
+        Función que normaliza un valor de una columna del tipo dado para el JSON de la
+        fila. Los valores que no se pueden convertir quedan en None.
+        """
+        def convertir(valor):
+            if es_nulo(valor):
+                return None
+
+            if tipo in TIPOS_NUMERICOS:
+                numero = a_numero(valor)
+                if tipo == TIPO_ENTERO and isinstance(numero, float) and numero.is_integer():
+                    return int(numero)
+                return numero
+            if tipo == TIPO_FECHA:
+                fecha = a_fecha(valor)
+                return fecha_iso(fecha) if fecha is not None else None
+            if tipo == TIPO_BOOLEANO:
+                return a_booleano(valor)
+            if isinstance(valor, (datetime, date)):
+                return fecha_iso(a_fecha(valor))
+            return str(valor).strip()
+
+        return convertir
@@ -5,12 +5,23 @@ from .views import (
     RegistroDatoListView,
     estadisticas_view,
     resumen_archivo_view,
+    descargar_archivo_view,
     valores_unicos_view,
     generar_grafico_view,
+    datos_grafico_view,
+    agregaciones_view,
     carga_masiva_view,
     columnas_disponibles_view,
     buscar_registros_view
 )
+from .views_async import (
+    archivos_async_view,
+    columnas_disponibles_async_view,
+    registros_async_view,
+    estadisticas_async_view,
+    valores_unicos_async_view,
+    buscar_registros_async_view
+)
 
 app_name = 'archivos'
 
@@ -20,6 +31,7 @@ urlpatterns = [
     path('archivos/<int:archivo_id>/resumen/', resumen_archivo_view, name='archivo_resumen'),
     path('archivos/', ArchivoExcelListCreateView.as_view(), name='archivo_list_create'),
     path('archivos/<int:pk>/', ArchivoExcelDetailView.as_view(), name='archivo_detail'),
+    path('archivos/<int:archivo_id>/descargar/', descargar_archivo_view, name='archivo_descargar'),
 
     # Gestión de registros
     path('registros/', RegistroDatoListView.as_view(), name='registro_list'),
@@ -29,7 +41,17 @@ urlpatterns = [
     path('estadisticas/', estadisticas_view, name='estadisticas'),
     path('valores-unicos/', valores_unicos_view, name='valores_unicos'),
     path('generar-grafico/', generar_grafico_view, name='generar_grafico'),
+    path('datos-grafico/', datos_grafico_view, name='datos_grafico'),
+    path('agregaciones/', agregaciones_view, name='agregaciones'),
 
     # Carga masiva
     path('carga-masiva/', carga_masiva_view, name='carga_masiva'),
+
+    # Lectura async (mismas respuestas; aprovechan la concurrencia bajo ASGI)
+    path('async/archivos/', archivos_async_view, name='archivo_list_async'),
+    path('async/columnas-disponibles/', columnas_disponibles_async_view, name='archivo_columnas_disponibles_async'),
+    path('async/registros/', registros_async_view, name='registro_list_async'),
+    path('async/registros/buscar/', buscar_registros_async_view, name='registro_buscar_async'),
+    path('async/estadisticas/', estadisticas_async_view, name='estadisticas_async'),
+    path('async/valores-unicos/', valores_unicos_async_view, name='valores_unicos_async'),
 ]
\ No newline at end of file
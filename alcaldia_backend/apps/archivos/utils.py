@@ -1,13 +1,80 @@
-import pandas as pd
-import openpyxl
 from typing import Dict, List, Any, Tuple
 from django.core.files.uploadedfile import UploadedFile
 from django.conf import settings
 import os
-import magic
-from django.db.models import Count, Q
+import hashlib
+import json
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum, Avg, Min, Max, F, FloatField, Aggregate
+
+from django.db import transaction
+from django.db.models.functions import NullIf
+
+from .almacenamiento import AlmacenamientoRegistros
+from .condiciones import CondicionesJSON
+from .historico import HistoricoArchivos
+from .models import ALMACENAMIENTO_COMPACTO, ArchivoExcel, RegistroDato, ResumenRegistros
+from .particiones import ParticionesRegistros
+from .tipos import InferenciaTipos
+
+# pandas y python-magic sólo se importan en los métodos de carga de archivos: el resto
+# de la API no los necesita y así los workers no pagan su importación al arrancar
+# (ver benchmarks/arranque.py)
+
+# Filas por INSERT al guardar los registros de un archivo
+TAMANO_LOTE_REGISTROS = 2000
+
+# Campos extraídos a columnas propias de RegistroDato
+CAMPOS_ESTANDAR = ['anio', 'dependencia', 'indicador']
+
+# Métricas disponibles (salvo el conteo, se calculan sobre la columna `valor`).
+# Además se aceptan percentiles con la forma p<NN>, p. ej. p50 o p90.
+METRICAS_GRAFICO = {
+    'conteo': 'Registros',
+    'suma': 'Suma de valor',
+    'promedio': 'Promedio de valor',
+    'minimo': 'Mínimo de valor',
+    'maximo': 'Máximo de valor',
+}
+
+
+class Percentil(Aggregate):
+    """
+    Percentil continuo de PostgreSQL: percentile_cont(p) WITHIN GROUP (ORDER BY expr)
+    """
+    function = 'PERCENTILE_CONT'
+    name = 'Percentil'
+    output_field = FloatField()
+    template = '%(function)s(%(fraccion)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+
+    def __init__(self, expression, fraccion: float, **extra):
+        fraccion = float(fraccion)
+        if not 0 < fraccion < 1:
+            raise ValueError("El percentil debe estar entre 0 y 100")
+        super().__init__(expression, fraccion=fraccion, **extra)
+
+
+def version_datos() -> str:
+    """
+    Versión de los datos de Excel derivada de la base de datos. Cambia con cada carga,
+    reprocesamiento o eliminación de archivos, así que sirve como clave de caché
+    compartida entre workers sin necesidad de invalidaciones explícitas.
+    """
+    estado = ArchivoExcel.objects.aggregate(
+        total=Count('id'),
+        ultima=Max('fecha_actualizacion')
+    )
+    ultima = estado['ultima'].timestamp() if estado['ultima'] else 0
+    return f"{estado['total']}-{ultima:.6f}"
+
 
-from .models import ArchivoExcel, RegistroDato
+def clave_cache(prefijo: str, parametros: Dict[str, Any]) -> str:
+    """
+    Construye una clave de caché estable a partir de la versión de los datos y los parámetros
+    """
+    serializado = json.dumps(parametros, sort_keys=True, default=str)
+    digest = hashlib.md5(serializado.encode()).hexdigest()
+    return f"{prefijo}:{version_datos()}:{digest}"
 
 
 class ExcelProcessor:
@@ -33,6 +100,8 @@ class ExcelProcessor:
             if ext not in settings.ALLOWED_EXTENSIONS:
                 return False, f"Extensión no permitida. Extensiones válidas: {', '.join(settings.ALLOWED_EXTENSIONS)}"
 
+            import magic
+
             # Verificar tipo MIME
             mime_type = magic.from_buffer(archivo.read(), mime=True)
             archivo.seek(0)  # Resetear el puntero del archivo
@@ -55,6 +124,8 @@ class ExcelProcessor:
         Procesa el archivo Excel y extrae los datos
         """
         try:
+            import pandas as pd
+
             # Leer el archivo Excel
             archivo_path = self.archivo_excel.archivo.path
 
@@ -91,6 +162,11 @@ class ExcelProcessor:
         """
         Extrae metadatos comunes del DataFrame para facilitar filtros
         """
+        import pandas as pd
+
+        # Tipo de cada columna: los valores se normalizan con él al guardar las filas
+        self.archivo_excel.tipos_columnas = InferenciaTipos.inferir(self.df)
+
         columnas_lower = [col.lower() for col in self.df.columns]
 
         # Buscar columna de año
@@ -129,36 +205,84 @@ class ExcelProcessor:
             if self.df is None:
                 return False, "No hay datos para guardar. Procese el archivo primero."
 
-            registros_creados = 0
-
-            # Eliminar registros anteriores si existen
-            RegistroDato.objects.filter(archivo=self.archivo_excel).delete()
-
-            for index, row in self.df.iterrows():
-                # Convertir la fila a diccionario, manejando valores NaN
-                datos_fila = {}
-                for col in self.df.columns:
-                    value = row[col]
-                    if pd.isna(value):
-                        datos_fila[col] = None
-                    elif isinstance(value, (int, float)):
-                        datos_fila[col] = value
-                    else:
-                        datos_fila[col] = str(value)
-
-                # Crear el registro
-                RegistroDato.objects.create(
-                    archivo=self.archivo_excel,
-                    numero_fila=index + 1,  # +1 para que coincida con Excel
-                    datos=datos_fila
-                )
-                registros_creados += 1
+            # Con registros_datos particionada, la partición se crea fuera de la transacción
+            ParticionesRegistros.asegurar(self.archivo_excel.id)
+
+            with transaction.atomic():
+                # Eliminar registros anteriores si existen
+                if not ParticionesRegistros.vaciar(self.archivo_excel.id):
+                    RegistroDato.objects.filter(archivo=self.archivo_excel).delete()
+
+                registros_creados = self.insertar_registros()
+
+                # Mantener al día el cubo pre-agregado de este archivo
+                CuboRegistros.reconstruir(self.archivo_excel)
 
             return True, f"Se crearon {registros_creados} registros exitosamente"
 
         except Exception as e:
             return False, f"Error al guardar registros: {str(e)}"
 
+    def insertar_registros(self) -> int:
+        """
+        Inserta las filas de self.df con bulk_create en lotes de TAMANO_LOTE_REGISTROS.
+
+        El número de fila sale del índice del DataFrame, así que puede llamarse varias
+        veces con bloques consecutivos de un mismo archivo.
+        """
+        import pandas as pd
+
+        # No-op si la partición ya existe o la tabla no está particionada
+        ParticionesRegistros.asegurar(self.archivo_excel.id)
+
+        columnas = list(self.df.columns)
+        # Archivos cargados antes de la inferencia de tipos: valores como siempre
+        tipos = self.archivo_excel.tipos_columnas or {}
+        convertidores = [
+            InferenciaTipos.convertidor(tipos[str(col)]) if str(col) in tipos
+            else (lambda value: self._valor_json(value, pd.isna))
+            for col in columnas
+        ]
+        # En modo compacto el orden de columnas_disponibles fija la posición de cada valor
+        compacto = self.archivo_excel.almacenamiento == ALMACENAMIENTO_COMPACTO
+        lote = []
+        registros_creados = 0
+
+        for index, *valores in self.df.itertuples(name=None):
+            # Convertir la fila a diccionario, manejando valores NaN
+            datos_fila = {col: convertir(value) for col, convertir, value in zip(columnas, convertidores, valores)}
+
+            registro = RegistroDato(
+                archivo=self.archivo_excel,
+                numero_fila=index + 1,  # +1 para que coincida con Excel
+                datos=datos_fila
+            )
+            # bulk_create no llama a save(): se extraen aquí los campos comunes
+            registro.extraer_campos_comunes()
+            if compacto:
+                registro.valores = list(datos_fila.values())
+                registro.datos = {}
+            lote.append(registro)
+
+            if len(lote) >= TAMANO_LOTE_REGISTROS:
+                RegistroDato.objects.bulk_create(lote)
+                registros_creados += len(lote)
+                lote = []
+
+        if lote:
+            RegistroDato.objects.bulk_create(lote)
+            registros_creados += len(lote)
+
+        return registros_creados
+
+    @staticmethod
+    def _valor_json(value, es_nulo):
+        if es_nulo(value):
+            return None
+        elif isinstance(value, (int, float)):
+            return value
+        return str(value)
+
 
 class FiltrosExcel:
     """
@@ -181,34 +305,43 @@ class FiltrosExcel:
             return [str(v) for v in valores if v is not None]
         else:
             # Buscar en el campo JSON
-            registros = queryset.values_list('datos', flat=True)
-            valores_unicos = set()
+            expresion = AlmacenamientoRegistros.expresion_texto(campo, [archivo_id] if archivo_id else None)
+            valores = FiltrosExcel._valores_json(queryset, expresion)
+            return sorted(str(v) for v in valores)
 
-            for datos in registros:
-                if isinstance(datos, dict) and campo in datos:
-                    valor = datos[campo]
-                    if valor is not None:
-                        valores_unicos.add(str(valor))
-
-            return sorted(list(valores_unicos))
+    @staticmethod
+    def _valores_json(queryset, expresion):
+        """
+        Valores distintos y no nulos de un campo de la fila, calculados en SQL
+        """
+        return queryset.order_by().annotate(valor_campo=expresion).exclude(
+            valor_campo__isnull=True
+        ).values_list('valor_campo', flat=True).distinct()
 
     @staticmethod
-    def filtrar_registros(filtros: Dict[str, Any]):
+    def aplicar_archivo_por_defecto(filtros: Dict[str, Any]):
         """
-        Filtra registros según los criterios especificados (CORREGIDO)
+        Si no se especifica archivo_id, limita los filtros al último archivo subido.
+        Con historico, a todos los archivos con esquema compatible (ver historico.py).
         """
-        # Obtener solo registros del último archivo del usuario si no se especifica archivo_id
-        if 'archivo_id' not in filtros:
-            ultimo_archivo = ArchivoExcel.objects.order_by('-fecha_subida').first()
+        if HistoricoArchivos.aplicar(filtros):
+            return
+        if 'archivo_id' not in filtros and 'archivo_ids' not in filtros:
+            ultimo_archivo = ArchivoExcel.objects.order_by('-fecha_subida').values_list('id', flat=True).first()
             if ultimo_archivo:
-                filtros['archivo_id'] = ultimo_archivo.id
-
-        queryset = RegistroDato.objects.all()
+                filtros['archivo_id'] = ultimo_archivo
 
-        # Filtros básicos
+    @staticmethod
+    def _filtros_basicos(queryset, filtros: Dict[str, Any]):
+        """
+        Aplica los filtros sobre columnas estándar; válidos para RegistroDato y ResumenRegistros
+        """
         if 'archivo_id' in filtros:
             queryset = queryset.filter(archivo_id=filtros['archivo_id'])
 
+        if 'archivo_ids' in filtros:
+            queryset = queryset.filter(archivo_id__in=filtros['archivo_ids'])
+
         if 'anio' in filtros:
             queryset = queryset.filter(anio__icontains=str(filtros['anio']))
 
@@ -218,6 +351,46 @@ class FiltrosExcel:
         if 'indicador' in filtros:
             queryset = queryset.filter(indicador__icontains=str(filtros['indicador']))
 
+        return queryset
+
+    @staticmethod
+    def archivos_filtrados(filtros: Dict[str, Any]):
+        """
+        Ids de los archivos a los que se limitan los filtros, o None si no se limitan
+        """
+        if 'archivo_id' in filtros:
+            return [filtros['archivo_id']]
+        if 'archivo_ids' in filtros:
+            return list(filtros['archivo_ids'])
+        return None
+
+    @staticmethod
+    def filtrar_resumen(filtros: Dict[str, Any]):
+        """
+        Aplica los filtros básicos sobre el cubo pre-agregado
+        """
+        FiltrosExcel.aplicar_archivo_por_defecto(filtros)
+        return FiltrosExcel._filtros_basicos(ResumenRegistros.objects.all(), filtros)
+
+    @staticmethod
+    def filtrar_registros(filtros: Dict[str, Any]):
+        """
+        Filtra registros según los criterios especificados (CORREGIDO)
+        """
+        # Obtener solo registros del último archivo si no se especifica archivo_id
+        FiltrosExcel.aplicar_archivo_por_defecto(filtros)
+        return FiltrosExcel._consulta_registros(filtros)
+
+    @staticmethod
+    def _consulta_registros(filtros: Dict[str, Any]):
+        """
+        Construye el queryset de registros filtrado. Sólo consulta la base de datos para
+        leer los esquemas de los archivos si hay filtros sobre campos JSON. Las
+        condiciones mal formadas lanzan ValueError.
+        """
+        queryset = FiltrosExcel._filtros_basicos(RegistroDato.objects.all(), filtros)
+        archivo_ids = FiltrosExcel.archivos_filtrados(filtros)
+
         # Nuevo: Búsqueda por texto en campos JSON
         if 'busqueda_texto' in filtros:
             busqueda = filtros['busqueda_texto']
@@ -226,24 +399,25 @@ class FiltrosExcel:
 
             if campo and valor:
                 # Búsqueda que contiene el texto (insensible a mayúsculas/minúsculas)
-                queryset = queryset.filter(
-                    datos__has_key=campo
-                ).extra(
-                    where=["LOWER(datos->>%s) LIKE LOWER(%s)"],
-                    params=[campo, f'%{valor}%']
-                )
+                queryset = queryset.alias(
+                    busqueda_campo=AlmacenamientoRegistros.expresion_texto(campo, archivo_ids)
+                ).filter(busqueda_campo__icontains=valor)
 
         # Filtros avanzados en JSON (mantenido para compatibilidad)
         if 'filtros_json' in filtros:
-            for campo, valor in filtros['filtros_json'].items():
+            for i, (campo, valor) in enumerate(filtros['filtros_json'].items()):
                 if valor:
-                    queryset = queryset.filter(datos__has_key=campo)
+                    alias = f'filtro_json_{i}'
+                    queryset = queryset.alias(
+                        **{alias: AlmacenamientoRegistros.expresion_texto(campo, archivo_ids)}
+                    ).filter(**{f'{alias}__isnull': False})
                     if isinstance(valor, str):
                         # Usar búsqueda que contiene en lugar de exacta
-                        queryset = queryset.extra(
-                            where=["LOWER(datos->>%s) LIKE LOWER(%s)"],
-                            params=[campo, f'%{valor}%']
-                        )
+                        queryset = queryset.filter(**{f'{alias}__icontains': valor})
+
+        # Condiciones con operadores (=, <, between, in...) sobre campos JSON
+        if filtros.get('condiciones'):
+            queryset = queryset.filter(CondicionesJSON.compilar(filtros['condiciones'], archivo_ids))
 
         return queryset.select_related('archivo')
 
@@ -253,22 +427,43 @@ class EstadisticasExcel:
     Utilidad para generar estadísticas de los datos de Excel
     """
 
+    @staticmethod
+    def generales() -> Dict[str, Any]:
+        """
+        Totales de archivos y registros con las dependencias y años disponibles.
+        Los registros se cuentan desde el cubo pre-agregado: no dependen de su número.
+        """
+        resumenes = ResumenRegistros.objects.order_by()
+
+        dependencias = [dep for dep in resumenes.values_list('dependencia', flat=True).distinct() if dep]
+        anos = [ano for ano in resumenes.values_list('anio', flat=True).distinct() if ano]
+
+        return {
+            'total_archivos': ArchivoExcel.objects.count(),
+            'total_registros': resumenes.aggregate(total=Sum('total_registros'))['total'] or 0,
+            'archivos_procesados': ArchivoExcel.objects.filter(procesado=True).count(),
+            'dependencias_unicas': len(dependencias),
+            'anos_disponibles': sorted(anos),
+            'dependencias_disponibles': sorted(dependencias),
+        }
+
     @staticmethod
     def resumen_archivo(archivo_id: int) -> Dict[str, Any]:
         """
         Genera un resumen estadístico de un archivo específico
         """
         archivo = ArchivoExcel.objects.get(id=archivo_id)
-        registros = RegistroDato.objects.filter(archivo=archivo)
+        # El cubo pre-agregado tiene una fila por combinación, no por registro
+        resumenes = ResumenRegistros.objects.filter(archivo=archivo).order_by()
 
         resumen = {
             'nombre_archivo': archivo.nombre_archivo,
-            'total_registros': registros.count(),
+            'total_registros': resumenes.aggregate(total=Sum('total_registros'))['total'] or 0,
             'fecha_subida': archivo.fecha_subida,
             'columnas_disponibles': archivo.columnas_disponibles,
-            'anos_disponibles': list(registros.values_list('anio', flat=True).distinct()),
-            'dependencias_disponibles': list(registros.values_list('dependencia', flat=True).distinct()),
-            'indicadores_disponibles': list(registros.values_list('indicador', flat=True).distinct()),
+            'anos_disponibles': list(resumenes.values_list('anio', flat=True).distinct()),
+            'dependencias_disponibles': list(resumenes.values_list('dependencia', flat=True).distinct()),
+            'indicadores_disponibles': list(resumenes.values_list('indicador', flat=True).distinct()),
         }
 
         # Limpiar valores None
@@ -278,67 +473,372 @@ class EstadisticasExcel:
         return resumen
 
     @staticmethod
-    def datos_para_grafico(tipo_grafico: str, filtros: dict) -> dict:
+    def _resolver_campo(campo: str, archivo_ids: List[int] = None) -> Tuple[str, bool]:
         """
-        Genera datos para gráficos con filtros mejorados
+        Resuelve el nombre real de un campo. Retorna (nombre, es_campo_estandar).
+        Para campos JSON busca la columna del archivo sin distinguir mayúsculas,
+        espacios ni guiones bajos (con varios archivos, en el más reciente).
         """
-        # Permitir pasar registros ya filtrados
-        if 'registros' in filtros:
-            registros = filtros['registros']
-        else:
-            registros = FiltrosExcel.filtrar_registros(filtros)
+        campo_normalizado = campo.strip().lower().replace(' ', '_')
+
+        if campo_normalizado in CAMPOS_ESTANDAR:
+            return campo_normalizado, True
+
+        if archivo_ids:
+            columnas = ArchivoExcel.objects.filter(id__in=archivo_ids).order_by('-fecha_subida').values_list(
+                'columnas_disponibles', flat=True
+            ).first() or []
+            for columna in columnas:
+                if columna == campo:
+                    return columna, False
+            for columna in columnas:
+                if columna.strip().lower().replace(' ', '_') == campo_normalizado:
+                    return columna, False
+
+        return campo, False
+
+    @staticmethod
+    def serie_grafico(campo: str, filtros: dict, metrica: str = 'conteo',
+                      top_n: int = None, agrupar_otros: bool = True) -> dict:
+        """
+        Agrupa los registros por un campo (estándar o JSON) y calcula la métrica en SQL.
+        Con top_n se devuelven solo los grupos más grandes y, opcionalmente, el resto
+        acumulado en una categoría "Otros".
+        """
+        AgregadorDatos.expresion_metrica(metrica)
+
+        if 'registros' not in filtros:
+            FiltrosExcel.aplicar_archivo_por_defecto(filtros)
+
+        dimension = AgregadorDatos.expresion_dimension(campo, FiltrosExcel.archivos_filtrados(filtros))
+        registros, desde_cubo = AgregadorDatos.origen(filtros, [dimension], [metrica])
+        base = AgregadorDatos.anotar_dimensiones(registros, [dimension])
+
+        agregacion = AgregadorDatos.expresion_metrica(metrica, desde_cubo)
+        conteo = AgregadorDatos.expresion_metrica('conteo', desde_cubo)
+
+        grupos = base.values('dim_0').annotate(
+            resultado=agregacion,
+            conteo=conteo
+        ).order_by(F('resultado').desc(nulls_last=True))
+
+        filas = list(grupos[:top_n] if top_n else grupos)
 
+        labels = [dimension['etiqueta'](fila['dim_0']) for fila in filas]
+        valores = [AgregadorDatos.normalizar(fila['resultado']) for fila in filas]
+        total = sum(fila['conteo'] for fila in filas)
+
+        # Acumular el resto de grupos en "Otros" con una sola consulta adicional
+        if top_n and agrupar_otros and len(filas) == top_n:
+            resto = base.exclude(dim_0__in=[fila['dim_0'] for fila in filas]).aggregate(
+                resultado=agregacion,
+                conteo=conteo
+            )
+            if resto['conteo']:
+                labels.append('Otros')
+                valores.append(AgregadorDatos.normalizar(resto['resultado']))
+                total += resto['conteo']
+
+        nombre_metrica = AgregadorDatos.nombre_metrica(metrica)
+        return {
+            'campo': dimension['campo'],
+            'metrica': metrica,
+            'titulo': f"{nombre_metrica} por {dimension['campo'].replace('_', ' ').title()}",
+            'labels': labels,
+            'series': [{'nombre': nombre_metrica, 'valores': valores}],
+            'total_registros': total,
+        }
+
+    @staticmethod
+    def datos_para_grafico(tipo_grafico: str, filtros: dict, metrica: str = 'conteo') -> dict:
+        """
+        Genera datos para gráficos con filtros mejorados
+        """
         campo = tipo_grafico.replace('por_', '').replace('_', ' ')
 
-        # Normalizar nombre del campo
-        campo_normalizado = campo.lower().replace(' ', '_')
+        # Los campos estándar no se limitan; los campos JSON muestran los 20 grupos más grandes
+        estandar = campo.lower().replace(' ', '_') in CAMPOS_ESTANDAR
+        serie = EstadisticasExcel.serie_grafico(
+            campo,
+            filtros,
+            metrica=metrica,
+            top_n=None if estandar else 20,
+            agrupar_otros=False
+        )
+
+        return {
+            "labels": serie['labels'],
+            "values": serie['series'][0]['valores'],
+            "title": serie['titulo'],
+            "total_registros": serie['total_registros']
+        }
+
+
+class AgregadorDatos:
+    """
+    Motor de agregación genérico: agrupa RegistroDato por una o dos dimensiones
+    (columnas estándar o claves JSON) y calcula las métricas en una sola consulta SQL
+    """
+
+    MAX_DIMENSIONES = 2
+
+    @staticmethod
+    def nombre_metrica(metrica: str) -> str:
+        if metrica in METRICAS_GRAFICO:
+            return METRICAS_GRAFICO[metrica]
+        return f"Percentil {metrica[1:]} de valor"
+
+    @staticmethod
+    def expresion_metrica(metrica: str, desde_cubo: bool = False):
+        """
+        Traduce el nombre de una métrica a su agregación SQL, sobre RegistroDato o
+        sobre el cubo pre-agregado (ResumenRegistros)
+        """
+        if desde_cubo:
+            if metrica == 'conteo':
+                return Sum('total_registros')
+            if metrica == 'suma':
+                return Sum('suma_valor')
+            if metrica == 'promedio':
+                return Sum('suma_valor') / NullIf(Sum('registros_con_valor'), 0)
+            if metrica == 'minimo':
+                return Min('minimo_valor')
+            if metrica == 'maximo':
+                return Max('maximo_valor')
+
+        if metrica == 'conteo':
+            return Count('id')
+        if metrica == 'suma':
+            return Sum('valor')
+        if metrica == 'promedio':
+            return Avg('valor')
+        if metrica == 'minimo':
+            return Min('valor')
+        if metrica == 'maximo':
+            return Max('valor')
+        if metrica.startswith('p') and metrica[1:].isdigit():
+            return Percentil('valor', int(metrica[1:]) / 100)
+
+        raise ValueError(
+            f"Métrica no válida: {metrica}. Opciones: {', '.join(METRICAS_GRAFICO)} o percentiles (p50, p90...)"
+        )
 
-        # Agrupar por campos estándar o dinámicos
-        if campo in ['dependencia', 'anio', 'indicador']:
-            conteo = registros.values(campo).annotate(total=Count('id')).order_by('-total')
-            labels = [str(c[campo]) for c in conteo if c[campo]]
-            values = [c['total'] for c in conteo]
+    @staticmethod
+    def expresion_dimension(dimension, archivo_ids: List[int] = None) -> Dict[str, Any]:
+        """
+        Construye la expresión SQL de una dimensión. Acepta el nombre del campo o un
+        diccionario {'campo': 'anio', 'intervalo': 5} para agrupar años en tramos.
+        """
+        if isinstance(dimension, dict):
+            campo = dimension.get('campo')
+            intervalo = int(dimension.get('intervalo') or 1)
         else:
-            # Agrupar por campos JSON dinámicos (MEJORADO)
-            json_agrupado = {}
-            total_procesados = 0
-
-            for r in registros:
-                if r.datos and isinstance(r.datos, dict):
-                    # Buscar el campo exacto o variaciones
-                    valor = None
-
-                    # Buscar exacto
-                    if campo in r.datos:
-                        valor = r.datos[campo]
-                    else:
-                        # Buscar insensible a mayúsculas/minúsculas
-                        for key, val in r.datos.items():
-                            if key.lower() == campo.lower():
-                                valor = val
-                                break
-
-                    if valor is not None:
-                        # Convertir valores complejos a string
-                        if isinstance(valor, (list, dict)):
-                            valor = str(valor)
-                        elif isinstance(valor, (int, float)):
-                            valor = str(valor)
-                        else:
-                            valor = str(valor).strip()
-
-                        if valor:  # Solo contar valores no vacíos
-                            json_agrupado[valor] = json_agrupado.get(valor, 0) + 1
-                            total_procesados += 1
-
-            # Ordenar por cantidad descendente y limitar resultados
-            items_ordenados = sorted(json_agrupado.items(), key=lambda x: x[1], reverse=True)[:20]
-            labels = [str(item[0]) for item in items_ordenados]
-            values = [item[1] for item in items_ordenados]
+            campo = dimension
+            intervalo = 1
+
+        if not campo:
+            raise ValueError("Cada dimensión debe indicar el campo")
+
+        campo_real, estandar = EstadisticasExcel._resolver_campo(str(campo), archivo_ids)
+
+        if intervalo > 1:
+            if campo_real != 'anio':
+                raise ValueError("Solo se pueden agrupar por intervalos los años")
+            # División entera: 2023 con intervalo 5 cae en el tramo 2020-2024
+            return {
+                'campo': campo_real,
+                'json': False,
+                'expresion': F('anio') / intervalo * intervalo,
+                'etiqueta': lambda inicio: f"{inicio}-{inicio + intervalo - 1}",
+            }
+
+        if estandar:
+            return {
+                'campo': campo_real,
+                'json': False,
+                'expresion': F(campo_real),
+                'etiqueta': str,
+            }
 
         return {
-            "labels": labels,
-            "values": values,
-            "title": f"Registros por {campo.title()}",
-            "total_registros": sum(values) if values else 0
-        }
\ No newline at end of file
+            'campo': campo_real,
+            'json': True,
+            'expresion': AlmacenamientoRegistros.expresion_texto(campo_real, archivo_ids),
+            'etiqueta': str,
+        }
+
+    @staticmethod
+    def origen(filtros: dict, dimensiones: List[Dict[str, Any]], metricas: List[str]):
+        """
+        Elige de dónde leer: el cubo pre-agregado si la consulta se puede expresar sobre
+        él, o los registros individuales. Retorna (queryset, desde_cubo).
+        """
+        if 'registros' in filtros:
+            return filtros['registros'], False
+
+        if CuboRegistros.puede_responder(dimensiones, metricas, filtros):
+            return FiltrosExcel.filtrar_resumen(filtros), True
+
+        return FiltrosExcel.filtrar_registros(filtros), False
+
+    @staticmethod
+    def anotar_dimensiones(registros, dimensiones: List[Dict[str, Any]]):
+        """
+        Anota el queryset con dim_0, dim_1... y descarta las filas sin valor en alguna dimensión
+        """
+        queryset = registros.order_by()
+
+        for i, dimension in enumerate(dimensiones):
+            alias = f'dim_{i}'
+            queryset = queryset.annotate(**{alias: dimension['expresion']}).exclude(
+                **{f'{alias}__isnull': True}
+            )
+            if dimension['json']:
+                queryset = queryset.exclude(**{alias: ''})
+
+        return queryset
+
+    @staticmethod
+    def normalizar(valor):
+        """
+        Convierte los resultados numéricos a tipos JSON compactos
+        """
+        if valor is None or isinstance(valor, int):
+            return valor
+        return round(float(valor), 2)
+
+    @classmethod
+    def agregar(cls, dimensiones: List[Any], metricas: List[str], filtros: dict,
+                limite: int = None) -> Dict[str, Any]:
+        """
+        Ejecuta la agregación y devuelve filas compactas:
+        [[dimensión 1, (dimensión 2), métrica 1, métrica 2, ...], ...]
+        """
+        if not dimensiones or len(dimensiones) > cls.MAX_DIMENSIONES:
+            raise ValueError(f"Debe indicar entre 1 y {cls.MAX_DIMENSIONES} dimensiones")
+        if not metricas:
+            raise ValueError("Debe indicar al menos una métrica")
+
+        for metrica in metricas:
+            cls.expresion_metrica(metrica)
+
+        if 'registros' not in filtros:
+            FiltrosExcel.aplicar_archivo_por_defecto(filtros)
+
+        archivo_ids = FiltrosExcel.archivos_filtrados(filtros)
+        dims = [cls.expresion_dimension(d, archivo_ids) for d in dimensiones]
+        alias_dims = [f'dim_{i}' for i in range(len(dims))]
+
+        registros, desde_cubo = cls.origen(filtros, dims, metricas)
+        agregaciones = {
+            f'met_{i}': cls.expresion_metrica(m, desde_cubo) for i, m in enumerate(metricas)
+        }
+
+        consulta = cls.anotar_dimensiones(registros, dims).values(*alias_dims).annotate(
+            **agregaciones
+        ).order_by(*alias_dims)
+
+        if limite:
+            consulta = consulta[:limite]
+
+        filas = []
+        for fila in consulta:
+            filas.append(
+                [dim['etiqueta'](fila[alias]) for dim, alias in zip(dims, alias_dims)] +
+                [cls.normalizar(fila[f'met_{i}']) for i in range(len(metricas))]
+            )
+
+        return {
+            'dimensiones': [dim['campo'] for dim in dims],
+            'metricas': list(metricas),
+            'filas': filas,
+        }
+
+    @staticmethod
+    def pivotar(resultado: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convierte el resultado de dos dimensiones en una tabla dinámica por métrica
+        """
+        if len(resultado['dimensiones']) != 2:
+            raise ValueError("La tabla dinámica requiere exactamente dos dimensiones")
+
+        filas = list(dict.fromkeys(fila[0] for fila in resultado['filas']))
+        columnas = list(dict.fromkeys(fila[1] for fila in resultado['filas']))
+        indice_fila = {valor: i for i, valor in enumerate(filas)}
+        indice_columna = {valor: i for i, valor in enumerate(columnas)}
+
+        valores = {
+            metrica: [[None] * len(columnas) for _ in filas]
+            for metrica in resultado['metricas']
+        }
+        for fila in resultado['filas']:
+            i, j = indice_fila[fila[0]], indice_columna[fila[1]]
+            for k, metrica in enumerate(resultado['metricas']):
+                valores[metrica][i][j] = fila[2 + k]
+
+        return {
+            'dimensiones': resultado['dimensiones'],
+            'filas': filas,
+            'columnas': columnas,
+            'valores': valores,
+        }
+
+
+class CuboRegistros:
+    """
+    Mantiene y consulta el cubo pre-agregado (ResumenRegistros) por archivo,
+    dependencia, año e indicador
+    """
+
+    # Lo que se puede responder desde el cubo sin leer los registros individuales
+    DIMENSIONES = {'anio', 'dependencia', 'indicador'}
+    METRICAS = {'conteo', 'suma', 'promedio', 'minimo', 'maximo'}
+    FILTROS = {'archivo_id', 'archivo_ids', 'anio', 'dependencia', 'indicador'}
+
+    @staticmethod
+    def reconstruir(archivo: ArchivoExcel) -> int:
+        """
+        Recalcula las filas del cubo de un archivo con una única agregación en SQL
+        """
+        grupos = RegistroDato.objects.filter(archivo=archivo).order_by().values(
+            'anio', 'dependencia', 'indicador'
+        ).annotate(
+            total=Count('id'),
+            con_valor=Count('valor'),
+            suma=Sum('valor'),
+            minimo=Min('valor'),
+            maximo=Max('valor')
+        )
+
+        resumenes = [
+            ResumenRegistros(
+                archivo=archivo,
+                anio=grupo['anio'],
+                dependencia=grupo['dependencia'],
+                indicador=grupo['indicador'],
+                total_registros=grupo['total'],
+                registros_con_valor=grupo['con_valor'],
+                suma_valor=grupo['suma'],
+                minimo_valor=grupo['minimo'],
+                maximo_valor=grupo['maximo']
+            )
+            for grupo in grupos
+        ]
+
+        with transaction.atomic():
+            ResumenRegistros.objects.filter(archivo=archivo).delete()
+            ResumenRegistros.objects.bulk_create(resumenes, batch_size=1000)
+
+        return len(resumenes)
+
+    @classmethod
+    def puede_responder(cls, dimensiones: List[Dict[str, Any]], metricas: List[str],
+                        filtros: Dict[str, Any]) -> bool:
+        """
+        Indica si la consulta solo usa dimensiones, métricas y filtros presentes en el cubo
+        """
+        return (
+            all(not d['json'] and d['campo'] in cls.DIMENSIONES for d in dimensiones)
+            and all(m in cls.METRICAS for m in metricas)
+            and set(filtros) <= cls.FILTROS
+        )
@@ -3,25 +3,62 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.permissions import AllowAny
-from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from django.db.models import Q, Sum
 from django.http import JsonResponse
 from django.core.paginator import Paginator
-from .models import ArchivoExcel, RegistroDato
+from .models import ArchivoExcel, RegistroDato, ResumenRegistros
 from .serializers import (
     ArchivoExcelSerializer,
     ArchivoExcelListSerializer,
     RegistroDatoSerializer,
     FiltroSerializer,
     EstadisticasSerializer,
-    CargaMasivaSerializer
+    CargaMasivaSerializer,
+    AgregacionSerializer
+)
+from django.conf import settings
+from django.core.cache import cache
+from .utils import FiltrosExcel, EstadisticasExcel, ExcelProcessor, AgregadorDatos, clave_cache, version_datos
+from .serializers import SALT_DESCARGA_ARCHIVO
+from .eliminacion import EliminacionArchivos
+from .condiciones import CondicionesJSON
+from apps.core.descargas import respuesta_archivo, verificar_firma, expiracion_firma, ArchivoNoDisponible
+from apps.core.condicional import (
+    calcular_etag, cache_publico, respuesta_no_modificada, con_validadores, CACHE_PRIVADO
 )
-from .utils import FiltrosExcel, EstadisticasExcel, ExcelProcessor
 from .models import ArchivoExcel
 from .serializers import ArchivoExcelSerializer
-import matplotlib.pyplot as plt
-import io
-import base64
-import seaborn as sns
+import copy
+import logging
+import os
+import mimetypes
+
+logger = logging.getLogger(__name__)
+
+
+def archivos_filtrados(parametros):
+    """
+    Archivos de GET archivos/ según los parámetros de la URL (también los usa la
+    versión async, ver views_async.py)
+    """
+    # usuario_subida_nombre se lee por fila: se trae en la misma consulta
+    queryset = ArchivoExcel.objects.select_related('usuario_subida')
+
+    # Filtros opcionales
+    anio = parametros.get('anio')
+    dependencia = parametros.get('dependencia')
+    usuario = parametros.get('usuario')
+
+    if anio:
+        queryset = queryset.filter(anio=anio)
+    if dependencia:
+        queryset = queryset.filter(dependencia__icontains=dependencia)
+    if usuario:
+        queryset = queryset.filter(usuario_subida=usuario)
+
+    return queryset.order_by('-fecha_subida')
+
 
 class ArchivoExcelListCreateView(generics.ListCreateAPIView):
     """
@@ -39,28 +76,31 @@ class ArchivoExcelListCreateView(generics.ListCreateAPIView):
         return ArchivoExcelListSerializer
 
     def get_queryset(self):
-        queryset = ArchivoExcel.objects.all()
+        return archivos_filtrados(self.request.query_params)
+
+    def list(self, request, *args, **kwargs):
+        # La versión global de los datos cambia con cada carga, reproceso o eliminación
+        etag = calcular_etag('archivos', version_datos(), request.get_full_path())
+        no_modificado = respuesta_no_modificada(request, etag, cache_control=cache_publico())
+        if no_modificado:
+            return no_modificado
 
-        # Filtros opcionales
-        anio = self.request.query_params.get('anio')
-        dependencia = self.request.query_params.get('dependencia')
-        usuario = self.request.query_params.get('usuario')
+        response = super().list(request, *args, **kwargs)
+        return con_validadores(response, etag, cache_control=cache_publico())
 
-        if anio:
-            queryset = queryset.filter(anio=anio)
-        if dependencia:
-            queryset = queryset.filter(dependencia__icontains=dependencia)
-        if usuario:
-            queryset = queryset.filter(usuario_subida=usuario)
 
-        return queryset.order_by('-fecha_subida')
+def puede_gestionar(usuario, archivo) -> bool:
+    """
+    Solo el propietario o un admin puede eliminar el archivo o descargarlo sin enlace firmado
+    """
+    return usuario.is_authenticated and (usuario.is_admin() or archivo.usuario_subida_id == usuario.id)
 
 
 class ArchivoExcelDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
     Vista para ver, actualizar y eliminar archivos Excel específicos
     """
-    queryset = ArchivoExcel.objects.all()
+    queryset = ArchivoExcel.objects.select_related('usuario_subida')
     serializer_class = ArchivoExcelSerializer
 
     def get_permissions(self):
@@ -68,47 +108,89 @@ class ArchivoExcelDetailView(generics.RetrieveUpdateDestroyAPIView):
             return [AllowAny()]   # ✅ invitado puede ver detalle
         return [IsAuthenticated()]
 
+    def retrieve(self, request, *args, **kwargs):
+        modificado = ArchivoExcel.objects.filter(pk=kwargs['pk']).values_list(
+            'fecha_actualizacion', flat=True
+        ).first()
+        if modificado is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        # archivo_url lleva una firma que se renueva por ventanas: forma parte del ETag
+        etag = calcular_etag('archivo', kwargs['pk'], modificado.timestamp(), expiracion_firma())
+        no_modificado = respuesta_no_modificada(request, etag, modificado, cache_publico())
+        if no_modificado:
+            return no_modificado
+
+        response = super().retrieve(request, *args, **kwargs)
+        return con_validadores(response, etag, modificado, cache_publico())
+
     def destroy(self, request, *args, **kwargs):
         archivo = self.get_object()
 
-        # Solo el propietario o admin puede eliminar
-        if not (request.user.is_admin() or archivo.usuario_subida == request.user):
+        if not puede_gestionar(request.user, archivo):
             return Response(
                 {"error": "No tienes permisos para eliminar este archivo"},
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        return super().destroy(request, *args, **kwargs)
+        # Desaparece de inmediato; los registros de archivos grandes se borran en segundo plano
+        if EliminacionArchivos.eliminar(archivo):
+            return Response(
+                {"mensaje": "El archivo se está eliminando", "id": archivo.id},
+                status=status.HTTP_202_ACCEPTED
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class RegistroDatoListView(generics.ListAPIView):
+def registros_filtrados(parametros):
     """
-    Vista para listar registros de datos con filtros
+    Registros de GET registros/ según los parámetros de la URL (también los usa la
+    versión async, ver views_async.py). Las condiciones mal formadas lanzan
+    ValidationError.
     """
-    serializer_class = RegistroDatoSerializer
-    permission_classes = [IsAuthenticated]
+    queryset = RegistroDato.objects.select_related('archivo')
 
-    def get_queryset(self):
-        queryset = RegistroDato.objects.select_related('archivo')
+    # Aplicar filtros
+    filtros = {}
+    for param in ['archivo_id', 'anio', 'dependencia', 'indicador']:
+        value = parametros.get(param)
+        if value:
+            filtros[param] = value
 
-        # Aplicar filtros
-        filtros = {}
-        for param in ['archivo_id', 'anio', 'dependencia', 'indicador']:
-            value = self.request.query_params.get(param)
-            if value:
-                filtros[param] = value
+    # Todos los archivos con el mismo esquema que archivo_id (o el último), ver historico.py
+    if parametros.get('historico', 'false').lower() == 'true':
+        filtros['historico'] = True
+
+    # Filtros personalizados en JSON
+    campo_personalizado = parametros.get('campo_personalizado')
+    valor_personalizado = parametros.get('valor_personalizado')
 
-        # Filtros personalizados en JSON
-        campo_personalizado = self.request.query_params.get('campo_personalizado')
-        valor_personalizado = self.request.query_params.get('valor_personalizado')
+    if campo_personalizado and valor_personalizado:
+        filtros['filtros_json'] = {campo_personalizado: valor_personalizado}
 
-        if campo_personalizado and valor_personalizado:
-            filtros['filtros_json'] = {campo_personalizado: valor_personalizado}
+    # Condiciones con operadores sobre campos JSON, como lista JSON (ver condiciones.py)
+    condiciones = parametros.get('condiciones')
 
+    try:
+        if condiciones:
+            filtros['condiciones'] = CondicionesJSON.desde_texto(condiciones)
         if filtros:
-            queryset = FiltrosExcel.filtrar_registros(filtros)
+            queryset = FiltrosExcel.filtrar_registros(filtros).select_related('archivo')
+    except ValueError as e:
+        raise ValidationError({'condiciones': str(e)})
+
+    return queryset.order_by('archivo', 'numero_fila')
+
+
+class RegistroDatoListView(generics.ListAPIView):
+    """
+    Vista para listar registros de datos con filtros
+    """
+    serializer_class = RegistroDatoSerializer
+    permission_classes = [IsAuthenticated]
 
-        return queryset.order_by('archivo', 'numero_fila')
+    def get_queryset(self):
+        return registros_filtrados(self.request.query_params)
 
 
 @api_view(['GET'])
@@ -118,27 +200,7 @@ def estadisticas_view(request):
     Vista para obtener estadísticas generales
     """
     try:
-        total_archivos = ArchivoExcel.objects.count()
-        total_registros = RegistroDato.objects.count()
-        archivos_procesados = ArchivoExcel.objects.filter(procesado=True).count()
-
-        # Obtener dependencias y años únicos
-        dependencias = RegistroDato.objects.values_list('dependencia', flat=True).distinct()
-        dependencias_disponibles = [dep for dep in dependencias if dep]
-
-        anos = RegistroDato.objects.values_list('anio', flat=True).distinct()
-        anos_disponibles = [ano for ano in anos if ano]
-
-        estadisticas = {
-            'total_archivos': total_archivos,
-            'total_registros': total_registros,
-            'archivos_procesados': archivos_procesados,
-            'dependencias_unicas': len(dependencias_disponibles),
-            'anos_disponibles': sorted(anos_disponibles),
-            'dependencias_disponibles': sorted(dependencias_disponibles)
-        }
-
-        serializer = EstadisticasSerializer(estadisticas)
+        serializer = EstadisticasSerializer(EstadisticasExcel.generales())
         return Response(serializer.data)
 
     except Exception as e:
@@ -155,8 +217,19 @@ def resumen_archivo_view(request, archivo_id):
     Vista para obtener resumen de un archivo específico
     """
     try:
+        modificado = ArchivoExcel.objects.filter(id=archivo_id).values_list(
+            'fecha_actualizacion', flat=True
+        ).first()
+        if modificado is not None:
+            etag = calcular_etag('resumen', archivo_id, modificado.timestamp())
+            no_modificado = respuesta_no_modificada(request, etag, modificado)
+            if no_modificado:
+                return no_modificado
+
         resumen = EstadisticasExcel.resumen_archivo(archivo_id)
-        return Response(resumen)
+        if modificado is None:
+            return Response(resumen)
+        return con_validadores(Response(resumen), etag, modificado)
 
     except ArchivoExcel.DoesNotExist:
         return Response(
@@ -170,6 +243,64 @@ def resumen_archivo_view(request, archivo_id):
         )
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def descargar_archivo_view(request, archivo_id):
+    """
+    Descarga el Excel original. Se autoriza con la firma temporal incluida en
+    archivo_url (la reciben quienes pueden ver el detalle) o, sin firma, al propietario
+    o a un admin; los bytes se transmiten por bloques o los entrega nginx vía
+    X-Accel-Redirect
+    """
+    firma = request.query_params.get('firma')
+    vigencia = verificar_firma(firma, archivo_id, SALT_DESCARGA_ARCHIVO) if firma else None
+
+    if vigencia is None and not request.user.is_authenticated:
+        return Response(
+            {'error': 'Enlace de descarga inválido o expirado'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        archivo = ArchivoExcel.objects.only(
+            'id', 'archivo', 'nombre_archivo', 'usuario_subida_id'
+        ).get(id=archivo_id)
+    except ArchivoExcel.DoesNotExist:
+        return Response({'error': 'Archivo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+
+    if vigencia is None and not puede_gestionar(request.user, archivo):
+        return Response(
+            {'error': 'No tienes permisos para descargar este archivo'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    if not archivo.archivo:
+        return Response({'error': 'Archivo no disponible'}, status=status.HTTP_404_NOT_FOUND)
+
+    # Con firma el navegador puede reutilizar el archivo mientras el enlace siga vigente
+    cache_control = 'private, no-cache'
+    if vigencia is not None:
+        cache_control = f'private, max-age={min(vigencia, settings.DESCARGAS_URL_EXPIRACION)}'
+
+    extension = os.path.splitext(archivo.archivo.name)[1]
+    nombre = archivo.nombre_archivo or os.path.basename(archivo.archivo.name)
+    if not nombre.lower().endswith(extension.lower()):
+        nombre += extension
+    try:
+        return respuesta_archivo(
+            request,
+            archivo.archivo,
+            nombre,
+            mimetypes.guess_type(archivo.archivo.name)[0] or 'application/octet-stream',
+            cache_control=cache_control
+        )
+    except ArchivoNoDisponible:
+        return Response(
+            {'error': 'El archivo ya no existe en el sistema'},
+            status=status.HTTP_410_GONE
+        )
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def valores_unicos_view(request):
@@ -209,9 +340,14 @@ def generar_grafico_view(request):
     try:
         tipo_grafico = request.data.get('tipo_grafico', 'por_dependencia')
         filtros = request.data.get('filtros', {})
+        metrica = request.data.get('metrica', 'conteo')
 
-        print(f"DEBUG - Tipo gráfico: {tipo_grafico}")
-        print(f"DEBUG - Filtros recibidos: {filtros}")
+        if logger.isEnabledFor(logging.DEBUG):
+            # Copia de los filtros: la vista los modifica antes de que el log se escriba
+            logger.debug(
+                "Generando gráfico %s", tipo_grafico,
+                extra={'tipo_grafico': tipo_grafico, 'filtros': copy.deepcopy(filtros), 'metrica': metrica}
+            )
 
         # Asegurar que se use el último archivo del usuario si no se especifica
         if 'archivo_id' not in filtros:
@@ -221,7 +357,6 @@ def generar_grafico_view(request):
 
             if ultimo_archivo:
                 filtros['archivo_id'] = ultimo_archivo.id
-                print(f"DEBUG - Usando último archivo: {ultimo_archivo.id}")
             else:
                 return Response({
                     'error': 'No hay archivos disponibles',
@@ -230,22 +365,26 @@ def generar_grafico_view(request):
                     'title': 'Sin datos'
                 })
 
-        # Procesar filtros de búsqueda de texto
-        if 'busqueda_texto' in filtros:
-            busqueda = filtros['busqueda_texto']
-            print(f"DEBUG - Búsqueda de texto: {busqueda}")
-
         # Generar datos para el gráfico
-        datos_grafico = EstadisticasExcel.datos_para_grafico(tipo_grafico, filtros)
+        datos_grafico = EstadisticasExcel.datos_para_grafico(tipo_grafico, filtros, metrica=metrica)
 
-        print(f"DEBUG - Datos generados: {len(datos_grafico.get('labels', []))} elementos")
+        logger.debug(
+            "Gráfico %s generado con %d categorías", tipo_grafico, len(datos_grafico.get('labels', [])),
+            extra={'archivo_id': filtros.get('archivo_id')}
+        )
 
         return Response(datos_grafico)
 
+    except ValueError as e:
+        return Response({
+            'error': str(e),
+            'labels': [],
+            'values': [],
+            'title': 'Error'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
     except Exception as e:
-        print(f"ERROR en generar_grafico_view: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error al generar gráfico", extra={'tipo_grafico': request.data.get('tipo_grafico')})
 
         return Response({
             'error': f'Error al generar gráfico: {str(e)}',
@@ -255,6 +394,126 @@ def generar_grafico_view(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def datos_grafico_view(request):
+    """
+    Datos compactos para que el frontend dibuje el gráfico (labels + series).
+    La respuesta se cachea hasta que cambien los archivos cargados.
+    """
+    campo = request.query_params.get('campo')
+    metrica = request.query_params.get('metrica', 'conteo')
+
+    if not campo:
+        return Response(
+            {'error': 'Debe especificar el campo'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        top_n = int(request.query_params.get('top', 20)) or None
+        agrupar_otros = request.query_params.get('otros', 'true').lower() != 'false'
+
+        filtros = {}
+        for param in ['archivo_id', 'anio', 'dependencia', 'indicador']:
+            value = request.query_params.get(param)
+            if value:
+                filtros[param] = value
+
+        buscar_campo = request.query_params.get('buscar_campo')
+        buscar_valor = request.query_params.get('buscar_valor')
+        if buscar_campo and buscar_valor:
+            filtros['busqueda_texto'] = {'campo': buscar_campo, 'valor': buscar_valor}
+
+        condiciones = request.query_params.get('condiciones')
+        if condiciones:
+            filtros['condiciones'] = CondicionesJSON.desde_texto(condiciones)
+
+        # Con historico el archivo (indicado o el último) es la referencia del esquema
+        if request.query_params.get('historico', 'false').lower() == 'true':
+            filtros['historico'] = True
+
+        # Igual que generar-grafico: por defecto se usa el último archivo del usuario
+        if 'archivo_id' not in filtros:
+            ultimo_archivo = ArchivoExcel.objects.filter(
+                usuario_subida=request.user
+            ).order_by('-fecha_subida').values_list('id', flat=True).first()
+
+            if not ultimo_archivo:
+                return Response({
+                    'error': 'No hay archivos disponibles',
+                    'labels': [],
+                    'series': []
+                })
+            filtros['archivo_id'] = ultimo_archivo
+
+        clave = clave_cache('datos-grafico', {
+            'campo': campo,
+            'metrica': metrica,
+            'top': top_n,
+            'otros': agrupar_otros,
+            'filtros': filtros,
+        })
+        datos = cache.get(clave)
+
+        if datos is None:
+            datos = EstadisticasExcel.serie_grafico(
+                campo,
+                dict(filtros),
+                metrica=metrica,
+                top_n=top_n,
+                agrupar_otros=agrupar_otros
+            )
+            cache.set(clave, datos, settings.CACHE_GRAFICOS_SEGUNDOS)
+
+        return Response(datos)
+
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    except Exception as e:
+        return Response(
+            {'error': f'Error al obtener datos del gráfico: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def agregaciones_view(request):
+    """
+    Agregaciones sobre los registros (suma, promedio, mínimo, máximo, conteo y
+    percentiles de valor) agrupadas por una o dos dimensiones en una sola consulta
+    """
+    serializer = AgregacionSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    datos = serializer.validated_data
+
+    try:
+        resultado = AgregadorDatos.agregar(
+            datos['dimensiones'],
+            datos['metricas'],
+            dict(datos.get('filtros') or {}),
+            limite=datos.get('limite')
+        )
+
+        if datos['formato'] == 'pivote':
+            resultado = AgregadorDatos.pivotar(resultado)
+
+        return Response(resultado)
+
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    except Exception as e:
+        return Response(
+            {'error': f'Error al calcular agregaciones: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def carga_masiva_view(request):
@@ -322,6 +581,67 @@ def carga_masiva_view(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def archivo_columnas(archivo_id, usuario):
+    """
+    Archivo de columnas-disponibles/: el de archivo_id o el último del usuario (también
+    lo usa la versión async). Devuelve (archivo, None) o (None, (datos, status)) con la
+    respuesta de error.
+    """
+    if archivo_id:
+        archivo = ArchivoExcel.objects.filter(id=archivo_id).first()
+    else:
+        # ⚠️ Si no hay archivo_id, y el usuario no está autenticado, devolvemos error
+        if not usuario or not usuario.is_authenticated:
+            return None, ({
+                'error': 'Debe especificar un archivo_id como invitado'
+            }, status.HTTP_400_BAD_REQUEST)
+
+        archivo = ArchivoExcel.objects.filter(
+            usuario_subida=usuario
+        ).order_by('-fecha_subida').first()
+
+    if not archivo:
+        return None, ({
+            'error': 'No hay archivos disponibles',
+            'columnas': [],
+            'total_columnas': 0,
+            'total_filas': 0
+        }, status.HTTP_404_NOT_FOUND)
+
+    return archivo, None
+
+
+def reprocesar_columnas(archivo):
+    """
+    Caso raro: archivo sin columnas (sin procesar). El error queda en el log.
+    """
+    try:
+        processor = ExcelProcessor(archivo)
+        processor.procesar_excel()
+    except Exception:
+        logger.exception("Error al reprocesar archivo", extra={'archivo_id': archivo.id})
+
+
+def datos_columnas(archivo):
+    return {
+        'columnas': archivo.columnas_disponibles or [],
+        'tipos_columnas': archivo.tipos_columnas or {},
+        'total_columnas': archivo.total_columnas or 0,
+        'total_filas': archivo.total_filas or 0,
+        'archivo_id': archivo.id,
+        'nombre_archivo': archivo.nombre_archivo
+    }
+
+
+def error_columnas(error):
+    return {
+        'error': f'Error al obtener columnas: {str(error)}',
+        'columnas': [],
+        'total_columnas': 0,
+        'total_filas': 0
+    }
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def columnas_disponibles_view(request):
@@ -330,52 +650,74 @@ def columnas_disponibles_view(request):
     """
     try:
         archivo_id = request.query_params.get('archivo_id')
+        archivo, error = archivo_columnas(archivo_id, request.user)
+        if error:
+            return Response(*error)
 
-        if archivo_id:
-            archivo = ArchivoExcel.objects.filter(id=archivo_id).first()
+        # Sin archivo_id la respuesta depende del usuario: no debe guardarse en proxies
+        cache_control = cache_publico() if archivo_id else CACHE_PRIVADO
+        etag = calcular_etag('columnas', archivo.id, archivo.fecha_actualizacion.timestamp())
+
+        if archivo.columnas_disponibles:
+            no_modificado = respuesta_no_modificada(
+                request, etag, archivo.fecha_actualizacion, cache_control
+            )
+            if no_modificado:
+                return no_modificado
         else:
-            # ⚠️ Si no hay archivo_id, y el usuario no está autenticado, devolvemos error
-            if not request.user or not request.user.is_authenticated:
-                return Response({
-                    'error': 'Debe especificar un archivo_id como invitado'
-                }, status=status.HTTP_400_BAD_REQUEST)
+            reprocesar_columnas(archivo)
+            etag = calcular_etag('columnas', archivo.id, archivo.fecha_actualizacion.timestamp())
 
-            archivo = ArchivoExcel.objects.filter(
-                usuario_subida=request.user
-            ).order_by('-fecha_subida').first()
+        return con_validadores(
+            Response(datos_columnas(archivo)), etag, archivo.fecha_actualizacion, cache_control
+        )
 
-        if not archivo:
-            return Response({
-                'error': 'No hay archivos disponibles',
-                'columnas': [],
-                'total_columnas': 0,
-                'total_filas': 0
-            }, status=status.HTTP_404_NOT_FOUND)
-
-        if not archivo.columnas_disponibles:
-            try:
-                processor = ExcelProcessor(archivo)
-                processor.procesar_excel()
-            except Exception as e:
-                print(f"Error al reprocesar archivo: {e}")
+    except Exception as e:
+        logger.exception("Error al obtener columnas disponibles")
+        return Response(error_columnas(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        return Response({
-            'columnas': archivo.columnas_disponibles or [],
-            'total_columnas': archivo.total_columnas or 0,
-            'total_filas': archivo.total_filas or 0,
-            'archivo_id': archivo.id,
-            'nombre_archivo': archivo.nombre_archivo
-        })
 
-    except Exception as e:
-        print(f"Error en columnas_disponibles_view: {e}")
-        return Response({
-            'error': f'Error al obtener columnas: {str(e)}',
-            'columnas': [],
-            'total_columnas': 0,
-            'total_filas': 0
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+def busqueda_registros(datos):
+    """
+    Página de resultados de POST registros/buscar/ (también la usa la versión async).
+    Los filtros o parámetros de paginación inválidos lanzan ValueError.
+    """
+    # Obtener parámetros de búsqueda
+    termino = datos.get('termino', '')
+    filtros = datos.get('filtros', {})
+    page = int(datos.get('page', 1))
+    page_size = int(datos.get('page_size', 20))
+
+    # Construir queryset
+    queryset = RegistroDato.objects.select_related('archivo')
+
+    # Aplicar filtros básicos
+    if filtros:
+        queryset = FiltrosExcel.filtrar_registros(filtros)
+
+    # Búsqueda por término
+    if termino:
+        queryset = queryset.filter(
+            Q(indicador__icontains=termino) |
+            Q(dependencia__icontains=termino) |
+            Q(archivo__nombre_archivo__icontains=termino)
+        )
 
+    # Paginación
+    paginator = Paginator(queryset, page_size)
+    registros_paginados = paginator.get_page(page)
+
+    # Serializar datos
+    serializer = RegistroDatoSerializer(registros_paginados, many=True)
+
+    return {
+        'resultados': serializer.data,
+        'total': paginator.count,
+        'paginas': paginator.num_pages,
+        'pagina_actual': page,
+        'tiene_siguiente': registros_paginados.has_next(),
+        'tiene_anterior': registros_paginados.has_previous()
+    }
 
 
 @api_view(['POST'])
@@ -385,42 +727,10 @@ def buscar_registros_view(request):
     Vista para búsqueda avanzada de registros
     """
     try:
-        # Obtener parámetros de búsqueda
-        termino = request.data.get('termino', '')
-        filtros = request.data.get('filtros', {})
-        page = int(request.data.get('page', 1))
-        page_size = int(request.data.get('page_size', 20))
+        return Response(busqueda_registros(request.data))
 
-        # Construir queryset
-        queryset = RegistroDato.objects.select_related('archivo')
-
-        # Aplicar filtros básicos
-        if filtros:
-            queryset = FiltrosExcel.filtrar_registros(filtros)
-
-        # Búsqueda por término
-        if termino:
-            queryset = queryset.filter(
-                Q(indicador__icontains=termino) |
-                Q(dependencia__icontains=termino) |
-                Q(archivo__nombre_archivo__icontains=termino)
-            )
-
-        # Paginación
-        paginator = Paginator(queryset, page_size)
-        registros_paginados = paginator.get_page(page)
-
-        # Serializar datos
-        serializer = RegistroDatoSerializer(registros_paginados, many=True)
-
-        return Response({
-            'resultados': serializer.data,
-            'total': paginator.count,
-            'paginas': paginator.num_pages,
-            'pagina_actual': page,
-            'tiene_siguiente': registros_paginados.has_next(),
-            'tiene_anterior': registros_paginados.has_previous()
-        })
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     except Exception as e:
         return Response(
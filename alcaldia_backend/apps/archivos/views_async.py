@@ -0,0 +1,151 @@
+"""
+Versiones async de los endpoints de lectura que esperan a la base de datos (ver
+apps/core/asincrono.py): archivos, columnas disponibles, registros, búsqueda, valores
+únicos y estadísticas.
+
+Responden lo mismo que sus equivalentes de views.py porque ejecutan el mismo código
+(archivos_filtrados, archivo_columnas, registros_filtrados, busqueda_registros,
+FiltrosExcel, EstadisticasExcel y los serializers) con sync_to_async: bajo ASGI el
+event loop queda libre para atender otras peticiones mientras la consulta, que sigue
+siendo bloqueante, se ejecuta en un hilo del executor de sync_to_async.
+"""
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+
+from apps.core.asincrono import RespuestaJSON, paginar, vista_asincrona
+from apps.core.condicional import (
+    calcular_etag, cache_publico, respuesta_no_modificada, con_validadores, CACHE_PRIVADO
+)
+from .serializers import ArchivoExcelListSerializer, EstadisticasSerializer, RegistroDatoSerializer
+from .utils import EstadisticasExcel, FiltrosExcel, version_datos
+from .views import (
+    archivo_columnas, archivos_filtrados, busqueda_registros, datos_columnas,
+    error_columnas, registros_filtrados, reprocesar_columnas
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@vista_asincrona(permisos=(AllowAny,))
+async def archivos_async_view(request):
+    """
+    Lista paginada de archivos con filtros (equivalente a GET archivos/)
+    """
+    # La versión global de los datos cambia con cada carga, reproceso o eliminación
+    etag = calcular_etag('archivos', await sync_to_async(version_datos)(), request.get_full_path())
+    no_modificado = respuesta_no_modificada(request, etag, cache_control=cache_publico())
+    if no_modificado:
+        return no_modificado
+
+    queryset = archivos_filtrados(request.GET)
+    datos = await paginar(request, queryset, ArchivoExcelListSerializer)
+    return con_validadores(RespuestaJSON(datos), etag, cache_control=cache_publico())
+
+
+@vista_asincrona(permisos=(AllowAny,))
+async def columnas_disponibles_async_view(request):
+    """
+    Columnas del archivo indicado o del último del usuario (equivalente a GET
+    columnas-disponibles/)
+    """
+    try:
+        archivo_id = request.GET.get('archivo_id')
+        archivo, error = await sync_to_async(archivo_columnas)(archivo_id, request.user)
+        if error:
+            return RespuestaJSON(*error)
+
+        # Sin archivo_id la respuesta depende del usuario: no debe guardarse en proxies
+        cache_control = cache_publico() if archivo_id else CACHE_PRIVADO
+        etag = calcular_etag('columnas', archivo.id, archivo.fecha_actualizacion.timestamp())
+
+        if archivo.columnas_disponibles:
+            no_modificado = respuesta_no_modificada(
+                request, etag, archivo.fecha_actualizacion, cache_control
+            )
+            if no_modificado:
+                return no_modificado
+        else:
+            await sync_to_async(reprocesar_columnas)(archivo)
+            etag = calcular_etag('columnas', archivo.id, archivo.fecha_actualizacion.timestamp())
+
+        return con_validadores(
+            RespuestaJSON(datos_columnas(archivo)), etag, archivo.fecha_actualizacion, cache_control
+        )
+
+    except Exception as e:
+        logger.exception("Error al obtener columnas disponibles")
+        return RespuestaJSON(error_columnas(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@vista_asincrona()
+async def registros_async_view(request):
+    """
+    Lista paginada de registros con filtros (equivalente a GET registros/)
+    """
+    queryset = await sync_to_async(registros_filtrados)(request.GET)
+    return RespuestaJSON(await paginar(request, queryset, RegistroDatoSerializer))
+
+
+@vista_asincrona()
+async def estadisticas_async_view(request):
+    """
+    Estadísticas generales (equivalente a GET estadisticas/)
+    """
+    try:
+        estadisticas = await sync_to_async(EstadisticasExcel.generales)()
+        return RespuestaJSON(EstadisticasSerializer(estadisticas).data)
+
+    except Exception as e:
+        return RespuestaJSON(
+            {'error': f'Error al obtener estadísticas: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@vista_asincrona()
+async def valores_unicos_async_view(request):
+    """
+    Valores únicos de un campo (equivalente a GET valores-unicos/)
+    """
+    campo = request.GET.get('campo')
+    archivo_id = request.GET.get('archivo_id')
+
+    if not campo:
+        return RespuestaJSON(
+            {'error': 'Debe especificar el campo'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        valores = await sync_to_async(FiltrosExcel.obtener_valores_unicos)(
+            campo=campo,
+            archivo_id=int(archivo_id) if archivo_id else None
+        )
+
+        return RespuestaJSON({'valores': valores})
+
+    except Exception as e:
+        return RespuestaJSON(
+            {'error': f'Error al obtener valores únicos: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@vista_asincrona(metodos=('POST',))
+async def buscar_registros_async_view(request):
+    """
+    Búsqueda avanzada de registros (equivalente a POST registros/buscar/)
+    """
+    try:
+        return RespuestaJSON(await sync_to_async(busqueda_registros)(request.data))
+
+    except ValueError as e:
+        return RespuestaJSON({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    except Exception as e:
+        return RespuestaJSON(
+            {'error': f'Error en búsqueda: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
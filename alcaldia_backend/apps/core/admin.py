@@ -0,0 +1,58 @@
+import os
+
+from django.contrib import admin
+from django.http import Http404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .descargas import ArchivoNoDisponible, respuesta_archivo
+from .models import PerfilPeticion
+
+
+@admin.register(PerfilPeticion)
+class PerfilPeticionAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'metodo', 'ruta', 'estado', 'duracion_ms', 'motivo', 'motor', 'usuario', 'descarga')
+    list_filter = ('motivo', 'motor', 'metodo', 'estado', 'fecha')
+    search_fields = ('ruta', 'id_correlacion', 'usuario__email')
+    list_select_related = ('usuario',)
+    date_hierarchy = 'fecha'
+    readonly_fields = (
+        'fecha', 'metodo', 'ruta', 'estado', 'duracion_ms', 'usuario', 'id_correlacion',
+        'motivo', 'motor', 'parametros', 'descarga', 'resumen_formateado',
+    )
+    exclude = ('archivo', 'resumen')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        # MEDIA no se sirve en producción: el perfil se entrega desde el propio admin
+        propias = [
+            path('<int:perfil_id>/descargar/', self.admin_site.admin_view(self.descargar_view),
+                 name='core_perfilpeticion_descargar'),
+        ]
+        return propias + super().get_urls()
+
+    def descargar_view(self, request, perfil_id):
+        perfil = self.get_object(request, str(perfil_id))
+        if perfil is None or not self.has_view_permission(request, perfil):
+            raise Http404
+        try:
+            return respuesta_archivo(
+                request, perfil.archivo, os.path.basename(perfil.archivo.name),
+                'text/html' if perfil.motor == 'pyinstrument' else 'application/octet-stream',
+            )
+        except ArchivoNoDisponible:
+            raise Http404
+
+    @admin.display(description='Perfil')
+    def descarga(self, obj):
+        url = reverse('admin:core_perfilpeticion_descargar', args=[obj.pk])
+        return format_html('<a href="{}">Descargar .{}</a>', url, obj.archivo.name.rsplit('.', 1)[-1])
+
+    @admin.display(description='Funciones más costosas')
+    def resumen_formateado(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.resumen)
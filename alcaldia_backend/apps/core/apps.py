@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'apps.core'
+
+    def ready(self):
+        from django.core.signals import got_request_exception
+        from django.db.backends.signals import connection_created
+
+        from .metricas import conexion_creada, excepcion_peticion
+
+        connection_created.connect(conexion_creada, dispatch_uid='core_conexion_creada')
+        got_request_exception.connect(excepcion_peticion, dispatch_uid='core_excepcion_peticion')
@@ -0,0 +1,118 @@
+"""
+Soporte para vistas asíncronas de sólo lectura servidas bajo ASGI.
+
+DRF 3.14 no admite vistas async, así que estas vistas son funciones async de Django
+que reutilizan las piezas de DRF de las vistas síncronas: JWTAuthentication, las
+clases de permisos, la paginación configurada y los serializers. Todo lo que toca
+la base de datos se ejecuta con sync_to_async, igual que el ORM async de Django 4.2
+(que por dentro hace un sync_to_async por consulta): bajo un servidor ASGI
+(gunicorn -k uvicorn.workers.UvicornWorker config.asgi:application) el event loop
+queda libre mientras la petición espera a la base de datos, aunque la consulta sigue
+ocupando un hilo del executor de sync_to_async mientras dura.
+"""
+import functools
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from rest_framework import exceptions
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+
+class RespuestaJSON(JsonResponse):
+    """
+    JsonResponse con el codificador de DRF (fechas, decimales, UUID) y sin escapar
+    caracteres no ASCII, igual que JSONRenderer
+    """
+
+    def __init__(self, datos, status=200, **kwargs):
+        super().__init__(
+            datos, encoder=JSONEncoder, safe=False, status=status,
+            json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')}, **kwargs
+        )
+
+
+def vista_asincrona(metodos=('GET',), permisos=(IsAuthenticated,)):
+    """
+    Decorador para vistas async: valida el método, autentica con JWTAuthentication,
+    comprueba las clases de permisos de DRF y responde los errores de DRF con el mismo
+    formato. La vista recibe request.user y, en POST, request.data con el cuerpo JSON.
+    """
+    def decorador(vista):
+        @functools.wraps(vista)
+        async def envoltura(request, *args, **kwargs):
+            if request.method not in metodos:
+                return RespuestaJSON(
+                    {'detail': f'Método "{request.method}" no permitido.'}, status=405,
+                    headers={'Allow': ', '.join(metodos)}
+                )
+
+            try:
+                # Carga el usuario del token: es una consulta, va en un hilo
+                autenticado = await sync_to_async(JWTAuthentication().authenticate)(request)
+            except exceptions.AuthenticationFailed as error:
+                return RespuestaJSON(
+                    {'detail': error.detail}, status=401,
+                    headers={'WWW-Authenticate': 'Bearer realm="api"'}
+                )
+
+            # Sin token el usuario queda anónimo, como en las vistas de DRF (que no usan
+            # la sesión); además evita que el usuario perezoso de la sesión consulte la
+            # base de datos desde el event loop
+            request.user = autenticado[0] if autenticado else AnonymousUser()
+
+            # Como APIView.permission_denied: 401 sin autenticar, 403 si no tiene permiso
+            for permiso in permisos:
+                if permiso().has_permission(request, None):
+                    continue
+                if not autenticado:
+                    return RespuestaJSON(
+                        {'detail': exceptions.NotAuthenticated.default_detail}, status=401,
+                        headers={'WWW-Authenticate': 'Bearer realm="api"'}
+                    )
+                return RespuestaJSON(
+                    {'detail': getattr(permiso, 'message', exceptions.PermissionDenied.default_detail)},
+                    status=403
+                )
+
+            request.data = {}
+            if request.method == 'POST' and request.body:
+                try:
+                    request.data = json.loads(request.body)
+                except ValueError:
+                    return RespuestaJSON({'detail': 'JSON inválido'}, status=400)
+
+            try:
+                return await vista(request, *args, **kwargs)
+            except exceptions.APIException as error:
+                # Mismo cuerpo que exception_handler de DRF
+                datos = error.detail if isinstance(error.detail, (list, dict)) else {'detail': error.detail}
+                return RespuestaJSON(datos, status=error.status_code)
+
+        # Lo mismo que hace APIView.as_view con csrf_exempt (la autenticación es por
+        # token, no por cookie); el csrf_exempt de Django 4.2 no admite vistas async
+        envoltura.csrf_exempt = True
+        return envoltura
+    return decorador
+
+
+async def paginar(request, queryset, serializer_class):
+    """
+    Página de la clase de paginación de DRF ({count, next, previous, results}) con los
+    objetos serializados. Se pagina y serializa en un hilo: el conteo, la página y las
+    relaciones que lea el serializer son consultas.
+    """
+    paginador = api_settings.DEFAULT_PAGINATION_CLASS()
+    peticion = Request(request)
+
+    def pagina():
+        objetos = paginador.paginate_queryset(queryset, peticion)
+        datos = serializer_class(objetos, many=True, context={'request': peticion}).data
+        return paginador.get_paginated_response(datos).data
+
+    return await sync_to_async(pagina)()
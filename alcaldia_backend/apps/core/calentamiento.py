@@ -0,0 +1,116 @@
+"""
+Calentamiento de la aplicación en el proceso maestro de gunicorn (preload_app).
+
+Todo lo que se carga aquí antes del fork queda en páginas compartidas por los
+workers (copy-on-write) en lugar de repetirse en cada uno. Después gunicorn.conf.py
+congela el GC (gc.freeze) para que las recolecciones de los workers no escriban en
+esos objetos y las páginas sigan compartidas.
+
+No consulta la base de datos y cierra cualquier conexión antes de volver: los
+workers no deben heredar sockets del maestro.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Librerías que las vistas importan de forma perezosa (ver benchmarks/arranque.py)
+LIBRERIAS_PESADAS = (
+    'pandas',
+    'openpyxl',
+    'magic',
+    'matplotlib.figure',
+    'matplotlib.backends.backend_agg',
+    'reportlab.platypus',
+    'reportlab.lib.styles',
+)
+
+
+def _resolver_urls():
+    from django.urls import get_resolver
+
+    resolver = get_resolver()
+    # reverse_dict recorre y compila todos los patrones, incluidos los de include()
+    resolver.reverse_dict
+    resolver.namespace_dict
+
+
+def _serializadores():
+    """
+    Construye los campos de cada serializer de la aplicación, lo que también llena
+    las cachés de _meta de los modelos que usan
+    """
+    from django.apps import apps
+    from rest_framework import serializers
+
+    for modelo in apps.get_models():
+        modelo._meta.get_fields()
+
+    pendientes = [serializers.BaseSerializer]
+    while pendientes:
+        clase = pendientes.pop()
+        pendientes.extend(clase.__subclasses__())
+        if not clase.__module__.startswith('apps.'):
+            continue
+        try:
+            clase().fields
+        except Exception:
+            # Serializers que requieren argumentos o contexto: se omiten
+            logger.debug("No se pudo calentar %s", clase.__qualname__)
+
+
+def _librerias():
+    import importlib
+
+    for nombre in LIBRERIAS_PESADAS:
+        try:
+            importlib.import_module(nombre)
+        except ImportError:
+            logger.warning("No se pudo precargar %s", nombre)
+
+
+def _fuentes_matplotlib():
+    """
+    Carga la caché de fuentes y dibuja un gráfico mínimo para inicializar el
+    renderizado de texto de Agg
+    """
+    from apps.reportes.graficos import RenderizadorGraficos
+
+    renderizador = RenderizadorGraficos()
+    renderizador.a_bytes(renderizador.barras(['a', 'b'], [1, 2], 'calentamiento'))
+
+
+def _traducciones():
+    from django.utils import translation
+
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.deactivate()
+
+
+def calentar():
+    """
+    Ejecuta todos los pasos de calentamiento y registra cuánto tardó cada uno
+    """
+    pasos = [
+        ('urls', _resolver_urls),
+        ('serializadores', _serializadores),
+        ('traducciones', _traducciones),
+    ]
+    if getattr(settings, 'CALENTAR_LIBRERIAS', True):
+        pasos += [('librerias', _librerias), ('fuentes', _fuentes_matplotlib)]
+
+    duraciones = {}
+    for nombre, paso in pasos:
+        inicio = time.perf_counter()
+        try:
+            paso()
+        except Exception:
+            logger.exception("Falló el paso de calentamiento %s", nombre)
+        duraciones[nombre] = round((time.perf_counter() - inicio) * 1000, 1)
+
+    connections.close_all()
+    logger.info("Aplicación precargada", extra={'calentamiento_ms': duraciones})
+    return duraciones
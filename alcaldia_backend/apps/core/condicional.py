@@ -0,0 +1,60 @@
+"""
+Caché HTTP condicional (ETag / Last-Modified) para endpoints de lectura.
+
+Las vistas calculan un ETag barato (fecha de actualización o versión de los datos)
+y responden 304 antes de ejecutar las consultas pesadas y la serialización.
+"""
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+CACHE_PRIVADO = 'private, no-cache'
+
+
+def calcular_etag(*partes) -> str:
+    """
+    ETag fuerte a partir de los valores que determinan el contenido de la respuesta
+    """
+    huella = hashlib.md5(':'.join(str(parte) for parte in partes).encode()).hexdigest()
+    return f'"{huella}"'
+
+
+def cache_publico() -> str:
+    """
+    Cache-Control para respuestas públicas: el navegador siempre revalida (304) y un
+    proxy compartido como nginx puede servirlas durante CACHE_HTTP_PUBLICO_SEGUNDOS
+    """
+    segundos = getattr(settings, 'CACHE_HTTP_PUBLICO_SEGUNDOS', 0)
+    if segundos > 0:
+        return f'public, max-age=0, s-maxage={segundos}, must-revalidate'
+    return 'public, no-cache'
+
+
+def respuesta_no_modificada(request, etag, modificado=None, cache_control=CACHE_PRIVADO):
+    """
+    Devuelve una respuesta 304 si el cliente ya tiene la versión vigente, o None
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+
+    marca = int(modificado.timestamp()) if modificado else None
+    respuesta = get_conditional_response(request, etag=etag, last_modified=marca)
+    if respuesta is None:
+        return None
+    return con_validadores(respuesta, etag, modificado, cache_control)
+
+
+def con_validadores(respuesta, etag, modificado=None, cache_control=CACHE_PRIVADO):
+    """
+    Agrega ETag, Last-Modified y Cache-Control a una respuesta exitosa
+    """
+    if respuesta.status_code not in (200, 304):
+        return respuesta
+
+    respuesta['ETag'] = etag
+    if modificado:
+        respuesta['Last-Modified'] = http_date(modificado.timestamp())
+    respuesta['Cache-Control'] = cache_control
+    return respuesta
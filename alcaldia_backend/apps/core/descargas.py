@@ -0,0 +1,186 @@
+"""
+Entrega de archivos almacenados sin cargarlos completos en memoria del worker.
+
+Soporta peticiones condicionales (ETag / Last-Modified), rangos HTTP (206) y,
+si DESCARGAS_X_ACCEL está activo, delega la transferencia a nginx mediante
+X-Accel-Redirect para que el hilo de gunicorn quede libre de inmediato.
+"""
+import hashlib
+import re
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_etags
+
+TAMANO_BLOQUE = 64 * 1024
+PATRON_RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class ArchivoNoDisponible(Exception):
+    """
+    El archivo referenciado ya no existe en el almacenamiento
+    """
+
+
+def expiracion_firma():
+    """
+    Expiración de las firmas emitidas ahora. Se redondea a ventanas de
+    DESCARGAS_URL_EXPIRACION segundos para que la URL sea estable dentro de la
+    ventana y el navegador pueda reutilizar su caché.
+    """
+    ventana = settings.DESCARGAS_URL_EXPIRACION
+    return (int(time.time()) // ventana + 2) * ventana
+
+
+def firmar_descarga(objeto_id, salt):
+    """
+    Genera una firma con expiración para descargar un objeto sin sesión
+    """
+    return signing.Signer(salt=salt).sign_object({'id': objeto_id, 'exp': expiracion_firma()})
+
+
+def verificar_firma(firma, objeto_id, salt):
+    """
+    Devuelve los segundos de vigencia restantes, o None si la firma es inválida,
+    pertenece a otro objeto o ya expiró
+    """
+    try:
+        datos = signing.Signer(salt=salt).unsign_object(firma)
+    except signing.BadSignature:
+        return None
+
+    restante = datos.get('exp', 0) - int(time.time())
+    if datos.get('id') != objeto_id or restante <= 0:
+        return None
+    return restante
+
+
+def _leer_rango(archivo, inicio, longitud):
+    """
+    Itera el rango solicitado en bloques de tamaño fijo y cierra el archivo al terminar
+    """
+    try:
+        archivo.seek(inicio)
+        restante = longitud
+        while restante > 0:
+            bloque = archivo.read(min(TAMANO_BLOQUE, restante))
+            if not bloque:
+                break
+            restante -= len(bloque)
+            yield bloque
+    finally:
+        archivo.close()
+
+
+def _interpretar_rango(cabecera, tamano):
+    """
+    Devuelve (inicio, fin) para un único rango 'bytes=a-b', None si la cabecera no
+    aplica (se responde el archivo completo) o False si el rango no es satisfacible
+    """
+    coincidencia = PATRON_RANGO.match(cabecera.strip())
+    if not coincidencia:
+        return None
+
+    inicio, fin = coincidencia.groups()
+    if not inicio and not fin:
+        return None
+
+    if not inicio:
+        # Sufijo: los últimos N bytes
+        sufijo = int(fin)
+        if sufijo == 0:
+            return False
+        return max(tamano - sufijo, 0), tamano - 1
+
+    inicio = int(inicio)
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano or inicio > fin:
+        return False
+    return inicio, fin
+
+
+def _validadores(campo_archivo):
+    """
+    Calcula el ETag y la fecha de modificación a partir de los metadatos del almacenamiento
+    """
+    storage = campo_archivo.storage
+    nombre = campo_archivo.name
+    tamano = storage.size(nombre)
+
+    try:
+        modificado = int(storage.get_modified_time(nombre).timestamp())
+    except (NotImplementedError, OSError):
+        modificado = None
+
+    huella = hashlib.md5(f"{nombre}:{tamano}:{modificado}".encode()).hexdigest()
+    return f'"{huella}"', modificado, tamano
+
+
+def respuesta_archivo(request, campo_archivo, nombre_descarga, content_type,
+                      cache_control='private, no-cache', adjunto=True):
+    """
+    Construye la respuesta de descarga para un FileField.
+
+    Lanza ArchivoNoDisponible si el archivo no existe en el almacenamiento.
+    """
+    storage = campo_archivo.storage
+    nombre = campo_archivo.name
+
+    if not nombre or not storage.exists(nombre):
+        raise ArchivoNoDisponible(nombre)
+
+    etag, modificado, tamano = _validadores(campo_archivo)
+
+    def completar(respuesta):
+        respuesta['ETag'] = etag
+        if modificado is not None:
+            respuesta['Last-Modified'] = http_date(modificado)
+        respuesta['Cache-Control'] = cache_control
+        respuesta['Accept-Ranges'] = 'bytes'
+        respuesta['Content-Disposition'] = content_disposition_header(adjunto, nombre_descarga)
+        return respuesta
+
+    # 304 / 412 según If-None-Match, If-Modified-Since, etc.
+    condicional = get_conditional_response(request, etag=etag, last_modified=modificado)
+    if condicional is not None:
+        return completar(condicional)
+
+    if getattr(settings, 'DESCARGAS_X_ACCEL', False):
+        # nginx resuelve rangos y condicionales sobre el archivo real
+        respuesta = HttpResponse(content_type=content_type)
+        respuesta['X-Accel-Redirect'] = settings.DESCARGAS_X_ACCEL_PREFIJO + quote(nombre)
+        return completar(respuesta)
+
+    cabecera_rango = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if cabecera_rango and if_range and etag not in parse_etags(if_range):
+        # El cliente tiene una versión distinta: se envía el archivo completo
+        cabecera_rango = None
+
+    rango = _interpretar_rango(cabecera_rango, tamano) if cabecera_rango else None
+
+    if rango is False:
+        respuesta = HttpResponse(status=416)
+        respuesta['Content-Range'] = f'bytes */{tamano}'
+        return completar(respuesta)
+
+    if rango:
+        inicio, fin = rango
+        longitud = fin - inicio + 1
+        respuesta = StreamingHttpResponse(
+            _leer_rango(storage.open(nombre, 'rb'), inicio, longitud),
+            status=206,
+            content_type=content_type
+        )
+        respuesta['Content-Length'] = str(longitud)
+        respuesta['Content-Range'] = f'bytes {inicio}-{fin}/{tamano}'
+        return completar(respuesta)
+
+    respuesta = FileResponse(storage.open(nombre, 'rb'), content_type=content_type)
+    respuesta.block_size = TAMANO_BLOQUE
+    respuesta['Content-Length'] = str(tamano)
+    return completar(respuesta)
@@ -0,0 +1,102 @@
+"""
+Verifica que los endpoints de listado ejecuten un número constante de consultas.
+
+Cada endpoint se llama dos veces, con páginas de 1 y de PAGE_SIZE elementos; si el
+número de consultas cambia con el tamaño de página hay un N+1, y si supera el
+presupuesto declarado hay una regresión. Termina con error en ambos casos, así que
+puede ejecutarse en CI contra una base con datos:
+
+    python manage.py verificar_consultas --email admin@alcaldia.gov.co
+
+Los presupuestos están fijados con assertNumQueries en apps/archivos/tests/test_consultas.py
+y apps/reportes/tests/test_consultas.py; este comando sirve para revisarlos contra
+una base con datos reales.
+"""
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+
+from apps.archivos.models import ArchivoExcel
+from apps.authentication.models import CustomUser
+from apps.reportes.models import ReporteGenerado
+
+# (nombre de la URL, función que devuelve los argumentos o None si no hay datos, presupuesto)
+ENDPOINTS = [
+    ('archivos:archivo_list_create', lambda: [], 3),
+    ('archivos:archivo_detail', lambda: _primer_id(ArchivoExcel), 2),
+    ('archivos:registro_list', lambda: [], 2),
+    ('reportes:reporte_list', lambda: [], 3),
+    ('reportes:reporte_detail', lambda: _primer_id(ReporteGenerado), 2),
+    ('reportes:config_grafico_list', lambda: [], 2),
+]
+
+
+def _primer_id(modelo):
+    pk = modelo.objects.order_by('pk').values_list('pk', flat=True).first()
+    return [pk] if pk is not None else None
+
+
+class Command(BaseCommand):
+    help = 'Cuenta las consultas SQL de los endpoints de listado y detecta N+1'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help='Usuario con el que se autentican las peticiones (por defecto el primer admin)')
+
+    def handle(self, *args, **options):
+        usuario = self._usuario(options.get('email'))
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+
+        fallos = []
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for nombre, argumentos, presupuesto in ENDPOINTS:
+                args = argumentos()
+                if args is None:
+                    self.stdout.write(f"{nombre:<32} sin datos, se omite")
+                    continue
+
+                url = reverse(nombre, args=args)
+                pequena = self._contar(cliente, url, tamano_pagina=1)
+                completa = self._contar(cliente, url, tamano_pagina=settings.REST_FRAMEWORK['PAGE_SIZE'])
+
+                estado = 'OK'
+                if pequena != completa:
+                    estado = 'N+1'
+                elif completa > presupuesto:
+                    estado = 'EXCEDE'
+
+                if estado != 'OK':
+                    fallos.append(nombre)
+                self.stdout.write(
+                    f"{nombre:<32} página 1: {pequena:>3}  página completa: {completa:>3}  "
+                    f"presupuesto: {presupuesto:>3}  {estado}"
+                )
+
+        if fallos:
+            raise CommandError(f"Endpoints con consultas de más: {', '.join(fallos)}")
+        self.stdout.write(self.style.SUCCESS('Número de consultas constante en todos los endpoints'))
+
+    def _usuario(self, email):
+        if email:
+            usuario = CustomUser.objects.filter(email=email).first()
+        else:
+            usuario = CustomUser.objects.filter(role='admin').first() or CustomUser.objects.first()
+
+        if usuario is None:
+            raise CommandError('No hay usuarios para autenticar las peticiones')
+        return usuario
+
+    def _contar(self, cliente, url, tamano_pagina):
+        with mock.patch.object(PageNumberPagination, 'page_size', tamano_pagina):
+            with CaptureQueriesContext(connection) as consultas:
+                respuesta = cliente.get(url)
+
+        if respuesta.status_code != 200:
+            raise CommandError(f"{url} respondió {respuesta.status_code}")
+        return len(consultas)
@@ -0,0 +1,142 @@
+"""
+Métricas Prometheus del backend.
+
+Requiere prometheus_client; si no está instalado las métricas se desactivan y el
+resto de la instrumentación (Server-Timing y log de peticiones lentas) sigue activa.
+Con varios workers de gunicorn debe definirse PROMETHEUS_MULTIPROC_DIR para que
+/metrics agregue los valores de todos los procesos.
+
+Las métricas de conexiones muestran si CONN_MAX_AGE está funcionando: cada petición
+que consulta la base de datos cuenta como un checkout, reutilizando la conexión
+persistente del hilo o abriendo una nueva; los rechazos de Postgres por falta de
+conexiones disponibles se cuentan como agotamiento.
+"""
+import os
+import sys
+
+from django.db import OperationalError
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # prometheus_client es opcional
+    prometheus_client = None
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BUCKETS_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Mensajes de Postgres cuando no quedan conexiones disponibles
+MENSAJES_AGOTAMIENTO = ('too many connections', 'remaining connection slots')
+
+if prometheus_client is not None:
+    PETICIONES = prometheus_client.Counter(
+        'alcaldia_http_peticiones_total', 'Peticiones HTTP atendidas',
+        ['metodo', 'ruta', 'estado']
+    )
+    DURACION = prometheus_client.Histogram(
+        'alcaldia_http_duracion_segundos', 'Tiempo total de la petición',
+        ['ruta'], buckets=BUCKETS_SEGUNDOS
+    )
+    TAMANO_RESPUESTA = prometheus_client.Histogram(
+        'alcaldia_http_respuesta_bytes', 'Tamaño del cuerpo de la respuesta',
+        ['ruta'], buckets=BUCKETS_BYTES
+    )
+    CONSULTAS = prometheus_client.Histogram(
+        'alcaldia_db_consultas', 'Consultas SQL por petición',
+        ['ruta'], buckets=BUCKETS_CONSULTAS
+    )
+    DURACION_DB = prometheus_client.Histogram(
+        'alcaldia_db_duracion_segundos', 'Tiempo en base de datos por petición',
+        ['ruta'], buckets=BUCKETS_SEGUNDOS
+    )
+    FILAS = prometheus_client.Counter(
+        'alcaldia_db_filas_total', 'Filas devueltas o afectadas por las consultas',
+        ['ruta']
+    )
+    CONEXIONES_ABIERTAS = prometheus_client.Counter(
+        'alcaldia_db_conexiones_abiertas_total', 'Conexiones nuevas a la base de datos'
+    )
+    CHECKOUTS = prometheus_client.Counter(
+        'alcaldia_db_checkouts_total', 'Peticiones que usaron la base de datos, según el origen de la conexión',
+        ['resultado']
+    )
+    CONEXIONES_AGOTADAS = prometheus_client.Counter(
+        'alcaldia_db_conexiones_agotadas_total', 'Peticiones fallidas porque Postgres no aceptó más conexiones'
+    )
+
+
+def registrar_peticion(medicion):
+    """
+    Acumula la medición de una petición en los contadores e histogramas
+    """
+    if prometheus_client is None:
+        return
+
+    ruta = medicion['ruta']
+    PETICIONES.labels(medicion['metodo'], ruta, str(medicion['estado'])).inc()
+    DURACION.labels(ruta).observe(medicion['total_ms'] / 1000)
+    CONSULTAS.labels(ruta).observe(medicion['consultas'])
+    DURACION_DB.labels(ruta).observe(medicion['db_ms'] / 1000)
+    if medicion['filas']:
+        FILAS.labels(ruta).inc(medicion['filas'])
+    if medicion['bytes'] is not None:
+        TAMANO_RESPUESTA.labels(ruta).observe(medicion['bytes'])
+
+
+def registrar_checkout(reutilizada):
+    """
+    Cuenta una petición que usó la base de datos con una conexión persistente o una nueva
+    """
+    if prometheus_client is not None:
+        CHECKOUTS.labels('reutilizada' if reutilizada else 'nueva').inc()
+
+
+def conexion_creada(sender, connection, **kwargs):
+    """
+    Receptor de connection_created
+    """
+    if prometheus_client is not None:
+        CONEXIONES_ABIERTAS.inc()
+
+
+def excepcion_peticion(sender, request=None, **kwargs):
+    """
+    Receptor de got_request_exception: detecta el agotamiento de conexiones de Postgres
+    """
+    if prometheus_client is None:
+        return
+
+    error = sys.exc_info()[1]
+    if isinstance(error, OperationalError) and any(texto in str(error) for texto in MENSAJES_AGOTAMIENTO):
+        CONEXIONES_AGOTADAS.inc()
+
+
+def metricas_view(request):
+    """
+    Exposición en formato texto de Prometheus. Si METRICAS_TOKEN está definido se
+    exige como token Bearer.
+    """
+    if prometheus_client is None:
+        return HttpResponse('prometheus_client no está instalado', status=503, content_type='text/plain')
+
+    token = getattr(settings, 'METRICAS_TOKEN', '')
+    if token:
+        cabecera = request.META.get('HTTP_AUTHORIZATION', '')
+        if not constant_time_compare(cabecera, f'Bearer {token}'):
+            return HttpResponse('No autorizado', status=401, content_type='text/plain')
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registro = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+    else:
+        registro = prometheus_client.REGISTRY
+
+    return HttpResponse(
+        prometheus_client.generate_latest(registro),
+        content_type=prometheus_client.CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,456 @@
+"""
+Middlewares transversales del backend
+"""
+import gzip
+import heapq
+import logging
+import random
+import re
+import time
+import uuid
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .metricas import registrar_checkout, registrar_peticion
+from .perfilado import crear_perfilador, guardar_perfil, parametros_peticion
+from .registro import id_correlacion
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard es opcional
+    zstandard = None
+
+logger_rendimiento = logging.getLogger('alcaldia.rendimiento')
+
+# Ids de correlación aceptados desde nginx o el cliente (X-Request-ID)
+PATRON_ID_CORRELACION = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Rutas que no se instrumentan (sondas y el propio endpoint de métricas)
+RUTAS_SIN_INSTRUMENTAR = ('/metrics/', '/healthz/')
+
+TIPOS_COMPRIMIBLES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/msgpack',
+    'image/svg+xml',
+)
+
+
+def codificadores_disponibles():
+    """
+    Codificaciones soportadas en orden de preferencia del servidor.
+
+    zstd y br sólo se ofrecen si su librería está instalada; gzip siempre está disponible.
+    """
+    disponibles = {}
+
+    if zstandard is not None:
+        compresor = zstandard.ZstdCompressor(level=getattr(settings, 'COMPRESION_NIVEL_ZSTD', 3))
+        disponibles['zstd'] = compresor.compress
+
+    if brotli is not None:
+        calidad = getattr(settings, 'COMPRESION_NIVEL_BROTLI', 4)
+        disponibles['br'] = lambda contenido: brotli.compress(contenido, quality=calidad)
+
+    nivel_gzip = getattr(settings, 'COMPRESION_NIVEL_GZIP', 6)
+    disponibles['gzip'] = lambda contenido: gzip.compress(contenido, compresslevel=nivel_gzip, mtime=0)
+
+    return disponibles
+
+
+def _codificaciones_aceptadas(cabecera):
+    """
+    Interpreta Accept-Encoding y devuelve las codificaciones con q > 0
+    """
+    aceptadas = set()
+    for parte in cabecera.split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        nombre = nombre.strip().lower()
+        if not nombre:
+            continue
+
+        calidad = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith('q='):
+            try:
+                calidad = float(parametros[2:])
+            except ValueError:
+                calidad = 0.0
+
+        if calidad > 0:
+            aceptadas.add(nombre)
+    return aceptadas
+
+
+class MiddlewareDual:
+    """
+    Base para middlewares que funcionan tanto bajo WSGI como bajo ASGI.
+
+    Django adapta un middleware sólo síncrono con un salto a un hilo por petición,
+    lo que bajo ASGI anula la ventaja de las vistas async. Las subclases implementan
+    __call__ (síncrono) y __acall__ (async); Django elige según la cadena.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+
+class CompresionMiddleware(MiddlewareDual):
+    """
+    Comprime las respuestas de la API según Accept-Encoding (zstd, br o gzip).
+
+    A diferencia de GZipMiddleware aplica un umbral de tamaño (COMPRESION_MINIMO_BYTES),
+    sólo comprime tipos de contenido textuales y omite respuestas en streaming, parciales
+    o delegadas a nginx, que ya se encargan de su propia transferencia.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.codificadores = codificadores_disponibles()
+        self.minimo_bytes = getattr(settings, 'COMPRESION_MINIMO_BYTES', 1024)
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        return self._comprimir(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._comprimir(request, await self.get_response(request))
+
+    def _comprimir(self, request, response):
+        if not self._es_comprimible(response):
+            return response
+
+        # La representación depende de Accept-Encoding aunque no se llegue a comprimir
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        aceptadas = _codificaciones_aceptadas(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        codificacion = next((nombre for nombre in self.codificadores if nombre in aceptadas), None)
+        if codificacion is None:
+            return response
+
+        comprimido = self.codificadores[codificacion](response.content)
+        if len(comprimido) >= len(response.content):
+            return response
+
+        response.content = comprimido
+        response['Content-Length'] = str(len(comprimido))
+        response['Content-Encoding'] = codificacion
+
+        # El cuerpo ya no es idéntico byte a byte: el ETag fuerte pasa a ser débil
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+        return response
+
+    def _es_comprimible(self, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return False
+        if response.has_header('X-Accel-Redirect') or response.status_code in (204, 206, 304):
+            return False
+        if len(response.content) < self.minimo_bytes:
+            return False
+
+        content_type = response.get('Content-Type', '').lower()
+        return content_type.startswith(TIPOS_COMPRIMIBLES)
+
+
+class MedidorConsultas:
+    """
+    Envoltorio para connection.execute_wrapper que mide las consultas de una petición.
+
+    Sólo conserva las `top` consultas más lentas (heap de tamaño fijo), así que el
+    costo por consulta es constante aunque la petición ejecute miles.
+    """
+
+    def __init__(self, top):
+        self.top = top
+        self.consultas = 0
+        self.duracion = 0.0
+        self.filas = 0
+        self.lentas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.consultas += 1
+            self.duracion += duracion
+
+            # rowcount es -1 cuando el driver no lo conoce (p. ej. SELECT en SQLite)
+            filas = getattr(context['cursor'], 'rowcount', -1)
+            if filas and filas > 0:
+                self.filas += filas
+
+            entrada = (duracion, self.consultas, sql)
+            if len(self.lentas) < self.top:
+                heapq.heappush(self.lentas, entrada)
+            elif duracion > self.lentas[0][0]:
+                heapq.heapreplace(self.lentas, entrada)
+
+    def mas_lentas(self):
+        return sorted(self.lentas, reverse=True)
+
+
+class InstrumentacionMiddleware(MiddlewareDual):
+    """
+    Mide cada petición: consultas SQL, tiempo en base de datos, tiempo total, tamaño
+    de la respuesta y filas devueltas.
+
+    Expone la medición en la cabecera Server-Timing, la acumula en las métricas de
+    /metrics y registra las peticiones que superan INSTRUMENTACION_LENTO_MS junto con
+    sus consultas más lentas. Debe ir primero en MIDDLEWARE para medir la petición completa.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.activa = getattr(settings, 'INSTRUMENTACION_ACTIVA', True)
+        self.server_timing = getattr(settings, 'INSTRUMENTACION_SERVER_TIMING', True)
+        self.umbral_lento_ms = getattr(settings, 'INSTRUMENTACION_LENTO_MS', 1000)
+        self.top_consultas = getattr(settings, 'INSTRUMENTACION_TOP_CONSULTAS', 5)
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        if not self.activa or request.path.startswith(RUTAS_SIN_INSTRUMENTAR):
+            return self.get_response(request)
+
+        medidor = MedidorConsultas(self.top_consultas)
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            conexiones, previas = self._instalar_medidor(pila, medidor)
+            response = self.get_response(request)
+        return self._finalizar(request, response, medidor, conexiones, previas, inicio)
+
+    async def __acall__(self, request):
+        if not self.activa or request.path.startswith(RUTAS_SIN_INSTRUMENTAR):
+            return await self.get_response(request)
+
+        # Las conexiones son locales a cada hilo: bajo ASGI el ORM async ejecuta las
+        # consultas de la petición en su hilo propio (ThreadSensitiveContext), así que
+        # el medidor se instala y se retira desde ese mismo hilo
+        medidor = MedidorConsultas(self.top_consultas)
+        inicio = time.perf_counter()
+        pila = ExitStack()
+        conexiones, previas = await sync_to_async(self._instalar_medidor)(pila, medidor)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(pila.close)()
+        return self._finalizar(request, response, medidor, conexiones, previas, inicio)
+
+    @staticmethod
+    def _instalar_medidor(pila, medidor):
+        """
+        Instala el medidor en las conexiones del hilo actual y devuelve
+        (conexiones, conexión persistente de cada una antes de la petición)
+        """
+        conexiones = connections.all()
+        # Conexión persistente de este hilo antes de la petición (CONN_MAX_AGE)
+        previas = [conexion.connection for conexion in conexiones]
+        for conexion in conexiones:
+            pila.enter_context(conexion.execute_wrapper(medidor))
+        return conexiones, previas
+
+    def _finalizar(self, request, response, medidor, conexiones, previas, inicio):
+        total_ms = (time.perf_counter() - inicio) * 1000
+        db_ms = medidor.duracion * 1000
+
+        if medidor.consultas:
+            for conexion, previa in zip(conexiones, previas):
+                if conexion.connection is not None:
+                    registrar_checkout(conexion.connection is previa)
+
+        if response.streaming:
+            longitud = response.get('Content-Length')
+            tamano = int(longitud) if longitud else None
+        else:
+            tamano = len(response.content)
+
+        medicion = {
+            'metodo': request.method,
+            'ruta': request.resolver_match.route if request.resolver_match else 'no_encontrada',
+            'estado': response.status_code,
+            'total_ms': total_ms,
+            'db_ms': db_ms,
+            'consultas': medidor.consultas,
+            'filas': medidor.filas,
+            'bytes': tamano,
+        }
+        registrar_peticion(medicion)
+
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'db;dur={db_ms:.1f};desc="{medidor.consultas} consultas", '
+                f'app;dur={total_ms - db_ms:.1f}, total;dur={total_ms:.1f}'
+            )
+
+        if total_ms >= self.umbral_lento_ms:
+            self._registrar_lenta(request, medicion, medidor)
+
+        return response
+
+    def _registrar_lenta(self, request, medicion, medidor):
+        consultas = '\n'.join(
+            f"  {duracion * 1000:.1f} ms  {sql[:500]}" for duracion, _, sql in medidor.mas_lentas()
+        )
+        logger_rendimiento.warning(
+            "Petición lenta %s %s: %.0f ms total, %.0f ms en BD, %d consultas, %d filas\n%s",
+            request.method, request.get_full_path(), medicion['total_ms'], medicion['db_ms'],
+            medicion['consultas'], medicion['filas'], consultas,
+            extra={'medicion': medicion}
+        )
+
+
+class PerfiladoMiddleware:
+    """
+    Captura un perfil de CPU de peticiones puntuales (ver apps/core/perfilado.py).
+
+    Se perfila una petición cuando un administrador envía la cabecera X-Perfilar: 1,
+    o por muestreo (PERFILADO_MUESTREO) en las rutas de PERFILADO_RUTAS. Con
+    PERFILADO_ACTIVO=False el middleware se descarta al arrancar y no agrega ningún costo.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERFILADO_ACTIVO', False):
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.muestreo = getattr(settings, 'PERFILADO_MUESTREO', 0.0)
+        self.rutas = tuple(getattr(settings, 'PERFILADO_RUTAS', ()))
+        self.motor = getattr(settings, 'PERFILADO_MOTOR', 'cprofile')
+
+    def __call__(self, request):
+        motivo, usuario = self._motivo(request)
+        if motivo is None:
+            return self.get_response(request)
+
+        parametros = parametros_peticion(request)
+        perfilador = crear_perfilador(self.motor)
+
+        inicio = time.perf_counter()
+        perfilador.iniciar()
+        try:
+            response = self.get_response(request)
+        finally:
+            perfilador.detener()
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+
+        perfil = guardar_perfil(
+            perfilador, request, response, duracion_ms, motivo, parametros, usuario, id_correlacion.get()
+        )
+        if perfil is not None:
+            response['X-Perfil-Id'] = str(perfil.pk)
+        return response
+
+    def _motivo(self, request):
+        """
+        Devuelve (motivo, usuario) si la petición debe perfilarse, o (None, None)
+        """
+        if request.META.get('HTTP_X_PERFILAR'):
+            # El token sólo se valida cuando se pide el perfil, nunca en el resto de peticiones
+            try:
+                autenticado = JWTAuthentication().authenticate(request)
+            except AuthenticationFailed:
+                autenticado = None
+            if autenticado and autenticado[0].is_admin():
+                return 'cabecera', autenticado[0]
+
+        if self.muestreo > 0 and request.path.startswith(self.rutas) and random.random() < self.muestreo:
+            return 'muestreo', None
+
+        return None, None
+
+
+class CorrelacionMiddleware(MiddlewareDual):
+    """
+    Asigna un id de correlación a cada petición (el X-Request-ID entrante si es válido,
+    o uno nuevo), lo deja disponible para los logs y lo devuelve en la respuesta
+    """
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+
+        valor = self._valor(request)
+        token = id_correlacion.set(valor)
+        try:
+            response = self.get_response(request)
+        finally:
+            id_correlacion.reset(token)
+
+        response['X-Request-ID'] = valor
+        return response
+
+    async def __acall__(self, request):
+        # sync_to_async copia el contexto, así que el id también llega a los hilos del ORM
+        valor = self._valor(request)
+        token = id_correlacion.set(valor)
+        try:
+            response = await self.get_response(request)
+        finally:
+            id_correlacion.reset(token)
+
+        response['X-Request-ID'] = valor
+        return response
+
+    @staticmethod
+    def _valor(request):
+        entrante = request.META.get('HTTP_X_REQUEST_ID', '')
+        return entrante if PATRON_ID_CORRELACION.match(entrante) else uuid.uuid4().hex
+
+
+class ArchivosEstaticosMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware que además funciona bajo ASGI.
+
+    WhiteNoise 6 sólo es síncrono y obligaría a Django a saltar a un hilo en cada
+    petición, sea o no de un archivo estático. Aquí la búsqueda del archivo es un
+    acceso a diccionario en memoria y sólo la preparación de la respuesta (que abre
+    el archivo) se hace en un hilo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
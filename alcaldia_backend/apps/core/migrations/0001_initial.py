@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerfilPeticion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+                ('metodo', models.CharField(max_length=10)),
+                ('ruta', models.CharField(max_length=500)),
+                ('estado', models.IntegerField()),
+                ('duracion_ms', models.FloatField()),
+                ('id_correlacion', models.CharField(blank=True, max_length=64)),
+                ('motivo', models.CharField(choices=[('cabecera', 'Solicitado por un administrador'), ('muestreo', 'Muestreo aleatorio')], max_length=20)),
+                ('motor', models.CharField(choices=[('cprofile', 'cProfile'), ('pyinstrument', 'pyinstrument')], max_length=20)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('resumen', models.TextField(blank=True)),
+                ('archivo', models.FileField(upload_to='profiles/')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='perfiles_peticion', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Perfil de petición',
+                'verbose_name_plural': 'Perfiles de peticiones',
+                'db_table': 'perfiles_peticion',
+                'ordering': ['-fecha'],
+            },
+        ),
+    ]
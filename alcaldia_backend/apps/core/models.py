@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.db import models
+
+
+class PerfilPeticion(models.Model):
+    """
+    Perfil de CPU capturado para una petición (ver PerfiladoMiddleware)
+    """
+    MOTIVO_CHOICES = [
+        ('cabecera', 'Solicitado por un administrador'),
+        ('muestreo', 'Muestreo aleatorio'),
+    ]
+    MOTOR_CHOICES = [
+        ('cprofile', 'cProfile'),
+        ('pyinstrument', 'pyinstrument'),
+    ]
+
+    fecha = models.DateTimeField(auto_now_add=True)
+    metodo = models.CharField(max_length=10)
+    ruta = models.CharField(max_length=500)
+    estado = models.IntegerField()
+    duracion_ms = models.FloatField()
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='perfiles_peticion'
+    )
+    id_correlacion = models.CharField(max_length=64, blank=True)
+    motivo = models.CharField(max_length=20, choices=MOTIVO_CHOICES)
+    motor = models.CharField(max_length=20, choices=MOTOR_CHOICES)
+
+    # Parámetros de la petición (query string y cuerpo JSON) para reproducirla
+    parametros = models.JSONField(default=dict, blank=True)
+    # Funciones más costosas, para revisar el perfil sin descargarlo
+    resumen = models.TextField(blank=True)
+    archivo = models.FileField(upload_to='profiles/')
+
+    class Meta:
+        verbose_name = 'Perfil de petición'
+        verbose_name_plural = 'Perfiles de peticiones'
+        db_table = 'perfiles_peticion'
+        ordering = ['-fecha']
+
+    def __str__(self):
+        return f"{self.metodo} {self.ruta} ({self.duracion_ms:.0f} ms)"
@@ -0,0 +1,142 @@
+"""
+Perfilado de CPU bajo demanda de peticiones individuales.
+
+PerfiladoMiddleware (apps/core/middleware.py) decide qué peticiones perfilar; aquí
+están los motores y el guardado del perfil:
+
+- cProfile (biblioteca estándar): se guarda el .prof de pstats, que se abre con
+  `python -m pstats` o snakeviz.
+- pyinstrument (opcional, PERFILADO_MOTOR='pyinstrument'): perfilador por muestreo
+  con menos sobrecarga; se guarda su reporte HTML.
+
+Los perfiles quedan en MEDIA_ROOT/profiles/ con un PerfilPeticion que registra la
+ruta, los parámetros de la petición y un resumen de las funciones más costosas.
+"""
+import cProfile
+import io
+import json
+import logging
+import marshal
+import pstats
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:  # pyinstrument es opcional
+    PyinstrumentProfiler = None
+
+logger = logging.getLogger(__name__)
+
+# Los cuerpos más grandes (p. ej. subidas de Excel) no se guardan con el perfil
+MAXIMO_CUERPO_PARAMETROS = 64 * 1024
+LINEAS_RESUMEN = 40
+
+
+class PerfiladorCProfile:
+    motor = 'cprofile'
+    extension = 'prof'
+
+    def __init__(self):
+        self.perfil = cProfile.Profile()
+
+    def iniciar(self):
+        self.perfil.enable()
+
+    def detener(self):
+        self.perfil.disable()
+
+    def contenido(self):
+        # Mismo formato que Profile.dump_stats, pero en memoria para pasarlo al storage
+        self.perfil.create_stats()
+        return marshal.dumps(self.perfil.stats)
+
+    def resumen(self):
+        salida = io.StringIO()
+        pstats.Stats(self.perfil, stream=salida).sort_stats('cumulative').print_stats(LINEAS_RESUMEN)
+        return salida.getvalue()
+
+
+class PerfiladorPyinstrument:
+    motor = 'pyinstrument'
+    extension = 'html'
+
+    def __init__(self):
+        self.perfil = PyinstrumentProfiler()
+
+    def iniciar(self):
+        self.perfil.start()
+
+    def detener(self):
+        self.perfil.stop()
+
+    def contenido(self):
+        return self.perfil.output_html().encode('utf-8')
+
+    def resumen(self):
+        return self.perfil.output_text(unicode=True, color=False)
+
+
+def crear_perfilador(motor):
+    """
+    Devuelve el perfilador pedido; si pyinstrument no está instalado se usa cProfile
+    """
+    if motor == 'pyinstrument' and PyinstrumentProfiler is not None:
+        return PerfiladorPyinstrument()
+    return PerfiladorCProfile()
+
+
+def parametros_peticion(request):
+    """
+    Query string y cuerpo JSON de la petición, para poder reproducirla.
+
+    Debe llamarse antes de ejecutar la vista: una vez que DRF consume el cuerpo
+    ya no se puede leer request.body.
+    """
+    parametros = {'query': request.GET.dict()}
+
+    tipo = request.META.get('CONTENT_TYPE', '')
+    try:
+        longitud = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        longitud = 0
+
+    if tipo.startswith('application/json') and 0 < longitud <= MAXIMO_CUERPO_PARAMETROS:
+        try:
+            parametros['cuerpo'] = json.loads(request.body)
+        except ValueError:
+            parametros['cuerpo'] = request.body.decode('utf-8', errors='replace')
+    elif longitud:
+        parametros['cuerpo_omitido'] = f'{tipo or "sin tipo"}, {longitud} bytes'
+
+    return parametros
+
+
+def guardar_perfil(perfilador, request, response, duracion_ms, motivo, parametros, usuario, correlacion):
+    """
+    Guarda el perfil en MEDIA_ROOT/profiles/ y lo registra. Nunca propaga errores:
+    un fallo al guardar el perfil no debe afectar la respuesta.
+    """
+    from .models import PerfilPeticion
+
+    try:
+        perfil = PerfilPeticion(
+            metodo=request.method,
+            ruta=request.path[:500],
+            estado=response.status_code,
+            duracion_ms=duracion_ms,
+            usuario=usuario,
+            id_correlacion=correlacion,
+            motivo=motivo,
+            motor=perfilador.motor,
+            parametros=parametros,
+            resumen=perfilador.resumen(),
+        )
+        nombre = f"{timezone.now():%Y%m%d_%H%M%S}_{correlacion[:16]}.{perfilador.extension}"
+        perfil.archivo.save(nombre, ContentFile(perfilador.contenido()), save=False)
+        perfil.save()
+        return perfil
+    except Exception:
+        logger.exception("No se pudo guardar el perfil de %s %s", request.method, request.path)
+        return None
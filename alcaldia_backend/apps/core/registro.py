@@ -0,0 +1,127 @@
+"""
+Logging estructurado del backend.
+
+- FormatoJSON: una línea JSON por evento con el id de correlación de la petición y
+  los campos enviados en `extra`.
+- FiltroMuestreo: deja pasar sólo una fracción de los eventos DEBUG, que son los
+  de mayor volumen; INFO y superiores nunca se descartan.
+- ManejadorColaJSON: encola el evento y lo escribe un hilo aparte, así la petición
+  nunca espera a stdout. Si la cola se llena el evento se descarta en lugar de bloquear.
+
+Los mensajes deben usar argumentos diferidos (logger.debug('... %s', valor)) para que
+el formateo sólo ocurra si el evento supera el nivel y el muestreo.
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+id_correlacion = contextvars.ContextVar('id_correlacion', default='-')
+
+# Atributos propios de LogRecord; el resto proviene de `extra`
+_ATRIBUTOS_REGISTRO = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class FiltroCorrelacion(logging.Filter):
+    """
+    Agrega el id de correlación de la petición en curso. Debe aplicarse en el hilo
+    que emite el evento (antes de encolarlo), donde la variable de contexto es válida.
+    """
+
+    def filter(self, record):
+        record.id_correlacion = id_correlacion.get()
+        return True
+
+
+class FiltroMuestreo(logging.Filter):
+    """
+    Conserva sólo una fracción `tasa` de los eventos DEBUG
+    """
+
+    def __init__(self, tasa=1.0):
+        super().__init__()
+        self.tasa = float(tasa)
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.tasa >= 1:
+            return True
+        return random.random() < self.tasa
+
+
+class FormatoJSON(logging.Formatter):
+    """
+    Serializa el evento como una línea JSON
+    """
+
+    def format(self, record):
+        evento = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+            'id_correlacion': getattr(record, 'id_correlacion', '-'),
+        }
+
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_REGISTRO and clave not in evento:
+                evento[clave] = valor
+
+        if record.exc_info:
+            evento['excepcion'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            evento['excepcion'] = record.exc_text
+
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+
+class ManejadorColaJSON(QueueHandler):
+    """
+    QueueHandler con su propio QueueListener que escribe JSON en stdout
+    """
+
+    def __init__(self, capacidad=10000):
+        self.capacidad = capacidad
+        self.descartados = 0
+        super().__init__(queue.Queue(capacidad))
+        self._iniciar_listener()
+        atexit.register(self._detener_listener)
+        # Tras un fork (gunicorn --preload) el hilo del listener no existe en el hijo
+        os.register_at_fork(after_in_child=self._reiniciar_en_hijo)
+
+    def _iniciar_listener(self):
+        destino = logging.StreamHandler(sys.stdout)
+        destino.setFormatter(FormatoJSON())
+        self.listener = QueueListener(self.queue, destino)
+        self.listener.start()
+
+    def _detener_listener(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def _reiniciar_en_hijo(self):
+        self.queue = queue.Queue(self.capacidad)
+        self._iniciar_listener()
+
+    def prepare(self, record):
+        # Se resuelve el mensaje y la traza aquí porque los argumentos pueden cambiar
+        # antes de que el listener los procese; la serialización JSON queda en el listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
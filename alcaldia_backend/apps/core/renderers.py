@@ -0,0 +1,32 @@
+"""
+Renderers adicionales para la API
+"""
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:  # msgpack es opcional (API_MSGPACK)
+    msgpack = None
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Serializa las respuestas en MessagePack cuando el cliente envía
+    Accept: application/msgpack o ?format=msgpack.
+
+    Los tipos que msgpack no conoce (Decimal, fechas, UUID...) se convierten igual
+    que en la respuesta JSON, así ambos formatos devuelven los mismos valores.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    _codificador_json = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return msgpack.packb(data, default=self._codificador_json.default, use_bin_type=True)
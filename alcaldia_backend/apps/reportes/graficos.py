@@ -0,0 +1,303 @@
+"""
+Renderizado de gráficos para vistas y reportes PDF.
+
+Este módulo no importa modelos de Django para que pueda cargarse en los procesos
+dedicados al renderizado sin inicializar la aplicación. matplotlib, reportlab y
+svglib se importan al dibujar el primer gráfico, no al cargar el módulo.
+"""
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as TiempoAgotado
+from concurrent.futures.process import BrokenProcessPool
+from importlib.util import find_spec
+from io import BytesIO
+from typing import TYPE_CHECKING, Any, Dict, List
+import base64
+import logging
+import multiprocessing
+import threading
+
+from django.conf import settings
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+logger = logging.getLogger(__name__)
+
+# Opcional: svglib permite incrustar gráficos vectoriales (SVG) en el PDF
+SVGLIB_DISPONIBLE = find_spec('svglib') is not None
+
+
+# Resolución por tipo de salida: la pantalla no necesita la densidad de la impresión
+PERFILES_DPI = {
+    'pantalla': 96,
+    'impresion': 150,
+}
+
+# Plantillas reutilizables de figura (tamaño en pulgadas y márgenes fijos)
+PLANTILLAS_GRAFICO = {
+    'barras': {
+        'figsize': (10, 6),
+        'margenes': {'left': 0.08, 'right': 0.98, 'top': 0.92, 'bottom': 0.28},
+        'rotar_etiquetas': True,
+        'cuadricula': False,
+    },
+    'lineas': {
+        'figsize': (10, 6),
+        'margenes': {'left': 0.08, 'right': 0.98, 'top': 0.92, 'bottom': 0.18},
+        'rotar_etiquetas': True,
+        'cuadricula': True,
+    },
+    'circular': {
+        'figsize': (8, 8),
+        'margenes': {'left': 0.05, 'right': 0.95, 'top': 0.92, 'bottom': 0.05},
+        'rotar_etiquetas': False,
+        'cuadricula': False,
+    },
+}
+
+COLOR_PRINCIPAL = '#3498db'
+
+TIPOS_GRAFICO = ('barras', 'lineas', 'circular')
+
+
+class GraficoNoDisponible(Exception):
+    """
+    El pool de procesos no terminó el gráfico dentro de GRAFICOS_TIMEOUT
+    """
+
+
+class RenderizadorGraficos:
+    """
+    Renderiza gráficos con la API orientada a objetos de matplotlib (Figure + Agg).
+    No usa el estado global de pyplot, por lo que cada llamada trabaja sobre su propia figura.
+    """
+
+    def __init__(self, perfil: str = 'pantalla', vectorial: bool = None):
+        if perfil not in PERFILES_DPI:
+            raise ValueError(f"Perfil de resolución no válido: {perfil}")
+
+        self.perfil = perfil
+        self.dpi = PERFILES_DPI[perfil]
+
+        if vectorial is None:
+            vectorial = getattr(settings, 'GRAFICOS_VECTORIALES_PDF', False)
+        # Solo se puede incrustar SVG en ReportLab si svglib está instalado
+        self.vectorial = bool(vectorial) and SVGLIB_DISPONIBLE
+
+    def _crear_figura(self, plantilla: str):
+        """
+        Crea una figura nueva a partir de una plantilla
+        """
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        config = PLANTILLAS_GRAFICO[plantilla]
+        fig = Figure(figsize=config['figsize'], dpi=self.dpi)
+        FigureCanvasAgg(fig)
+        fig.subplots_adjust(**config['margenes'])
+        ax = fig.add_subplot(111)
+
+        if config['cuadricula']:
+            ax.grid(True, alpha=0.3)
+
+        return fig, ax, config
+
+    def _etiquetas_eje_x(self, ax, config: Dict[str, Any], n_etiquetas: int):
+        if config['rotar_etiquetas'] and n_etiquetas:
+            ax.tick_params(axis='x', labelrotation=45)
+            for etiqueta in ax.get_xticklabels():
+                etiqueta.set_horizontalalignment('right')
+
+    def barras(self, labels: List[Any], values: List[Any], titulo: str = "Gráfico",
+               xlabel: str = 'Categorías', ylabel: str = 'Valores') -> 'Figure':
+        """
+        Construye un gráfico de barras
+        """
+        fig, ax, config = self._crear_figura('barras')
+        etiquetas = [str(label) for label in labels]
+
+        ax.bar(etiquetas, values, color=COLOR_PRINCIPAL)
+        ax.set_title(titulo)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        self._etiquetas_eje_x(ax, config, len(etiquetas))
+
+        return fig
+
+    def lineas(self, labels: List[Any], values: List[Any], titulo: str = "Gráfico",
+               xlabel: str = 'Categorías', ylabel: str = 'Valores') -> 'Figure':
+        """
+        Construye un gráfico de líneas
+        """
+        fig, ax, config = self._crear_figura('lineas')
+        etiquetas = [str(label) for label in labels]
+
+        ax.plot(etiquetas, values, marker='o', color=COLOR_PRINCIPAL)
+        ax.set_title(titulo)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        self._etiquetas_eje_x(ax, config, len(etiquetas))
+
+        return fig
+
+    def circular(self, labels: List[Any], values: List[Any], titulo: str = "Gráfico") -> 'Figure':
+        """
+        Construye un gráfico circular
+        """
+        fig, ax, config = self._crear_figura('circular')
+
+        ax.pie(values, labels=[str(label) for label in labels], autopct='%1.1f%%')
+        ax.set_title(titulo)
+        ax.axis('equal')
+
+        return fig
+
+    def a_bytes(self, fig: 'Figure', formato: str = 'png') -> bytes:
+        """
+        Serializa la figura en el formato indicado (png o svg)
+        """
+        buffer = BytesIO()
+        fig.savefig(buffer, format=formato, dpi=self.dpi)
+        return buffer.getvalue()
+
+    def a_base64(self, fig: 'Figure', formato: str = 'png') -> str:
+        """
+        Serializa la figura como data URI en base64
+        """
+        mime = 'image/svg+xml' if formato == 'svg' else 'image/png'
+        image_base64 = base64.b64encode(self.a_bytes(fig, formato)).decode()
+        return f"data:{mime};base64,{image_base64}"
+
+    def a_flowable(self, fig: 'Figure', width: float, height: float):
+        """
+        Convierte la figura en un elemento de ReportLab (vectorial si está disponible)
+        """
+        formato = 'svg' if self.vectorial else 'png'
+        return self.flowable_desde_bytes(self.a_bytes(fig, formato), formato, width, height)
+
+    @staticmethod
+    def flowable_desde_bytes(contenido: bytes, formato: str, width: float, height: float):
+        """
+        Envuelve una imagen ya renderizada (png o svg) en un elemento de ReportLab
+        """
+        from reportlab.platypus import Image
+
+        if formato == 'svg' and SVGLIB_DISPONIBLE:
+            from svglib.svglib import svg2rlg
+
+            dibujo = svg2rlg(BytesIO(contenido))
+            if dibujo is not None:
+                escala_x = width / dibujo.width
+                escala_y = height / dibujo.height
+                dibujo.width, dibujo.height = width, height
+                dibujo.scale(escala_x, escala_y)
+                return dibujo
+
+        return Image(BytesIO(contenido), width=width, height=height)
+
+
+def _renderizar_grafico(tipo: str, labels: List[Any], values: List[Any], titulo: str,
+                        perfil: str, formato: str, ejes: Dict[str, str]) -> bytes:
+    """
+    Renderiza un gráfico completo y devuelve sus bytes. Solo recibe y devuelve datos
+    serializables, por lo que puede ejecutarse en el hilo actual o en otro proceso
+    (este módulo no importa modelos, así que el proceso hijo no necesita django.setup()).
+    """
+    renderizador = RenderizadorGraficos(perfil=perfil)
+
+    if tipo == 'circular':
+        fig = renderizador.circular(labels, values, titulo)
+    else:
+        fig = getattr(renderizador, tipo)(labels, values, titulo, **ejes)
+
+    return renderizador.a_bytes(fig, formato)
+
+
+class ServicioGraficos:
+    """
+    Punto de entrada para renderizar gráficos desde vistas y reportes.
+
+    Cada gráfico se dibuja en su propia figura, así que es seguro llamarlo desde
+    varios hilos del mismo worker (gunicorn gthread). Con GRAFICOS_PROCESOS > 0 el
+    renderizado se delega a un pool de procesos dedicado y los hilos del worker
+    quedan libres mientras tanto. Si un proceso del pool muere, el pool se descarta
+    (el siguiente gráfico crea otro) y el gráfico se dibuja en el hilo actual.
+    """
+    _pool = None
+    _pool_lock = threading.Lock()
+
+    @classmethod
+    def _obtener_pool(cls):
+        procesos = getattr(settings, 'GRAFICOS_PROCESOS', 0)
+        if procesos <= 0:
+            return None
+
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    # 'spawn' evita heredar hilos y conexiones abiertas del worker
+                    cls._pool = ProcessPoolExecutor(
+                        max_workers=procesos,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return cls._pool
+
+    @classmethod
+    def _descartar_pool(cls, pool):
+        with cls._pool_lock:
+            if cls._pool is pool:
+                cls._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def renderizar(cls, tipo: str, labels: List[Any], values: List[Any], titulo: str = "Gráfico",
+                   perfil: str = 'pantalla', formato: str = 'png', **ejes) -> bytes:
+        """
+        Renderiza un gráfico y devuelve sus bytes (png o svg). Lanza GraficoNoDisponible
+        si el pool de procesos no lo termina a tiempo.
+        """
+        if tipo not in TIPOS_GRAFICO:
+            raise ValueError(f"Tipo de gráfico no válido: {tipo}")
+        if formato not in ('png', 'svg'):
+            raise ValueError(f"Formato de gráfico no válido: {formato}")
+
+        args = (tipo, list(labels), list(values), titulo, perfil, formato, ejes)
+
+        pool = cls._obtener_pool()
+        if pool is None:
+            return _renderizar_grafico(*args)
+
+        timeout = getattr(settings, 'GRAFICOS_TIMEOUT', 30)
+        futuro = None
+        try:
+            futuro = pool.submit(_renderizar_grafico, *args)
+            return futuro.result(timeout=timeout)
+        except BrokenProcessPool:
+            logger.warning("El pool de gráficos se rompió; se renderiza en el proceso actual")
+            cls._descartar_pool(pool)
+            return _renderizar_grafico(*args)
+        except TiempoAgotado:
+            # Si ya empezó no se puede cancelar: el proceso lo termina y queda libre
+            futuro.cancel()
+            logger.warning("El gráfico superó el tiempo límite", extra={'tipo': tipo, 'timeout_s': timeout})
+            raise GraficoNoDisponible(f"El gráfico no se generó en {timeout} segundos")
+
+    @classmethod
+    def base64(cls, tipo: str, labels: List[Any], values: List[Any], titulo: str = "Gráfico",
+               perfil: str = 'pantalla', formato: str = 'png', **ejes) -> str:
+        """
+        Renderiza un gráfico y lo retorna como data URI en base64
+        """
+        contenido = cls.renderizar(tipo, labels, values, titulo, perfil, formato, **ejes)
+        mime = 'image/svg+xml' if formato == 'svg' else 'image/png'
+        return f"data:{mime};base64,{base64.b64encode(contenido).decode()}"
+
+    @classmethod
+    def flowable(cls, tipo: str, labels: List[Any], values: List[Any], titulo: str,
+                 width: float, height: float, **ejes):
+        """
+        Renderiza un gráfico con el perfil de impresión y lo retorna listo para ReportLab
+        """
+        vectorial = getattr(settings, 'GRAFICOS_VECTORIALES_PDF', False) and SVGLIB_DISPONIBLE
+        formato = 'svg' if vectorial else 'png'
+        contenido = cls.renderizar(tipo, labels, values, titulo, 'impresion', formato, **ejes)
+        return RenderizadorGraficos.flowable_desde_bytes(contenido, formato, width, height)
@@ -57,7 +57,10 @@ class ReporteGenerado(models.Model):
         ordering = ['-fecha_generacion']
 
     def __str__(self):
-        return f"{self.titulo} - {self.usuario_generador.get_full_name()}"
+        # Sólo se usa el usuario si ya está cargado, para no consultar por cada objeto
+        if ReporteGenerado.usuario_generador.is_cached(self):
+            return f"{self.titulo} - {self.usuario_generador.get_full_name()}"
+        return self.titulo
 
 class Reporte(models.Model):
     titulo = models.CharField(max_length=200)
@@ -1,7 +1,23 @@
 from rest_framework import serializers
+from django.urls import reverse
 from .models import ReporteGenerado, ConfiguracionGrafico
 from apps.authentication.serializers import UserSerializer
 from apps.archivos.serializers import ArchivoExcelListSerializer
+from apps.archivos.condiciones import CondicionesJSON
+
+
+def validar_filtros(value):
+    """
+    Validar que los filtros sean un objeto JSON y que sus condiciones estén bien formadas
+    """
+    if not isinstance(value, dict):
+        raise serializers.ValidationError("Los filtros deben ser un objeto JSON válido")
+    if value.get('condiciones'):
+        try:
+            value['condiciones'] = CondicionesJSON.validar(value['condiciones'])
+        except ValueError as e:
+            raise serializers.ValidationError(f"condiciones: {e}")
+    return value
 
 
 class GenerarReporteSerializer(serializers.Serializer):
@@ -17,6 +33,9 @@ class GenerarReporteSerializer(serializers.Serializer):
         help_text="Lista de campos a incluir en el reporte"
     )
 
+    def validate_filtros(self, value):
+        return validar_filtros(value)
+
 
 class ReporteGeneradoSerializer(serializers.ModelSerializer):
     """
@@ -38,9 +57,15 @@ class ReporteGeneradoSerializer(serializers.ModelSerializer):
         ]
 
     def get_archivo_url(self, obj):
-        if obj.archivo_generado:
-            return obj.archivo_generado.url
-        return None
+        """
+        Endpoint de descarga: MEDIA_URL sólo se sirve en desarrollo
+        """
+        if not obj.archivo_generado:
+            return None
+
+        url = reverse('reportes:reporte_descargar', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
 
 
 class ConfiguracionGraficoSerializer(serializers.ModelSerializer):
@@ -85,9 +110,4 @@ class ExportarDatosSerializer(serializers.Serializer):
     )
 
     def validate_filtros(self, value):
-        """
-        Validar que los filtros sean un JSON válido
-        """
-        if not isinstance(value, dict):
-            raise serializers.ValidationError("Los filtros deben ser un objeto JSON válido")
-        return value
\ No newline at end of file
+        return validar_filtros(value)
\ No newline at end of file
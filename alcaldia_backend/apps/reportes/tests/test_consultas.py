@@ -0,0 +1,48 @@
+"""
+Número de consultas de los endpoints de reportes: no debe crecer con los reportes ni
+con los archivos incluidos en cada uno
+"""
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.archivos.tests.datos import crear_archivo, crear_usuario
+from apps.reportes.models import ConfiguracionGrafico, ReporteGenerado
+
+
+class ConsultasReportesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = crear_usuario('admin@alcaldia.gov.co', role='admin')
+        archivos = [
+            crear_archivo(crear_usuario(f'funcionario{i}@alcaldia.gov.co'), [{'Valor': i}], nombre=f'Archivo {i}')
+            for i in range(3)
+        ]
+        cls.reportes = []
+        for i in range(4):
+            reporte = ReporteGenerado.objects.create(titulo=f'Reporte {i}', usuario_generador=cls.admin)
+            reporte.archivos_incluidos.set(archivos[:i + 1])
+            cls.reportes.append(reporte)
+            ConfiguracionGrafico.objects.create(nombre=f'Gráfico {i}', usuario_creador=cls.admin)
+
+    def setUp(self):
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.admin)
+
+    def test_listado_de_reportes(self):
+        # conteo, página con el usuario y los archivos incluidos con sus usuarios
+        with self.assertNumQueries(3):
+            res = self.cliente.get('/api/reportes/reportes/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['count'], 4)
+
+    def test_detalle_de_reporte(self):
+        with self.assertNumQueries(2):
+            res = self.cliente.get(f'/api/reportes/reportes/{self.reportes[-1].id}/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data['archivos_incluidos']), 3)
+
+    def test_listado_de_configuraciones(self):
+        with self.assertNumQueries(2):
+            res = self.cliente.get('/api/reportes/configuraciones-graficos/')
+        self.assertEqual(res.status_code, 200)
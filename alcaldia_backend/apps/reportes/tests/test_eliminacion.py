@@ -0,0 +1,25 @@
+from django.core.files.base import ContentFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.archivos.tests.datos import crear_usuario
+from apps.reportes.models import ReporteGenerado
+
+
+class EliminarReporteTests(TestCase):
+
+    def test_elimina_el_archivo_guardado(self):
+        usuario = crear_usuario()
+        reporte = ReporteGenerado.objects.create(titulo='Prueba', usuario_generador=usuario)
+        reporte.archivo_generado.save('reporte_prueba.pdf', ContentFile(b'%PDF-1.4'))
+        almacenamiento, ruta = reporte.archivo_generado.storage, reporte.archivo_generado.name
+        self.assertTrue(almacenamiento.exists(ruta))
+
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = cliente.delete(f'/api/reportes/reportes/{reporte.id}/')
+
+        self.assertEqual(res.status_code, 204)
+        self.assertFalse(ReporteGenerado.objects.filter(pk=reporte.pk).exists())
+        self.assertFalse(almacenamiento.exists(ruta))
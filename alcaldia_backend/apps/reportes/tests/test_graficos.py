@@ -0,0 +1,93 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.archivos.tests.datos import crear_usuario
+from apps.reportes.graficos import GraficoNoDisponible, ServicioGraficos
+
+# (tipo, etiquetas, valores, título, ejes)
+GRAFICOS = [
+    ('barras', ['Salud', 'Educación', 'Hacienda'], [12, 7, 3], 'Por dependencia', {'xlabel': 'Dependencia'}),
+    ('lineas', ['2021', '2022', '2023', '2024'], [4, 9, 6, 11], 'Por año', {'ylabel': 'Cantidad'}),
+    ('circular', ['Sí', 'No'], [30, 70], 'Cumplimiento', {}),
+]
+
+
+def renderizar(indice):
+    tipo, labels, values, titulo, ejes = GRAFICOS[indice % len(GRAFICOS)]
+    return ServicioGraficos.renderizar(tipo, labels, values, titulo, **ejes)
+
+
+class RenderizadoConcurrenteTests(SimpleTestCase):
+
+    def tearDown(self):
+        if ServicioGraficos._pool is not None:
+            ServicioGraficos._descartar_pool(ServicioGraficos._pool)
+
+    def referencias(self):
+        with override_settings(GRAFICOS_PROCESOS=0):
+            return [renderizar(i) for i in range(len(GRAFICOS))]
+
+    def concurrentes(self, cantidad=24):
+        with ThreadPoolExecutor(max_workers=8) as hilos:
+            return list(hilos.map(renderizar, range(cantidad)))
+
+    def test_hilos_producen_la_misma_imagen(self):
+        referencias = self.referencias()
+        self.assertTrue(all(contenido.startswith(b'\x89PNG') for contenido in referencias))
+        self.assertEqual(len(set(referencias)), len(GRAFICOS))
+
+        for i, contenido in enumerate(self.concurrentes()):
+            self.assertEqual(contenido, referencias[i % len(GRAFICOS)])
+
+    @override_settings(GRAFICOS_PROCESOS=2, GRAFICOS_TIMEOUT=120)
+    def test_pool_de_procesos_produce_la_misma_imagen(self):
+        referencias = self.referencias()
+        for i, contenido in enumerate(self.concurrentes(12)):
+            self.assertEqual(contenido, referencias[i % len(GRAFICOS)])
+
+    @override_settings(GRAFICOS_PROCESOS=2)
+    def test_pool_roto_se_reemplaza(self):
+        referencia = self.referencias()[0]
+        roto = mock.Mock()
+        roto.submit.side_effect = BrokenProcessPool('un proceso terminó de forma abrupta')
+        ServicioGraficos._pool = roto
+
+        self.assertEqual(renderizar(0), referencia)
+        roto.shutdown.assert_called_once()
+        self.assertIsNone(ServicioGraficos._pool)
+
+    @override_settings(GRAFICOS_PROCESOS=2, GRAFICOS_TIMEOUT=0)
+    def test_tiempo_agotado(self):
+        futuro = Future()
+        ServicioGraficos._pool = mock.Mock(**{'submit.return_value': futuro})
+
+        with self.assertRaises(GraficoNoDisponible):
+            renderizar(0)
+        self.assertTrue(futuro.cancelled())
+        ServicioGraficos._pool = None
+
+
+class GraficoImagenTests(TestCase):
+
+    def test_tiempo_agotado_responde_503(self):
+        cliente = APIClient()
+        cliente.force_authenticate(crear_usuario())
+        with mock.patch.object(ServicioGraficos, 'renderizar', side_effect=GraficoNoDisponible('sin tiempo')):
+            res = cliente.post('/api/reportes/grafico-imagen/', {'tipo_grafico': 'dependencia'}, format='json')
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.data['error'], 'sin tiempo')
+
+    def test_tiempo_agotado_en_base64_responde_503(self):
+        cliente = APIClient()
+        cliente.force_authenticate(crear_usuario())
+        with mock.patch.object(ServicioGraficos, 'renderizar', side_effect=GraficoNoDisponible('sin tiempo')):
+            res = cliente.post(
+                '/api/reportes/generar-grafico/', {'tipo_grafico': 'dependencia', 'formato': 'base64'}, format='json'
+            )
+        self.assertEqual(res.status_code, 503)
+        self.assertFalse(res.data['success'])
+        self.assertEqual(res.data['error'], 'sin tiempo')
@@ -6,6 +6,7 @@ from .views import (
     generar_reporte_excel_view,
     descargar_reporte_view,
     generar_grafico_view,
+    grafico_imagen_view,
     ConfiguracionGraficoListCreateView,
     ConfiguracionGraficoDetailView,
     exportar_datos_view,
@@ -28,6 +29,7 @@ urlpatterns = [
 
     # Gráficos
     path('generar-grafico/', generar_grafico_view, name='generar_grafico'),
+    path('grafico-imagen/', grafico_imagen_view, name='grafico_imagen'),
     path('configuraciones-graficos/', ConfiguracionGraficoListCreateView.as_view(), name='config_grafico_list'),
     path('configuraciones-graficos/<int:pk>/', ConfiguracionGraficoDetailView.as_view(), name='config_grafico_detail'),
 
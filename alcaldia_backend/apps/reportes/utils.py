@@ -1,25 +1,21 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib
-
-matplotlib.use('Agg')  # Para usar matplotlib sin GUI
-import seaborn as sns
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from io import BytesIO
-import base64
 from typing import Dict, List, Any, Tuple
 from django.core.files.base import ContentFile
+from django.db.models import Count
 from django.utils import timezone
 from django.conf import settings
 import os
-import tempfile
+import logging
+from apps.archivos.condiciones import CondicionesJSON
+from apps.archivos.historico import HistoricoArchivos
 from apps.archivos.models import ArchivoExcel, RegistroDato
 from .models import ReporteGenerado
+from .graficos import GraficoNoDisponible, ServicioGraficos
+
+logger = logging.getLogger(__name__)
+
+# pandas y reportlab se importan dentro de generar_excel / generar_pdf para que los
+# workers sólo los carguen cuando se genera el primer reporte
 
 
 class GeneradorReportes:
@@ -40,6 +36,10 @@ class GeneradorReportes:
         self.filtros = filtros
         queryset = RegistroDato.objects.all()
 
+        # historico: archivo_ids pasa a ser todos los archivos con el esquema del último
+        # (o de archivo_id), ver apps/archivos/historico.py
+        HistoricoArchivos.aplicar(filtros)
+
         if 'archivo_ids' in filtros and filtros['archivo_ids']:
             queryset = queryset.filter(archivo_id__in=filtros['archivo_ids'])
 
@@ -58,6 +58,12 @@ class GeneradorReportes:
         if 'fecha_hasta' in filtros and filtros['fecha_hasta']:
             queryset = queryset.filter(archivo__fecha_subida__date__lte=filtros['fecha_hasta'])
 
+        # Condiciones sobre campos JSON (ver apps/archivos/condiciones.py)
+        if filtros.get('condiciones'):
+            queryset = queryset.filter(
+                CondicionesJSON.compilar(filtros['condiciones'], filtros.get('archivo_ids') or None)
+            )
+
         self.datos = queryset.select_related('archivo', 'archivo__usuario_subida')
 
     def generar_pdf(self, incluir_graficos: bool = True) -> Tuple[bool, str, ContentFile]:
@@ -65,6 +71,13 @@ class GeneradorReportes:
         Genera un reporte en formato PDF
         """
         try:
+            from reportlab.lib import colors
+            from reportlab.lib.enums import TA_CENTER
+            from reportlab.lib.pagesizes import A4
+            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+            from reportlab.lib.units import inch
+            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
             # Crear archivo temporal
             buffer = BytesIO()
             doc = SimpleDocTemplate(buffer, pagesize=A4)
@@ -179,73 +192,50 @@ class GeneradorReportes:
         except Exception as e:
             return False, f"Error al generar PDF: {str(e)}", None
 
-    def _generar_graficos(self) -> List[Image]:
+    def _generar_graficos(self) -> List[Any]:
         """
         Genera gráficos para incluir en el reporte
         """
         graficos = []
-
         try:
-            # Configurar matplotlib
-            plt.style.use('default')
-            fig_size = (8, 6)
-
-            # Gráfico por dependencia
-            if len(self.datos) > 0:
-                dependencias = {}
-                for registro in self.datos:
-                    dep = registro.dependencia or 'Sin dependencia'
-                    dependencias[dep] = dependencias.get(dep, 0) + 1
-
-                if dependencias:
-                    plt.figure(figsize=fig_size)
-                    plt.bar(dependencias.keys(), dependencias.values())
-                    plt.title('Registros por Dependencia')
-                    plt.xlabel('Dependencia')
-                    plt.ylabel('Cantidad')
-                    plt.xticks(rotation=45, ha='right')
-                    plt.tight_layout()
-
-                    # Guardar en memoria
-                    img_buffer = BytesIO()
-                    plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-                    img_buffer.seek(0)
-
-                    # Crear imagen para ReportLab
-                    img = Image(img_buffer, width=6 * inch, height=4 * inch)
-                    graficos.append(img)
-
-                    plt.close()
+            from reportlab.lib.units import inch
+
+            # Gráfico por dependencia (conteo agregado en la base de datos)
+            conteo_dependencias = self.datos.values('dependencia').annotate(
+                total=Count('id')
+            ).order_by('-total')
+
+            if conteo_dependencias:
+                graficos.append(ServicioGraficos.flowable(
+                    'barras',
+                    [c['dependencia'] or 'Sin dependencia' for c in conteo_dependencias],
+                    [c['total'] for c in conteo_dependencias],
+                    'Registros por Dependencia',
+                    width=6 * inch,
+                    height=4 * inch,
+                    xlabel='Dependencia',
+                    ylabel='Cantidad'
+                ))
 
             # Gráfico por año
-            if len(self.datos) > 0:
-                anos = {}
-                for registro in self.datos:
-                    ano = registro.anio or 'Sin año'
-                    anos[ano] = anos.get(ano, 0) + 1
-
-                if anos and len(anos) > 1:
-                    plt.figure(figsize=fig_size)
-                    plt.plot(list(anos.keys()), list(anos.values()), marker='o')
-                    plt.title('Registros por Año')
-                    plt.xlabel('Año')
-                    plt.ylabel('Cantidad')
-                    plt.grid(True)
-                    plt.tight_layout()
-
-                    # Guardar en memoria
-                    img_buffer = BytesIO()
-                    plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-                    img_buffer.seek(0)
-
-                    # Crear imagen para ReportLab
-                    img = Image(img_buffer, width=6 * inch, height=4 * inch)
-                    graficos.append(img)
-
-                    plt.close()
-
-        except Exception as e:
-            print(f"Error al generar gráficos: {str(e)}")
+            conteo_anios = self.datos.values('anio').annotate(
+                total=Count('id')
+            ).order_by('anio')
+
+            if len(conteo_anios) > 1:
+                graficos.append(ServicioGraficos.flowable(
+                    'lineas',
+                    [str(c['anio']) if c['anio'] else 'Sin año' for c in conteo_anios],
+                    [c['total'] for c in conteo_anios],
+                    'Registros por Año',
+                    width=6 * inch,
+                    height=4 * inch,
+                    xlabel='Año',
+                    ylabel='Cantidad'
+                ))
+
+        except Exception:
+            logger.exception("Error al generar gráficos del reporte")
 
         return graficos
 
@@ -254,6 +244,8 @@ class GeneradorReportes:
         Genera un reporte en formato Excel
         """
         try:
+            import pandas as pd
+
             # Preparar datos
             datos_excel = []
 
@@ -265,13 +257,14 @@ class GeneradorReportes:
                     'Dependencia': registro.dependencia,
                     'Indicador': registro.indicador,
                     'Valor': registro.valor,
-                    'Fecha Subida': registro.archivo.fecha_subida,
+                    # Excel no admite fechas con zona horaria
+                    'Fecha Subida': timezone.localtime(registro.archivo.fecha_subida).replace(tzinfo=None),
                     'Usuario Subida': registro.archivo.usuario_subida.get_full_name()
                 }
 
                 # Agregar datos JSON como columnas adicionales
-                if registro.datos:
-                    for key, value in registro.datos.items():
+                if registro.fila:
+                    for key, value in registro.fila.items():
                         if key not in fila:
                             fila[f"Data_{key}"] = value
 
@@ -335,7 +328,7 @@ class GeneradorReportes:
             reporte.datos = {
                 "Dependencia": ultimo.dependencia,
                 "Funcionario": getattr(ultimo, "funcionario", ""),
-                "Valor": ultimo.valor,
+                "Valor": float(ultimo.valor) if ultimo.valor is not None else None,
                 "Unidad": getattr(ultimo, "unidad", ""),
                 "Fecha de reporte": str(getattr(ultimo, "fecha_reporte", "")),
                 "Observaciones": getattr(ultimo, "observaciones", "")
@@ -357,26 +350,14 @@ class GeneradorGraficos:
         Genera un gráfico de barras y retorna como base64
         """
         try:
-            plt.figure(figsize=(10, 6))
-            plt.bar(datos['labels'], datos['values'])
-            plt.title(titulo)
-            plt.xlabel('Categorías')
-            plt.ylabel('Valores')
-            plt.xticks(rotation=45, ha='right')
-            plt.tight_layout()
-
-            # Convertir a base64
-            buffer = BytesIO()
-            plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-            buffer.seek(0)
-
-            image_base64 = base64.b64encode(buffer.read()).decode()
-            plt.close()
+            return ServicioGraficos.base64('barras', datos['labels'], datos['values'], titulo)
 
-            return f"data:image/png;base64,{image_base64}"
+        except GraficoNoDisponible:
+            # Sin tiempo en el pool: lo decide la vista (503), no es un error del gráfico
+            raise
 
-        except Exception as e:
-            print(f"Error al generar gráfico: {str(e)}")
+        except Exception:
+            logger.exception("Error al generar gráfico %s", titulo)
             return None
 
     @staticmethod
@@ -385,27 +366,13 @@ class GeneradorGraficos:
         Genera un gráfico de líneas y retorna como base64
         """
         try:
-            plt.figure(figsize=(10, 6))
-            plt.plot(datos['labels'], datos['values'], marker='o')
-            plt.title(titulo)
-            plt.xlabel('Categorías')
-            plt.ylabel('Valores')
-            plt.grid(True)
-            plt.xticks(rotation=45, ha='right')
-            plt.tight_layout()
-
-            # Convertir a base64
-            buffer = BytesIO()
-            plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-            buffer.seek(0)
-
-            image_base64 = base64.b64encode(buffer.read()).decode()
-            plt.close()
+            return ServicioGraficos.base64('lineas', datos['labels'], datos['values'], titulo)
 
-            return f"data:image/png;base64,{image_base64}"
+        except GraficoNoDisponible:
+            raise
 
-        except Exception as e:
-            print(f"Error al generar gráfico: {str(e)}")
+        except Exception:
+            logger.exception("Error al generar gráfico %s", titulo)
             return None
 
     @staticmethod
@@ -414,21 +381,11 @@ class GeneradorGraficos:
         Genera un gráfico circular y retorna como base64
         """
         try:
-            plt.figure(figsize=(8, 8))
-            plt.pie(datos['values'], labels=datos['labels'], autopct='%1.1f%%')
-            plt.title(titulo)
-            plt.axis('equal')
+            return ServicioGraficos.base64('circular', datos['labels'], datos['values'], titulo)
 
-            # Convertir a base64
-            buffer = BytesIO()
-            plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-            buffer.seek(0)
-
-            image_base64 = base64.b64encode(buffer.read()).decode()
-            plt.close()
+        except GraficoNoDisponible:
+            raise
 
-            return f"data:image/png;base64,{image_base64}"
-
-        except Exception as e:
-            print(f"Error al generar gráfico: {str(e)}")
-            return None
\ No newline at end of file
+        except Exception:
+            logger.exception("Error al generar gráfico %s", titulo)
+            return None
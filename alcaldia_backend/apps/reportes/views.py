@@ -1,5 +1,3 @@
-import os
-
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
@@ -7,6 +5,8 @@ from rest_framework.permissions import IsAuthenticated
 from django.http import HttpResponse, JsonResponse
 from django.core.files.base import ContentFile
 from django.utils import timezone
+from django.db import transaction
+from django.db.models import Prefetch
 from .models import ReporteGenerado, ConfiguracionGrafico
 from .serializers import (
     ReporteGeneradoSerializer,
@@ -15,8 +15,10 @@ from .serializers import (
     ExportarDatosSerializer
 )
 from .utils import GeneradorReportes, GeneradorGraficos
-from apps.archivos.models import RegistroDato
-from apps.archivos.utils import FiltrosExcel
+from .graficos import GraficoNoDisponible, ServicioGraficos
+from apps.core.descargas import respuesta_archivo, ArchivoNoDisponible
+from apps.archivos.models import ArchivoExcel, RegistroDato
+from apps.archivos.utils import FiltrosExcel, EstadisticasExcel
 import json
 from django.core.exceptions import ValidationError
 from .models import ReporteGenerado
@@ -24,6 +26,22 @@ from .serializers import ReporteGeneradoSerializer
 from apps.authentication.models import CustomUser
 from apps.reportes.models import Reporte
 
+# Campos por los que se puede agrupar en generar-grafico/
+TIPOS_GRAFICO_REPORTE = ['dependencia', 'anio', 'indicador']
+
+
+def reportes_con_relaciones():
+    """
+    Reportes con el usuario y los archivos incluidos (y sus usuarios) precargados,
+    para que ReporteGeneradoSerializer no haga consultas por fila
+    """
+    return ReporteGenerado.objects.select_related('usuario_generador').prefetch_related(
+        Prefetch(
+            'archivos_incluidos',
+            queryset=ArchivoExcel.objects.select_related('usuario_subida')
+        )
+    )
+
 
 class ReporteGeneradoListView(generics.ListAPIView):
     """
@@ -33,7 +51,7 @@ class ReporteGeneradoListView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        queryset = ReporteGenerado.objects.all()
+        queryset = reportes_con_relaciones()
 
         # Filtrar por usuario si no es admin
         if not self.request.user.is_admin():
@@ -55,7 +73,7 @@ class ReporteGeneradoDetailView(generics.RetrieveDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        queryset = ReporteGenerado.objects.all()
+        queryset = reportes_con_relaciones()
 
         # Filtrar por usuario si no es admin
         if not self.request.user.is_admin():
@@ -63,6 +81,14 @@ class ReporteGeneradoDetailView(generics.RetrieveDestroyAPIView):
 
         return queryset
 
+    def perform_destroy(self, instance):
+        # El FileField no borra el PDF/Excel guardado al eliminar la fila
+        ruta = instance.archivo_generado.name
+        almacenamiento = instance.archivo_generado.storage
+        instance.delete()
+        if ruta:
+            transaction.on_commit(lambda: almacenamiento.delete(ruta))
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -106,6 +132,13 @@ def generar_reporte_pdf_view(request):
                 'error': mensaje
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    except ValueError as e:
+        # Condiciones con valores que no encajan en el tipo de la columna
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
     except Exception as e:
         return Response({
             'success': False,
@@ -154,6 +187,13 @@ def generar_reporte_excel_view(request):
                 'error': mensaje
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    except ValueError as e:
+        # Condiciones con valores que no encajan en el tipo de la columna
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
     except Exception as e:
         return Response({
             'success': False,
@@ -178,11 +218,6 @@ def descargar_reporte_view(request, reporte_id):
         if not reporte.archivo_generado:
             return Response({'error': 'Archivo no disponible'}, status=404)
 
-        # VALIDACIÓN NUEVA:
-        if not os.path.exists(reporte.archivo_generado.path):
-            return Response({'error': 'El archivo ya no existe en el sistema'}, status=410)
-
-
         # Determinar content type
         content_type = 'application/octet-stream'
         if reporte.tipo_reporte == 'pdf':
@@ -190,16 +225,13 @@ def descargar_reporte_view(request, reporte_id):
         elif reporte.tipo_reporte == 'excel':
             content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 
-        # Preparar respuesta
-        response = HttpResponse(
-            reporte.archivo_generado.read(),
-            content_type=content_type
-        )
-
         filename = f"{reporte.titulo}_{timezone.now().strftime('%Y%m%d')}.{reporte.tipo_reporte}"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
-        return response
+        # Se transmite desde el almacenamiento por bloques (o vía nginx con X-Accel-Redirect)
+        return respuesta_archivo(request, reporte.archivo_generado, filename, content_type)
+
+    except ArchivoNoDisponible:
+        return Response({'error': 'El archivo ya no existe en el sistema'}, status=410)
 
     except ReporteGenerado.DoesNotExist:
         return Response({
@@ -225,45 +257,31 @@ def generar_grafico_view(request):
         tipo_grafico = request.data.get('tipo_grafico', 'bar')
         titulo = request.data.get('titulo', 'Gráfico')
         filtros = request.data.get('filtros', {})
+        metrica = request.data.get('metrica', 'conteo')
 
-        # Obtener datos filtrados
-        registros = FiltrosExcel.filtrar_registros(filtros)
-
-        # Preparar datos según el tipo de gráfico
-        if tipo_grafico == 'dependencia':
-            datos = {}
-            for registro in registros:
-                dep = registro.dependencia or 'Sin dependencia'
-                datos[dep] = datos.get(dep, 0) + 1
-
-        elif tipo_grafico == 'anio':
-            datos = {}
-            for registro in registros:
-                anio = str(registro.anio) if registro.anio else 'Sin año'
-                datos[anio] = datos.get(anio, 0) + 1
-
-        elif tipo_grafico == 'indicador':
-            datos = {}
-            for registro in registros[:20]:  # Limitar a 20 para legibilidad
-                ind = registro.indicador or 'Sin indicador'
-                datos[ind] = datos.get(ind, 0) + 1
-        else:
+        if tipo_grafico not in TIPOS_GRAFICO_REPORTE:
             return Response({
                 'error': 'Tipo de gráfico no válido'
             }, status=status.HTTP_400_BAD_REQUEST)
 
+        # Agrupación y métrica calculadas en la base de datos
+        serie = EstadisticasExcel.serie_grafico(
+            tipo_grafico,
+            filtros,
+            metrica=metrica,
+            top_n=20 if tipo_grafico == 'indicador' else None
+        )
+
         # Preparar datos para el gráfico
         datos_grafico = {
-            'labels': list(datos.keys()),
-            'values': list(datos.values())
+            'labels': serie['labels'],
+            'values': serie['series'][0]['valores']
         }
 
-        # Generar gráfico
+        # Imagen embebida en el JSON: se mantiene por compatibilidad. Para dibujar en el
+        # navegador usar archivos/datos-grafico/ y para incrustar la imagen grafico-imagen/
         if request.data.get('formato') == 'base64':
-            if tipo_grafico in ['dependencia', 'anio', 'indicador']:
-                grafico_base64 = GeneradorGraficos.generar_grafico_barras(datos_grafico, titulo)
-            else:
-                grafico_base64 = GeneradorGraficos.generar_grafico_barras(datos_grafico, titulo)
+            grafico_base64 = GeneradorGraficos.generar_grafico_barras(datos_grafico, titulo)
 
             return Response({
                 'success': True,
@@ -277,6 +295,18 @@ def generar_grafico_view(request):
                 'titulo': titulo
             })
 
+    except GraficoNoDisponible as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
     except Exception as e:
         return Response({
             'success': False,
@@ -284,6 +314,58 @@ def generar_grafico_view(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def grafico_imagen_view(request):
+    """
+    Devuelve el gráfico como imagen PNG o SVG (sin base64), pensado para incrustarlo
+    en documentos. Para mostrarlo en el navegador se usa archivos/datos-grafico/.
+    """
+    try:
+        campo = request.data.get('tipo_grafico', 'dependencia')
+        titulo = request.data.get('titulo', 'Gráfico')
+        filtros = request.data.get('filtros', {})
+        metrica = request.data.get('metrica', 'conteo')
+        estilo = request.data.get('estilo', 'barras')
+        formato = request.data.get('formato', 'png')
+        perfil = request.data.get('perfil', 'impresion')
+
+        if formato not in ('png', 'svg'):
+            return Response({
+                'error': 'Formato no soportado. Opciones: png, svg'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        serie = EstadisticasExcel.serie_grafico(
+            campo,
+            filtros,
+            metrica=metrica,
+            top_n=int(request.data.get('top', 20)) or None
+        )
+
+        contenido = ServicioGraficos.renderizar(
+            estilo,
+            serie['labels'],
+            serie['series'][0]['valores'],
+            titulo,
+            perfil=perfil,
+            formato=formato
+        )
+
+        content_type = 'image/svg+xml' if formato == 'svg' else 'image/png'
+        return HttpResponse(contenido, content_type=content_type)
+
+    except GraficoNoDisponible as e:
+        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    except Exception as e:
+        return Response({
+            'error': f'Error al generar gráfico: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class ConfiguracionGraficoListCreateView(generics.ListCreateAPIView):
     """
     Vista para listar y crear configuraciones de gráficos
@@ -292,7 +374,7 @@ class ConfiguracionGraficoListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return ConfiguracionGrafico.objects.filter(
+        return ConfiguracionGrafico.objects.select_related('usuario_creador').filter(
             usuario_creador=self.request.user
         ).order_by('-fecha_creacion')
 
@@ -308,7 +390,7 @@ class ConfiguracionGraficoDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return ConfiguracionGrafico.objects.filter(
+        return ConfiguracionGrafico.objects.select_related('usuario_creador').filter(
             usuario_creador=self.request.user
         )
 
@@ -355,6 +437,11 @@ def exportar_datos_view(request):
                 'error': mensaje
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    except ValueError as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
     except Exception as e:
         return Response({
             'error': f'Error al exportar datos: {str(e)}'
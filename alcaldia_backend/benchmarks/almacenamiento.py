@@ -0,0 +1,201 @@
+"""
+Almacenamiento de las filas: JSON por fila frente a compacto (esquema en el archivo y
+valores por posición, ver apps/archivos/almacenamiento.py).
+
+Carga las mismas filas sintéticas (apps/archivos/sinteticos.py, con la forma de los
+archivos reales) dos veces con ExcelProcessor.insertar_registros, una por modo, en la
+base de datos de DJANGO_SETTINGS_MODULE y mide:
+
+- tamaño de las filas: bytes de datos + valores por registro y, en PostgreSQL, el
+  total de las filas del archivo (pg_column_size, ya comprimido por TOAST),
+- tiempo de carga,
+- lecturas sobre una columna de la fila con el código de la API: valores únicos,
+  búsqueda de texto, serie de un gráfico agrupada por la columna y una página de
+  registros serializada (que reconstruye el diccionario de cada fila).
+
+Los archivos de prueba se eliminan al terminar.
+
+    python benchmarks/almacenamiento.py --filas 200000 --columnas 12 --salida almacenamiento.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from carga import commit_actual, percentil  # noqa: E402
+
+MODOS = ('json', 'compacto')
+
+
+def cargar(modo, usuario, args):
+    import pandas as pd
+    from apps.archivos.models import ArchivoExcel
+    from apps.archivos.sinteticos import generar_filas
+    from apps.archivos.utils import ExcelProcessor
+
+    archivo = ArchivoExcel.objects.create(
+        nombre_archivo=f'Benchmark almacenamiento ({modo})',
+        descripcion='benchmarks/almacenamiento.py',
+        usuario_subida=usuario,
+        almacenamiento=modo,
+    )
+    processor = ExcelProcessor(archivo)
+    filas = generar_filas(args.filas, columnas_extra=args.columnas, semilla=args.semilla)
+
+    inicio = time.perf_counter()
+    insertadas = 0
+    while True:
+        bloque = list(islice(filas, 50000))
+        if not bloque:
+            break
+        processor.df = pd.DataFrame(bloque, index=range(insertadas, insertadas + len(bloque)))
+        if insertadas == 0:
+            # El esquema debe estar guardado antes de leer las filas compactas
+            archivo.columnas_disponibles = list(processor.df.columns)
+            archivo.total_columnas = len(processor.df.columns)
+            archivo.save()
+        insertadas += processor.insertar_registros()
+    duracion = time.perf_counter() - inicio
+
+    archivo.total_filas = insertadas
+    archivo.procesado = True
+    archivo.save()
+    return archivo, duracion
+
+
+def tamano(archivo_id):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT avg(pg_column_size(datos) + COALESCE(pg_column_size(valores), 0)), "
+                "sum(pg_column_size(r.*)) FROM registros_datos r WHERE archivo_id = %s",
+                [archivo_id]
+            )
+        else:
+            cursor.execute(
+                "SELECT avg(length(datos) + COALESCE(length(valores), 0)), NULL "
+                "FROM registros_datos WHERE archivo_id = %s",
+                [archivo_id]
+            )
+        por_fila, total = cursor.fetchone()
+    return {
+        'bytes_fila': round(float(por_fila), 1),
+        'filas_mb': round(total / 1024 ** 2, 1) if total is not None else None,
+    }
+
+
+def lecturas(archivo, args):
+    from apps.archivos.serializers import RegistroDatoSerializer
+    from apps.archivos.utils import EstadisticasExcel, FiltrosExcel
+
+    columna = 'Columna 1'
+    operaciones = {
+        'valores_unicos': lambda: FiltrosExcel.obtener_valores_unicos(columna, archivo.id),
+        'busqueda': lambda: FiltrosExcel.filtrar_registros({
+            'archivo_id': archivo.id, 'busqueda_texto': {'campo': columna, 'valor': 'Observación 1'}
+        }).count(),
+        'grafico': lambda: EstadisticasExcel.serie_grafico(columna, {'archivo_id': archivo.id}),
+        'pagina': lambda: RegistroDatoSerializer(
+            FiltrosExcel.filtrar_registros({'archivo_id': archivo.id})[:args.pagina], many=True
+        ).data,
+    }
+
+    resultados = {}
+    for nombre, operacion in operaciones.items():
+        operacion()
+        tiempos = []
+        for _ in range(args.repeticiones):
+            inicio = time.perf_counter()
+            operacion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        resultados[nombre] = {
+            'p50_ms': round(statistics.median(tiempos), 2),
+            'p90_ms': round(percentil(tiempos, 0.90), 2),
+        }
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', default=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+    parser.add_argument('--filas', type=int, default=200_000, help='Filas de cada archivo')
+    parser.add_argument('--columnas', type=int, default=12, help='Columnas adicionales a Año/Dependencia/Indicador/Valor')
+    parser.add_argument('--repeticiones', type=int, default=10, help='Repeticiones de cada lectura')
+    parser.add_argument('--pagina', type=int, default=1000, help='Registros de la página serializada')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--conservar', action='store_true', help='No eliminar los archivos de prueba al terminar')
+    parser.add_argument('--salida', help='Ruta del reporte JSON')
+    args = parser.parse_args()
+
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+    import django
+    django.setup()
+    from django.core.cache import cache
+    from django.db import connection
+    from apps.archivos.models import ArchivoExcel
+    from apps.authentication.models import CustomUser
+
+    usuario = CustomUser.objects.order_by('id').first()
+    if usuario is None:
+        raise SystemExit('Se necesita al menos un usuario para asignar los archivos de prueba')
+
+    # Las lecturas no deben salir de la caché de la API
+    cache.clear()
+
+    datos = {}
+    archivos = []
+    try:
+        for modo in MODOS:
+            print(f"Cargando {args.filas} filas en modo {modo}...")
+            archivo, duracion = cargar(modo, usuario, args)
+            archivos.append(archivo)
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE registros_datos")
+            datos[modo] = {
+                'carga_s': round(duracion, 1),
+                'tamano': tamano(archivo.id),
+                'lecturas': lecturas(archivo, args),
+            }
+    finally:
+        if not args.conservar:
+            for archivo in archivos:
+                ArchivoExcel.todos.filter(pk=archivo.pk).delete()
+
+    json_, compacto = datos['json'], datos['compacto']
+    print(f"\n{'':<22}{'json':>12}{'compacto':>12}")
+    print(f"{'bytes por fila':<22}{json_['tamano']['bytes_fila']:>12.1f}{compacto['tamano']['bytes_fila']:>12.1f}")
+    if json_['tamano']['filas_mb'] is not None:
+        print(f"{'filas MB':<22}{json_['tamano']['filas_mb']:>12.1f}{compacto['tamano']['filas_mb']:>12.1f}")
+    print(f"{'carga s':<22}{json_['carga_s']:>12.1f}{compacto['carga_s']:>12.1f}")
+    for nombre in json_['lecturas']:
+        print(f"{nombre + ' p50 ms':<22}{json_['lecturas'][nombre]['p50_ms']:>12.2f}"
+              f"{compacto['lecturas'][nombre]['p50_ms']:>12.2f}")
+
+    if args.salida:
+        reporte = {
+            'version': 1,
+            'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': commit_actual(),
+            'entorno': {'python': platform.python_version(), 'plataforma': platform.platform(),
+                        'base_datos': connection.vendor},
+            'parametros': {k: v for k, v in vars(args).items() if k != 'salida'},
+            'resultados': datos,
+        }
+        with open(args.salida, 'w', encoding='utf-8') as salida:
+            json.dump(reporte, salida, ensure_ascii=False, indent=2)
+        print(f"Reporte guardado en {args.salida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+Tiempo de importación y memoria (RSS) de un worker al arrancar.
+
+Lanza procesos nuevos que hacen lo mismo que un worker de gunicorn antes de atender
+la primera petición (django.setup(), cargar las URLs con todas las vistas y crear la
+aplicación WSGI con sus middlewares) bajo `python -X importtime`, y reporta:
+
+- tiempo total de importación y los paquetes que más aportan,
+- RSS del proceso al terminar el arranque,
+- RSS después de importar las librerías pesadas (pandas, matplotlib, reportlab),
+  es decir, lo que ocupa un worker una vez que atendió una carga o un reporte.
+
+    python benchmarks/arranque.py --salida arranque_actual.json --comparar arranque_base.json
+
+Se ejecuta con la configuración de DJANGO_SETTINGS_MODULE (config.settings por defecto);
+no se conecta a la base de datos.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from carga import commit_actual  # noqa: E402
+
+DIRECTORIO_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LIBRERIAS_PESADAS = ('pandas', 'matplotlib', 'reportlab', 'openpyxl', 'numpy', 'PIL', 'magic', 'svglib')
+
+MARCA_FIN_ARRANQUE = '--- fin del arranque ---'
+
+# Código ejecutado en el proceso medido; imprime su RSS como JSON en stdout
+ARRANQUE = '''
+import json, os
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+def rss_mb():
+    with open('/proc/self/status') as estado:
+        for linea in estado:
+            if linea.startswith('VmRSS:'):
+                return int(linea.split()[1]) / 1024
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+import config.urls  # noqa: F401
+arranque = rss_mb()
+
+import sys
+cargadas = sorted(nombre for nombre in %(pesadas)r if nombre in sys.modules)
+sys.stderr.write(%(marca)r + '\\n')
+sys.stderr.flush()
+
+import pandas, matplotlib.figure, matplotlib.backends.backend_agg, reportlab.platypus  # noqa: F401,E401
+print(json.dumps({'rss_arranque_mb': arranque, 'rss_con_librerias_mb': rss_mb(), 'pesadas_al_arrancar': cargadas}))
+'''
+
+
+def interpretar_importtime(salida):
+    """
+    Devuelve (tiempo total en ms, {paquete de primer nivel: ms acumulados})
+    """
+    total_us = 0
+    por_paquete = {}
+    for linea in salida.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        propio, acumulado, nombre = linea[len('import time:'):].split('|')
+        total_us += int(propio)
+        # Los módulos importados por otro aparecen más indentados: sólo cuentan los de primer nivel
+        if len(nombre) - len(nombre.lstrip()) == 1:
+            paquete = nombre.strip().split('.')[0]
+            por_paquete[paquete] = por_paquete.get(paquete, 0) + int(acumulado)
+    return total_us / 1000, {paquete: us / 1000 for paquete, us in por_paquete.items()}
+
+
+def medir_una_vez(django_settings):
+    entorno = dict(os.environ, DJANGO_SETTINGS_MODULE=django_settings, PYTHONPATH=os.pathsep.join(
+        filter(None, [DIRECTORIO_BACKEND, os.environ.get('PYTHONPATH')])
+    ))
+    codigo = ARRANQUE % {'pesadas': LIBRERIAS_PESADAS, 'marca': MARCA_FIN_ARRANQUE}
+
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        cwd=DIRECTORIO_BACKEND, env=entorno, capture_output=True, text=True
+    )
+    if proceso.returncode != 0:
+        raise SystemExit(f"El arranque falló:\n{proceso.stderr[-3000:]}")
+
+    # La importación de las librerías pesadas al final no forma parte del arranque
+    arranque = proceso.stderr.split(MARCA_FIN_ARRANQUE)[0]
+    tiempo_ms, por_paquete = interpretar_importtime(arranque)
+
+    ultima = proceso.stdout.strip().splitlines()[-1]
+    memoria = json.loads(ultima)
+    return tiempo_ms, por_paquete, memoria
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', default=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='Paquetes a mostrar por tiempo de importación')
+    parser.add_argument('--salida', help='Ruta del reporte JSON')
+    parser.add_argument('--comparar', help='Reporte JSON anterior contra el que comparar')
+    args = parser.parse_args()
+
+    tiempos, rss_arranque, rss_librerias, paquetes = [], [], [], {}
+    pesadas = []
+    for _ in range(args.repeticiones):
+        tiempo_ms, por_paquete, memoria = medir_una_vez(args.settings)
+        tiempos.append(tiempo_ms)
+        rss_arranque.append(memoria['rss_arranque_mb'])
+        rss_librerias.append(memoria['rss_con_librerias_mb'])
+        pesadas = memoria['pesadas_al_arrancar']
+        for paquete, ms in por_paquete.items():
+            paquetes.setdefault(paquete, []).append(ms)
+
+    top = sorted(((statistics.median(v), k) for k, v in paquetes.items()), reverse=True)[:args.top]
+    datos = {
+        'importacion_ms_p50': round(statistics.median(tiempos), 1),
+        'rss_arranque_mb_p50': round(statistics.median(rss_arranque), 1),
+        'rss_con_librerias_mb_p50': round(statistics.median(rss_librerias), 1),
+        'pesadas_al_arrancar': pesadas,
+        'paquetes_ms': {paquete: round(ms, 1) for ms, paquete in top},
+    }
+
+    print(f"Importación al arrancar: {datos['importacion_ms_p50']} ms (mediana de {args.repeticiones})")
+    print(f"RSS tras arrancar: {datos['rss_arranque_mb_p50']} MB; "
+          f"con pandas/matplotlib/reportlab: {datos['rss_con_librerias_mb_p50']} MB")
+    print(f"Librerías pesadas cargadas al arrancar: {', '.join(pesadas) or 'ninguna'}")
+    print(f"\n{'paquete':<28}{'ms':>10}")
+    for paquete, ms in datos['paquetes_ms'].items():
+        print(f"{paquete:<28}{ms:>10.1f}")
+
+    reporte = {
+        'version': 1,
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit_actual(),
+        'entorno': {'python': platform.python_version(), 'plataforma': platform.platform()},
+        'parametros': {'settings': args.settings, 'repeticiones': args.repeticiones},
+        'arranque': datos,
+    }
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as salida:
+            json.dump(reporte, salida, ensure_ascii=False, indent=2)
+        print(f"\nReporte guardado en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as entrada:
+            anterior = json.load(entrada)['arranque']
+        print("\nComparación con el reporte anterior:")
+        for clave in ('importacion_ms_p50', 'rss_arranque_mb_p50', 'rss_con_librerias_mb_p50'):
+            delta = (datos[clave] - anterior[clave]) / anterior[clave] * 100
+            print(f"{clave}: {anterior[clave]} -> {datos[clave]} ({delta:+.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""
+Capacidad de concurrencia de los endpoints de lectura: gthread (WSGI) frente a
+workers con event loop (ASGI, vistas de apps/archivos/views_async.py).
+
+Para cada modo arranca gunicorn con gunicorn.conf.py y el mismo número de workers,
+mide la memoria de la flota (PSS, ver benchmarks/memoria.py) y sube la concurrencia
+de clientes por escalones. En cada escalón reporta req/s, p50/p99 y errores; la
+capacidad de un modo es la mayor concurrencia que atiende sin errores y con p99 por
+debajo de --slo-ms.
+
+    python benchmarks/asincrono.py --email admin@alcaldia.gov.co --password secreto \\
+        --workers 4 --niveles 8,32,128,256 --salida asincrono.json
+
+Si la flota ASGI ocupa distinta memoria que la gthread, --workers-asgi permite
+igualarla antes de comparar. La ventaja de ASGI aparece cuando las peticiones esperan
+a la base de datos: conviene medir contra el Postgres real y no contra uno local.
+Requiere uvicorn (ver requirements.txt). Sólo funciona en Linux.
+"""
+import argparse
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from carga import commit_actual, obtener_token, resumir  # noqa: E402
+from memoria import DIRECTORIO_BACKEND, esperar_workers, hijos, memoria_proceso  # noqa: E402
+
+MODOS = {
+    'gthread': {'worker_class': 'gthread', 'aplicacion': 'config.wsgi:application', 'prefijo': ''},
+    'asgi': {'worker_class': 'config.workers.WorkerAsgi', 'aplicacion': 'config.asgi:application',
+             'prefijo': 'async/'},
+}
+
+# (método, ruta bajo api/archivos/, cuerpo)
+ESCENARIOS = {
+    'archivos': ('GET', 'archivos/', None),
+    'columnas': ('GET', 'columnas-disponibles/', None),
+    'valores_unicos': ('GET', 'valores-unicos/?campo=dependencia', None),
+    'estadisticas': ('GET', 'estadisticas/', None),
+    'buscar': ('POST', 'registros/buscar/', {'termino': 'a', 'page': 1, 'page_size': 20}),
+}
+
+
+def arrancar(modo, workers, args):
+    puerto = str(args.puerto)
+    entorno = dict(os.environ, PORT=puerto, WEB_CONCURRENCY=str(workers),
+                   GUNICORN_WORKER_CLASS=MODOS[modo]['worker_class'])
+    maestro = subprocess.Popen(
+        ['gunicorn', '--config', 'gunicorn.conf.py', MODOS[modo]['aplicacion']],
+        cwd=DIRECTORIO_BACKEND, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    esperar_workers(maestro, f"http://127.0.0.1:{puerto}", workers)
+    return maestro
+
+
+def escalon(sesion, url, escenario, concurrencia, args):
+    """
+    Mantiene `concurrencia` clientes haciendo peticiones durante --segundos
+    """
+    metodo, ruta, cuerpo = ESCENARIOS[escenario]
+    limite = time.monotonic() + args.segundos
+
+    def cliente(_):
+        tiempos, tamanos, errores = [], [], 0
+        while time.monotonic() < limite:
+            inicio = time.perf_counter()
+            try:
+                res = sesion.request(metodo, f"{url}{ruta}", json=cuerpo, timeout=60)
+                ok = res.status_code == 200
+            except requests.RequestException:
+                ok = False
+            if ok:
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+                tamanos.append(len(res.content))
+            else:
+                errores += 1
+        return tiempos, tamanos, errores
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        resultados = list(pool.map(cliente, range(concurrencia)))
+    duracion = time.perf_counter() - inicio
+
+    tiempos = [t for r in resultados for t in r[0]]
+    tamanos = [b for r in resultados for b in r[1]]
+    return resumir(tiempos, sum(r[2] for r in resultados), tamanos, duracion)
+
+
+def medir_modo(modo, workers, niveles, args):
+    url_base = f"http://127.0.0.1:{args.puerto}"
+    url = f"{url_base}/api/archivos/{MODOS[modo]['prefijo']}"
+    maestro = arrancar(modo, workers, args)
+    try:
+        sesion = requests.Session()
+        sesion.headers['Authorization'] = f'Bearer {obtener_token(url_base, args.email, args.password)}'
+        adaptador = requests.adapters.HTTPAdapter(pool_maxsize=max(niveles))
+        sesion.mount('http://', adaptador)
+
+        # Calentamiento: cada worker atiende algunas peticiones antes de medir
+        for escenario in args.escenarios:
+            metodo, ruta, cuerpo = ESCENARIOS[escenario]
+            for _ in range(workers * 2):
+                sesion.request(metodo, f"{url}{ruta}", json=cuerpo, timeout=60)
+
+        procesos = [maestro.pid] + hijos(maestro.pid)
+        memoria = [memoria_proceso(pid) for pid in procesos]
+
+        escenarios = {}
+        for escenario in args.escenarios:
+            escenarios[escenario] = {}
+            for concurrencia in niveles:
+                datos = escalon(sesion, url, escenario, concurrencia, args)
+                escenarios[escenario][concurrencia] = datos
+                print(f"{modo:<9}{escenario:<16}{concurrencia:>6}{datos.get('peticiones_por_segundo', 0):>10.1f}"
+                      f"{datos.get('p50_ms', 0):>10.1f}{datos.get('p99_ms', 0):>10.1f}{datos['errores']:>9}")
+    finally:
+        maestro.send_signal(signal.SIGTERM)
+        maestro.wait(timeout=60)
+
+    return {
+        'workers': workers,
+        'pss_total_mb': round(sum(m['pss'] for m in memoria), 1),
+        'uss_total_mb': round(sum(m['uss'] for m in memoria), 1),
+        'escenarios': escenarios,
+    }
+
+
+def capacidad(niveles_medidos, slo_ms):
+    """
+    Mayor concurrencia atendida sin errores y con p99 dentro del SLO (0 si ninguna)
+    """
+    aptos = [concurrencia for concurrencia, datos in niveles_medidos.items()
+             if datos['errores'] == 0 and datos.get('p99_ms', float('inf')) <= slo_ms]
+    return max(aptos, default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--workers-asgi', type=int, help='Workers ASGI (por defecto, los mismos que gthread)')
+    parser.add_argument('--niveles', default='8,32,128,256', help='Concurrencias de clientes a probar')
+    parser.add_argument('--segundos', type=float, default=15, help='Duración de cada escalón')
+    parser.add_argument('--slo-ms', type=float, default=1000, help='p99 máximo aceptable')
+    parser.add_argument('--escenarios', default=','.join(ESCENARIOS))
+    parser.add_argument('--modos', default=','.join(MODOS))
+    parser.add_argument('--puerto', type=int, default=8766)
+    parser.add_argument('--salida', help='Ruta del reporte JSON')
+    args = parser.parse_args()
+
+    niveles = sorted(int(n) for n in args.niveles.split(',') if n.strip())
+    args.escenarios = [e.strip() for e in args.escenarios.split(',') if e.strip()]
+    modos = [m.strip() for m in args.modos.split(',') if m.strip()]
+    desconocidos = (set(args.escenarios) - set(ESCENARIOS)) | (set(modos) - set(MODOS))
+    if desconocidos:
+        parser.error(f"Escenarios o modos desconocidos: {', '.join(sorted(desconocidos))}")
+
+    resultados = {}
+    print(f"{'modo':<9}{'escenario':<16}{'conc.':>6}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errores':>9}")
+    for modo in modos:
+        workers = args.workers_asgi if modo == 'asgi' and args.workers_asgi else args.workers
+        resultados[modo] = medir_modo(modo, workers, niveles, args)
+
+    print(f"\n{'modo':<9}{'workers':>8}{'PSS MB':>10}  capacidad (concurrencia con p99 <= {args.slo_ms:.0f} ms)")
+    for modo, datos in resultados.items():
+        datos['capacidad'] = {escenario: capacidad(medidos, args.slo_ms)
+                              for escenario, medidos in datos['escenarios'].items()}
+        detalle = ', '.join(f"{escenario}: {valor}" for escenario, valor in datos['capacidad'].items())
+        print(f"{modo:<9}{datos['workers']:>8}{datos['pss_total_mb']:>10.1f}  {detalle}")
+
+    if args.salida:
+        reporte = {
+            'version': 1,
+            'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': commit_actual(),
+            'entorno': {'python': platform.python_version(), 'plataforma': platform.platform()},
+            'parametros': {k: v for k, v in vars(args).items() if k not in ('password', 'salida')},
+            'modos': resultados,
+        }
+        with open(args.salida, 'w', encoding='utf-8') as salida:
+            json.dump(reporte, salida, ensure_ascii=False, indent=2)
+        print(f"Reporte guardado en {args.salida}")
+
+
+if __name__ == '__main__':
+    main()
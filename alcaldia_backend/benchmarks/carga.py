@@ -0,0 +1,267 @@
+"""
+Prueba de carga repetible de la API con reporte JSON comparable entre commits.
+
+1. Genera libros Excel sintéticos (apps/archivos/sinteticos.py) y los sube,
+   midiendo el throughput de carga (filas/s y MB/s).
+2. Ejecuta los escenarios con la concurrencia indicada y calcula percentiles:
+     grafico   POST archivos/generar-grafico/
+     buscar    POST archivos/registros/buscar/
+     pdf       POST reportes/generar-pdf/
+     exportar  POST reportes/exportar-datos/
+3. Escribe el reporte (--salida) y, con --comparar, muestra la diferencia contra
+   un reporte anterior.
+
+Al terminar elimina por la API los archivos subidos y los reportes PDF generados,
+con sus ficheros en MEDIA_ROOT (--conservar para dejarlos).
+
+Uso (con el servidor corriendo: manage.py runserver o gunicorn --config gunicorn.conf.py config.wsgi):
+    python benchmarks/carga.py --email admin@alcaldia.gov.co --password secreto \\
+        --filas 2000 --iteraciones 30 --concurrencia 4 --salida carga_actual.json \\
+        --comparar carga_base.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from apps.archivos.sinteticos import generar_libro  # noqa: E402
+
+TIPO_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+ESCENARIOS = ('grafico', 'buscar', 'pdf', 'exportar')
+
+
+def obtener_token(url, email, password):
+    res = requests.post(f"{url}/api/auth/login/", json={'email': email, 'password': password}, timeout=30)
+    res.raise_for_status()
+    return res.json()['access']
+
+
+def commit_actual():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentil(valores, fraccion):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * fraccion))]
+
+
+def resumir(tiempos_ms, errores, tamanos, duracion_s):
+    if not tiempos_ms:
+        return {'peticiones': 0, 'errores': errores}
+    return {
+        'peticiones': len(tiempos_ms) + errores,
+        'errores': errores,
+        'p50_ms': round(statistics.median(tiempos_ms), 1),
+        'p90_ms': round(percentil(tiempos_ms, 0.90), 1),
+        'p99_ms': round(percentil(tiempos_ms, 0.99), 1),
+        'max_ms': round(max(tiempos_ms), 1),
+        'media_ms': round(statistics.mean(tiempos_ms), 1),
+        'bytes_medios': int(statistics.mean(tamanos)) if tamanos else 0,
+        'peticiones_por_segundo': round(len(tiempos_ms) / duracion_s, 2),
+    }
+
+
+def subir_archivos(sesion, url, args):
+    """
+    Sube los libros sintéticos y devuelve (ids creados, métricas de carga)
+    """
+    ids, tiempos, filas_totales, bytes_totales = [], [], 0, 0
+    for i in range(args.archivos):
+        contenido = generar_libro(
+            args.filas, columnas_extra=args.columnas, dependencias=args.dependencias,
+            sesgo=args.sesgo, semilla=args.semilla + i
+        )
+        inicio = time.perf_counter()
+        res = sesion.post(
+            f"{url}/api/archivos/archivos/",
+            files={'archivo': (f'sintetico_{i}.xlsx', contenido, TIPO_XLSX)},
+            data={'nombre_archivo': f'Benchmark {args.filas} filas #{i}', 'descripcion': 'benchmarks/carga.py'},
+            timeout=600
+        )
+        duracion = time.perf_counter() - inicio
+        if res.status_code != 201:
+            raise SystemExit(f"Error al subir el libro sintético: HTTP {res.status_code} {res.text[:300]}")
+
+        ids.append(res.json()['id'])
+        tiempos.append(duracion)
+        filas_totales += args.filas
+        bytes_totales += len(contenido)
+
+    total = sum(tiempos)
+    return ids, {
+        'archivos': args.archivos,
+        'filas_por_archivo': args.filas,
+        'segundos_por_archivo_p50': round(statistics.median(tiempos), 3),
+        'filas_por_segundo': round(filas_totales / total, 1),
+        'mb_por_segundo': round(bytes_totales / total / (1024 * 1024), 3),
+    }
+
+
+def peticion_escenario(nombre, archivo_id, indice):
+    if nombre == 'grafico':
+        tipos = ('dependencia', 'anio', 'indicador')
+        return 'archivos/generar-grafico/', {
+            'tipo_grafico': tipos[indice % len(tipos)], 'filtros': {'archivo_id': archivo_id}
+        }
+    if nombre == 'buscar':
+        return 'archivos/registros/buscar/', {
+            'termino': 'Secretaría', 'filtros': {'archivo_id': archivo_id}, 'page': indice % 5 + 1
+        }
+    if nombre == 'pdf':
+        return 'reportes/generar-pdf/', {
+            'titulo': 'Benchmark', 'filtros': {'archivo_ids': [archivo_id]}, 'incluir_graficos': True
+        }
+    return 'reportes/exportar-datos/', {'formato': 'excel', 'filtros': {'archivo_ids': [archivo_id]}}
+
+
+def ejecutar_escenario(sesion, url, nombre, archivo_id, args, reportes):
+    """
+    Mide el escenario; los ids de los reportes que guarde el servidor se agregan a reportes
+    """
+    def una(indice):
+        ruta, cuerpo = peticion_escenario(nombre, archivo_id, indice)
+        inicio = time.perf_counter()
+        try:
+            res = sesion.post(f"{url}/api/{ruta}", json=cuerpo, timeout=600)
+        except requests.RequestException:
+            return None, 0
+        duracion = (time.perf_counter() - inicio) * 1000
+        if res.status_code >= 400:
+            return None, 0
+        if nombre == 'pdf':
+            reportes.append(res.json()['reporte']['id'])
+        return duracion, len(res.content)
+
+    # Calentamiento: la primera petición paga imports perezosos y cachés frías
+    una(0)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrencia) as pool:
+        resultados = list(pool.map(una, range(args.iteraciones)))
+    duracion = time.perf_counter() - inicio
+
+    tiempos = [t for t, _ in resultados if t is not None]
+    tamanos = [b for t, b in resultados if t is not None]
+    return resumir(tiempos, len(resultados) - len(tiempos), tamanos, duracion)
+
+
+def limpiar(sesion, url, archivos, reportes):
+    """
+    Elimina los reportes y archivos creados por la prueba (filas y ficheros guardados)
+    """
+    rutas = [f"reportes/reportes/{reporte_id}/" for reporte_id in reportes]
+    rutas += [f"archivos/archivos/{archivo_id}/" for archivo_id in archivos]
+    fallidas = 0
+    for ruta in rutas:
+        try:
+            res = sesion.delete(f"{url}/api/{ruta}", timeout=600)
+            fallidas += res.status_code not in (202, 204, 404)
+        except requests.RequestException:
+            fallidas += 1
+    print(f"\nLimpieza: {len(reportes)} reportes y {len(archivos)} archivos eliminados"
+          + (f" ({fallidas} con error)" if fallidas else ''))
+
+
+def comparar(actual, anterior):
+    print(f"\nComparación con {anterior.get('commit') or 'reporte anterior'} ({anterior['fecha']}):")
+    print(f"{'escenario':<12}{'p50 antes':>12}{'p50 ahora':>12}{'Δ p50':>9}{'p99 antes':>12}{'p99 ahora':>12}{'Δ p99':>9}")
+    for nombre, datos in actual['escenarios'].items():
+        previo = anterior.get('escenarios', {}).get(nombre)
+        if not previo or 'p50_ms' not in previo or 'p50_ms' not in datos:
+            continue
+        delta50 = (datos['p50_ms'] - previo['p50_ms']) / previo['p50_ms'] * 100
+        delta99 = (datos['p99_ms'] - previo['p99_ms']) / previo['p99_ms'] * 100
+        print(f"{nombre:<12}{previo['p50_ms']:>12.1f}{datos['p50_ms']:>12.1f}{delta50:>8.1f}%"
+              f"{previo['p99_ms']:>12.1f}{datos['p99_ms']:>12.1f}{delta99:>8.1f}%")
+
+    carga_antes = anterior.get('carga', {}).get('filas_por_segundo')
+    if carga_antes:
+        print(f"carga: {carga_antes} -> {actual['carga']['filas_por_segundo']} filas/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--archivos', type=int, default=1, help='Libros sintéticos a subir')
+    parser.add_argument('--filas', type=int, default=1000)
+    parser.add_argument('--columnas', type=int, default=6, help='Columnas adicionales por libro')
+    parser.add_argument('--dependencias', type=int, default=10)
+    parser.add_argument('--sesgo', type=float, default=0.0, help='Sesgo Zipf de dependencias e indicadores')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--escenarios', default=','.join(ESCENARIOS))
+    parser.add_argument('--iteraciones', type=int, default=30, help='Peticiones por escenario')
+    parser.add_argument('--concurrencia', type=int, default=4)
+    parser.add_argument('--salida', help='Ruta del reporte JSON')
+    parser.add_argument('--comparar', help='Reporte JSON anterior contra el que comparar')
+    parser.add_argument('--conservar', action='store_true', help='No eliminar los archivos subidos al terminar')
+    args = parser.parse_args()
+
+    escenarios = [e.strip() for e in args.escenarios.split(',') if e.strip()]
+    desconocidos = set(escenarios) - set(ESCENARIOS)
+    if desconocidos:
+        parser.error(f"Escenarios desconocidos: {', '.join(sorted(desconocidos))}")
+
+    sesion = requests.Session()
+    sesion.headers['Authorization'] = f'Bearer {obtener_token(args.url, args.email, args.password)}'
+    adaptador = requests.adapters.HTTPAdapter(pool_maxsize=args.concurrencia)
+    sesion.mount('http://', adaptador)
+    sesion.mount('https://', adaptador)
+
+    ids, carga = subir_archivos(sesion, args.url, args)
+    print(f"Carga: {carga['filas_por_segundo']} filas/s, {carga['mb_por_segundo']} MB/s")
+
+    reporte = {
+        'version': 1,
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit_actual(),
+        'url': args.url,
+        'entorno': {'python': platform.python_version(), 'plataforma': platform.platform()},
+        'parametros': {k: v for k, v in vars(args).items() if k not in ('password', 'salida', 'comparar')},
+        'carga': carga,
+        'escenarios': {},
+    }
+
+    reportes = []
+    try:
+        print(f"\n{'escenario':<12}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}{'req/s':>8}{'errores':>9}")
+        for nombre in escenarios:
+            datos = ejecutar_escenario(sesion, args.url, nombre, ids[0], args, reportes)
+            reporte['escenarios'][nombre] = datos
+            if 'p50_ms' in datos:
+                print(f"{nombre:<12}{datos['p50_ms']:>10.1f}{datos['p90_ms']:>10.1f}{datos['p99_ms']:>10.1f}"
+                      f"{datos['max_ms']:>10.1f}{datos['peticiones_por_segundo']:>8.1f}{datos['errores']:>9}")
+            else:
+                print(f"{nombre:<12}{'sin respuestas exitosas':>48}{datos['errores']:>9}")
+    finally:
+        if not args.conservar:
+            limpiar(sesion, args.url, ids, reportes)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as salida:
+            json.dump(reporte, salida, ensure_ascii=False, indent=2)
+        print(f"\nReporte guardado en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as entrada:
+            comparar(reporte, json.load(entrada))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark de bytes transferidos y CPU de codificación de las respuestas de la API.
+
+Construye una página sintética con la forma de registros/ (RegistroDatoSerializer con
+su objeto `datos` completo) y mide, para JSON y MessagePack, el tamaño y el tiempo de
+serialización sin comprimir y con cada codificación disponible (gzip, br, zstd).
+
+Uso (desde alcaldia_backend/):
+    python benchmarks/compresion.py --registros 20 --columnas 15 --repeticiones 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from apps.core.middleware import codificadores_disponibles  # noqa: E402
+from apps.core.renderers import MessagePackRenderer, msgpack  # noqa: E402
+
+DEPENDENCIAS = ['Secretaría de Salud', 'Secretaría de Educación', 'Secretaría de Hacienda',
+                'Secretaría de Planeación', 'Secretaría de Infraestructura']
+
+
+def pagina_registros(registros, columnas):
+    """
+    Página equivalente a GET registros/ con PAGE_SIZE registros
+    """
+    resultados = []
+    for i in range(registros):
+        datos = {f'Columna {c}': f'Valor {i * c % 97} de la columna {c}' for c in range(columnas - 4)}
+        datos.update({
+            'Dependencia': DEPENDENCIAS[i % len(DEPENDENCIAS)],
+            'Año': 2020 + i % 5,
+            'Indicador': f'Indicador de gestión {i % 12}',
+            'Valor': round(i * 1234.5, 2),
+        })
+        resultados.append({
+            'id': i + 1,
+            'archivo': 1,
+            'archivo_nombre': 'Plan de acción 2024.xlsx',
+            'numero_fila': i + 2,
+            'datos': datos,
+            'anio': 2020 + i % 5,
+            'dependencia': datos['Dependencia'],
+            'indicador': datos['Indicador'],
+            'valor': Decimal(str(datos['Valor'])),
+            'fecha_creacion': datetime(2024, 1, 1, tzinfo=timezone.utc),
+        })
+
+    return {
+        'count': registros * 50,
+        'next': 'http://localhost:8000/api/archivos/registros/?page=2',
+        'previous': None,
+        'results': resultados,
+    }
+
+
+def medir(funcion, argumento, repeticiones):
+    tiempos = []
+    salida = b''
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        salida = funcion(argumento)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return salida, statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--registros', type=int, default=20, help='Registros por página (PAGE_SIZE)')
+    parser.add_argument('--columnas', type=int, default=15, help='Columnas del objeto datos')
+    parser.add_argument('--repeticiones', type=int, default=50)
+    args = parser.parse_args()
+
+    pagina = pagina_registros(args.registros, args.columnas)
+
+    renderers = [('json', JSONRenderer())]
+    if msgpack is not None:
+        renderers.append(('msgpack', MessagePackRenderer()))
+    else:
+        print('msgpack no está instalado: se omite MessagePack')
+
+    codificadores = codificadores_disponibles()
+    print(f"Codificaciones disponibles: {', '.join(codificadores)}\n")
+    print(f"{'formato':<10}{'codificación':<14}{'bytes':>10}{'ratio':>8}{'serializar ms':>15}{'comprimir ms':>14}")
+
+    for nombre, renderer in renderers:
+        cuerpo, ms_render = medir(renderer.render, pagina, args.repeticiones)
+        print(f"{nombre:<10}{'identity':<14}{len(cuerpo):>10}{1:>8.2f}{ms_render:>15.3f}{0:>14.3f}")
+
+        for codificacion, comprimir in codificadores.items():
+            comprimido, ms_compresion = medir(comprimir, cuerpo, args.repeticiones)
+            ratio = len(cuerpo) / len(comprimido)
+            print(f"{nombre:<10}{codificacion:<14}{len(comprimido):>10}{ratio:>8.2f}"
+                  f"{ms_render:>15.3f}{ms_compresion:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
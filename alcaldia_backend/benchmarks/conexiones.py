@@ -0,0 +1,134 @@
+"""
+Latencia de un endpoint trivial autenticado (auth/user/) con y sin conexiones persistentes.
+
+El endpoint sólo carga el usuario del token, así que su latencia está dominada por
+abrir la conexión a Postgres cuando DATABASE_CONN_MAX_AGE=0. Se ejecuta una vez con
+el servidor arrancado en cada modo y se comparan los reportes:
+
+    DATABASE_CONN_MAX_AGE=0 gunicorn --config gunicorn.conf.py config.wsgi
+    python benchmarks/conexiones.py --email admin@alcaldia.gov.co --password secreto --salida sin_pool.json
+
+    gunicorn --config gunicorn.conf.py config.wsgi        # CONN_MAX_AGE por defecto
+    python benchmarks/conexiones.py --email admin@alcaldia.gov.co --password secreto \\
+        --salida con_pool.json --comparar sin_pool.json
+
+Si /metrics está disponible también se reportan los checkouts de conexiones
+(reutilizadas / nuevas) ocurridos durante la prueba.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from carga import commit_actual, obtener_token, resumir  # noqa: E402
+
+PATRON_CHECKOUT = re.compile(r'^alcaldia_db_checkouts_total\{resultado="(\w+)"\} ([0-9.e+]+)$', re.MULTILINE)
+
+
+def checkouts(url, token_metricas):
+    """
+    Lee los contadores de checkouts desde /metrics; None si no está disponible
+    """
+    cabeceras = {'Authorization': f'Bearer {token_metricas}'} if token_metricas else {}
+    try:
+        res = requests.get(f"{url}/metrics/", headers=cabeceras, timeout=10)
+    except requests.RequestException:
+        return None
+    if res.status_code != 200:
+        return None
+    return {resultado: float(valor) for resultado, valor in PATRON_CHECKOUT.findall(res.text)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--iteraciones', type=int, default=500)
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--token-metricas', default='', help='METRICAS_TOKEN del servidor, si está definido')
+    parser.add_argument('--salida', help='Ruta del reporte JSON')
+    parser.add_argument('--comparar', help='Reporte JSON anterior contra el que comparar')
+    args = parser.parse_args()
+
+    sesion = requests.Session()
+    sesion.headers['Authorization'] = f'Bearer {obtener_token(args.url, args.email, args.password)}'
+    adaptador = requests.adapters.HTTPAdapter(pool_maxsize=args.concurrencia)
+    sesion.mount('http://', adaptador)
+    sesion.mount('https://', adaptador)
+
+    def una(_):
+        inicio = time.perf_counter()
+        try:
+            res = sesion.get(f"{args.url}/api/auth/user/", timeout=30)
+        except requests.RequestException:
+            return None, 0
+        if res.status_code != 200:
+            return None, 0
+        return (time.perf_counter() - inicio) * 1000, len(res.content)
+
+    # Calentamiento: un recorrido por hilo para que cada worker tenga su conexión
+    with ThreadPoolExecutor(max_workers=args.concurrencia) as pool:
+        list(pool.map(una, range(args.concurrencia * 2)))
+
+    antes = checkouts(args.url, args.token_metricas)
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrencia) as pool:
+        resultados = list(pool.map(una, range(args.iteraciones)))
+    duracion = time.perf_counter() - inicio
+    despues = checkouts(args.url, args.token_metricas)
+
+    tiempos = [t for t, _ in resultados if t is not None]
+    tamanos = [b for t, b in resultados if t is not None]
+    datos = resumir(tiempos, len(resultados) - len(tiempos), tamanos, duracion)
+
+    if antes is not None and despues is not None:
+        datos['checkouts'] = {
+            resultado: int(despues.get(resultado, 0) - antes.get(resultado, 0))
+            for resultado in ('reutilizada', 'nueva')
+        }
+
+    reporte = {
+        'version': 1,
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit_actual(),
+        'url': args.url,
+        'entorno': {'python': platform.python_version(), 'plataforma': platform.platform()},
+        'parametros': {k: v for k, v in vars(args).items()
+                       if k not in ('password', 'token_metricas', 'salida', 'comparar')},
+        'escenarios': {'usuario': datos},
+    }
+
+    if 'p50_ms' in datos:
+        print(f"auth/user/: p50 {datos['p50_ms']} ms, p99 {datos['p99_ms']} ms, "
+              f"{datos['peticiones_por_segundo']} req/s, {datos['errores']} errores")
+    else:
+        print(f"auth/user/: sin respuestas exitosas ({datos['errores']} errores)")
+    if 'checkouts' in datos:
+        print(f"checkouts: {datos['checkouts']['reutilizada']} reutilizadas, {datos['checkouts']['nueva']} nuevas")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as salida:
+            json.dump(reporte, salida, ensure_ascii=False, indent=2)
+        print(f"Reporte guardado en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as entrada:
+            anterior = json.load(entrada)['escenarios']['usuario']
+        if 'p50_ms' in anterior and 'p50_ms' in datos:
+            for clave in ('p50_ms', 'p99_ms'):
+                delta = (datos[clave] - anterior[clave]) / anterior[clave] * 100
+                print(f"{clave}: {anterior[clave]} -> {datos[clave]} ({delta:+.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Prueba de estrés del renderizado concurrente de gráficos.
+
+Lanza muchas peticiones paralelas con formato=base64 contra reportes/generar-grafico/
+y verifica la integridad de cada imagen:
+  - la respuesta es un PNG válido que Pillow puede abrir,
+  - peticiones idénticas producen exactamente los mismos bytes (si dos hilos
+    dibujaran sobre la misma figura, las imágenes diferirían),
+  - peticiones con títulos distintos producen imágenes distintas.
+
+Uso (con el servidor corriendo, p. ej. gunicorn --config gunicorn.conf.py config.wsgi):
+    python benchmarks/estres_graficos.py --url http://localhost:8000 \\
+        --email admin@alcaldia.gov.co --password secreto --peticiones 200 --concurrencia 16
+"""
+import argparse
+import base64
+import hashlib
+import statistics
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import requests
+from PIL import Image
+
+FIRMA_PNG = b'\x89PNG\r\n\x1a\n'
+
+
+def obtener_token(url, email, password):
+    res = requests.post(f"{url}/api/auth/login/", json={'email': email, 'password': password}, timeout=30)
+    res.raise_for_status()
+    return res.json()['access']
+
+
+def peticion(url, token, indice, variantes):
+    variante = indice % variantes
+    payload = {
+        'tipo_grafico': 'dependencia',
+        'titulo': f'Estrés variante {variante}',
+        'formato': 'base64',
+        'filtros': {},
+    }
+    inicio = time.perf_counter()
+    res = requests.post(
+        f"{url}/api/reportes/generar-grafico/",
+        json=payload,
+        headers={'Authorization': f'Bearer {token}'},
+        timeout=120
+    )
+    duracion = (time.perf_counter() - inicio) * 1000
+
+    if res.status_code != 200:
+        return variante, duracion, None, f'HTTP {res.status_code}'
+
+    grafico = res.json().get('grafico') or ''
+    if not grafico.startswith('data:image/png;base64,'):
+        return variante, duracion, None, 'respuesta sin imagen'
+
+    contenido = base64.b64decode(grafico.split(',', 1)[1])
+    if not contenido.startswith(FIRMA_PNG):
+        return variante, duracion, None, 'firma PNG inválida'
+
+    try:
+        Image.open(BytesIO(contenido)).verify()
+    except Exception as e:
+        return variante, duracion, None, f'PNG corrupto: {e}'
+
+    return variante, duracion, hashlib.sha256(contenido).hexdigest(), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--peticiones', type=int, default=200)
+    parser.add_argument('--concurrencia', type=int, default=16)
+    parser.add_argument('--variantes', type=int, default=4,
+                        help='Número de títulos distintos que se reparten entre las peticiones')
+    args = parser.parse_args()
+
+    token = obtener_token(args.url, args.email, args.password)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrencia) as pool:
+        resultados = list(pool.map(
+            lambda i: peticion(args.url, token, i, args.variantes),
+            range(args.peticiones)
+        ))
+    total = time.perf_counter() - inicio
+
+    errores = [r for r in resultados if r[3]]
+    hashes = defaultdict(set)
+    for variante, _, digest, error in resultados:
+        if not error:
+            hashes[variante].add(digest)
+
+    inconsistentes = [v for v, digests in hashes.items() if len(digests) > 1]
+    distintos = {next(iter(d)) for d in hashes.values() if len(d) == 1}
+    colisiones = len(hashes) - len(distintos)
+
+    tiempos = sorted(r[1] for r in resultados)
+    p99 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.99))]
+
+    print(f"Peticiones: {args.peticiones}  concurrencia: {args.concurrencia}")
+    print(f"Throughput: {args.peticiones / total:.1f} gráficos/s")
+    print(f"Latencia p50: {statistics.median(tiempos):.0f} ms  p99: {p99:.0f} ms")
+    print(f"Errores: {len(errores)}")
+    for _, _, _, error in errores[:10]:
+        print(f"  - {error}")
+    print(f"Variantes con imágenes inconsistentes: {len(inconsistentes)}")
+    print(f"Variantes distintas que produjeron la misma imagen: {colisiones}")
+
+    if errores or inconsistentes or colisiones:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
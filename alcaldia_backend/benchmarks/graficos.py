@@ -0,0 +1,107 @@
+"""
+Benchmark del renderizado de gráficos: pyplot (implementación anterior) vs Figure/Agg.
+
+Uso (desde alcaldia_backend/):
+    python benchmarks/graficos.py --repeticiones 20 --categorias 15
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import matplotlib  # noqa: E402
+
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+
+from apps.reportes.graficos import RenderizadorGraficos  # noqa: E402
+
+
+def legado_barras(labels, values, titulo):
+    """
+    Réplica de la implementación anterior basada en pyplot (dpi=300, bbox_inches='tight')
+    """
+    plt.figure(figsize=(10, 6))
+    plt.bar(labels, values)
+    plt.title(titulo)
+    plt.xlabel('Categorías')
+    plt.ylabel('Valores')
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
+
+    buffer = BytesIO()
+    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
+    plt.close()
+    return buffer.getvalue()
+
+
+def nuevo_barras(perfil, formato):
+    renderizador = RenderizadorGraficos(perfil=perfil)
+
+    def render(labels, values, titulo):
+        fig = renderizador.barras(labels, values, titulo)
+        return renderizador.a_bytes(fig, formato)
+
+    return render
+
+
+def medir(nombre, funcion, labels, values, repeticiones):
+    # Calentamiento (caché de fuentes, imports perezosos de matplotlib)
+    funcion(labels, values, 'Calentamiento')
+
+    tiempos = []
+    picos = []
+    tamano = 0
+    for _ in range(repeticiones):
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        salida = funcion(labels, values, 'Registros por Dependencia')
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        picos.append(tracemalloc.get_traced_memory()[1] / (1024 * 1024))
+        tracemalloc.stop()
+        tamano = len(salida)
+
+    return {
+        'nombre': nombre,
+        'p50_ms': statistics.median(tiempos),
+        'max_ms': max(tiempos),
+        'memoria_pico_mb': statistics.median(picos),
+        'tamano_kb': tamano / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--categorias', type=int, default=15)
+    args = parser.parse_args()
+
+    labels = [f'Secretaría de prueba número {i}' for i in range(args.categorias)]
+    values = [(i * 37) % 101 + 1 for i in range(args.categorias)]
+
+    casos = [
+        ('pyplot 300dpi (anterior)', legado_barras),
+        ('Figure/Agg pantalla png', nuevo_barras('pantalla', 'png')),
+        ('Figure/Agg impresion png', nuevo_barras('impresion', 'png')),
+        ('Figure/Agg svg', nuevo_barras('pantalla', 'svg')),
+    ]
+
+    print(f"{'caso':<28}{'p50 ms':>10}{'max ms':>10}{'pico MB':>10}{'salida KB':>12}")
+    for nombre, funcion in casos:
+        r = medir(nombre, funcion, labels, values, args.repeticiones)
+        print(f"{r['nombre']:<28}{r['p50_ms']:>10.1f}{r['max_ms']:>10.1f}"
+              f"{r['memoria_pico_mb']:>10.2f}{r['tamano_kb']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Tendencia de varios años de una dependencia: una consulta por archivo (y unión en el
+cliente) frente a una sola consulta sobre el histórico (apps/archivos/historico.py).
+
+Carga un archivo sintético por año (apps/archivos/sinteticos.py) en la base de datos
+de DJANGO_SETTINGS_MODULE con el mismo esquema; los archivos alternan el modo de
+almacenamiento y el de los años impares escribe las columnas en mayúsculas, para que
+la consulta tenga que alinear las columnas. Mide con AgregadorDatos.agregar:
+
+- cubo: suma y conteo de valor por año de una dependencia (desde el cubo pre-agregado),
+- condicion: lo mismo con una condición sobre una columna de la fila (lee los
+  registros),
+
+y comprueba que las dos formas devuelven las mismas filas. Los archivos de prueba se
+eliminan al terminar.
+
+    python benchmarks/historico.py --archivos 8 --filas 50000 --salida historico.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import date, datetime, timezone
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from carga import commit_actual, percentil  # noqa: E402
+
+DEPENDENCIA = 'Secretaría de Salud'
+COLUMNA_LOTE = 'Lote benchmark histórico'
+CONDICION = [{'campo': 'Columna 2', 'op': '>=', 'valor': 5000}]
+
+
+def cargar(indice, anio, usuario, args):
+    import pandas as pd
+    from apps.archivos.models import ALMACENAMIENTO_COMPACTO, ALMACENAMIENTO_JSON, ArchivoExcel
+    from apps.archivos.sinteticos import generar_filas
+    from apps.archivos.utils import CuboRegistros, ExcelProcessor
+
+    archivo = ArchivoExcel.objects.create(
+        nombre_archivo=f'Benchmark histórico {anio}',
+        descripcion='benchmarks/historico.py',
+        usuario_subida=usuario,
+        almacenamiento=ALMACENAMIENTO_COMPACTO if indice % 2 else ALMACENAMIENTO_JSON,
+    )
+    processor = ExcelProcessor(archivo)
+    filas = generar_filas(args.filas, columnas_extra=args.columnas, semilla=args.semilla + indice)
+
+    insertadas = 0
+    while True:
+        bloque = list(islice(filas, 50000))
+        if not bloque:
+            break
+        for fila in bloque:
+            fila['Año'] = anio
+            # Columna propia: el histórico no debe incluir otros archivos con el mismo esquema
+            fila[COLUMNA_LOTE] = 'benchmarks/historico.py'
+        if indice % 2:
+            bloque = [{columna.upper(): valor for columna, valor in fila.items()} for fila in bloque]
+        processor.df = pd.DataFrame(bloque, index=range(insertadas, insertadas + len(bloque)))
+        if insertadas == 0:
+            processor._extraer_metadatos_comunes()
+            archivo.columnas_disponibles = list(processor.df.columns)
+            archivo.total_columnas = len(processor.df.columns)
+            archivo.save()
+        insertadas += processor.insertar_registros()
+
+    archivo.total_filas = insertadas
+    archivo.procesado = True
+    archivo.save()
+    CuboRegistros.reconstruir(archivo)
+    return archivo
+
+
+def por_archivo(archivos, filtros):
+    """
+    Como lo hacía el frontend: una agregación por archivo y unión de las filas por año
+    """
+    from apps.archivos.utils import AgregadorDatos
+
+    totales = {}
+    for archivo in archivos:
+        resultado = AgregadorDatos.agregar(['anio'], ['suma', 'conteo'], dict(filtros, archivo_id=archivo.id))
+        for anio, suma, conteo in resultado['filas']:
+            anterior = totales.get(anio, [0, 0])
+            totales[anio] = [anterior[0] + (suma or 0), anterior[1] + conteo]
+    return sorted([anio, round(suma, 2), conteo] for anio, (suma, conteo) in totales.items())
+
+
+def historico(archivos, filtros):
+    from apps.archivos.utils import AgregadorDatos
+
+    resultado = AgregadorDatos.agregar(
+        ['anio'], ['suma', 'conteo'], dict(filtros, historico=True, archivo_id=archivos[-1].id)
+    )
+    return sorted([anio, round(suma or 0, 2), conteo] for anio, suma, conteo in resultado['filas'])
+
+
+def medir(operacion, repeticiones):
+    filas = operacion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        operacion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return filas, {
+        'p50_ms': round(statistics.median(tiempos), 2),
+        'p90_ms': round(percentil(tiempos, 0.90), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', default=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+    parser.add_argument('--archivos', type=int, default=8, help='Archivos (años) a cargar')
+    parser.add_argument('--filas', type=int, default=50_000, help='Filas de cada archivo')
+    parser.add_argument('--columnas', type=int, default=6, help='Columnas adicionales a Año/Dependencia/Indicador/Valor')
+    parser.add_argument('--repeticiones', type=int, default=10)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--conservar', action='store_true', help='No eliminar los archivos de prueba al terminar')
+    parser.add_argument('--salida', help='Ruta del reporte JSON')
+    args = parser.parse_args()
+
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+    import django
+    django.setup()
+    from django.db import connection
+    from apps.archivos.models import ArchivoExcel
+    from apps.authentication.models import CustomUser
+
+    usuario = CustomUser.objects.order_by('id').first()
+    if usuario is None:
+        raise SystemExit('Se necesita al menos un usuario para asignar los archivos de prueba')
+
+    consultas = {
+        'cubo': {'dependencia': DEPENDENCIA},
+        'condicion': {'dependencia': DEPENDENCIA, 'condiciones': CONDICION},
+    }
+
+    datos = {}
+    archivos = []
+    try:
+        primer_anio = date.today().year - args.archivos + 1
+        for indice in range(args.archivos):
+            print(f"Cargando {args.filas} filas del año {primer_anio + indice}...")
+            archivos.append(cargar(indice, primer_anio + indice, usuario, args))
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE registros_datos")
+
+        for nombre, filtros in consultas.items():
+            filas_archivo, tiempos_archivo = medir(lambda: por_archivo(archivos, filtros), args.repeticiones)
+            filas_historico, tiempos_historico = medir(lambda: historico(archivos, filtros), args.repeticiones)
+            datos[nombre] = {
+                'por_archivo': tiempos_archivo,
+                'historico': tiempos_historico,
+                'anios': len(filas_historico),
+                'coinciden': filas_archivo == filas_historico,
+            }
+    finally:
+        if not args.conservar:
+            for archivo in archivos:
+                ArchivoExcel.todos.filter(pk=archivo.pk).delete()
+
+    print(f"\n{'consulta':<12}{'por archivo p50':>18}{'histórico p50':>16}{'años':>6}  coinciden")
+    for nombre, resultado in datos.items():
+        print(f"{nombre:<12}{resultado['por_archivo']['p50_ms']:>18.2f}{resultado['historico']['p50_ms']:>16.2f}"
+              f"{resultado['anios']:>6}  {'sí' if resultado['coinciden'] else 'NO'}")
+
+    if args.salida:
+        reporte = {
+            'version': 1,
+            'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': commit_actual(),
+            'entorno': {'python': platform.python_version(), 'plataforma': platform.platform(),
+                        'base_datos': connection.vendor},
+            'parametros': {k: v for k, v in vars(args).items() if k != 'salida'},
+            'resultados': datos,
+        }
+        with open(args.salida, 'w', encoding='utf-8') as salida:
+            json.dump(reporte, salida, ensure_ascii=False, indent=2)
+        print(f"Reporte guardado en {args.salida}")
+
+
+if __name__ == '__main__':
+    main()
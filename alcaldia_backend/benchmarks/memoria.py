@@ -0,0 +1,175 @@
+"""
+Memoria total de la flota de workers de gunicorn con y sin preload_app.
+
+Para cada modo arranca gunicorn (gunicorn.conf.py) con WEB_CONCURRENCY workers y espera
+a que todos estén listos. Si se dan credenciales, ejercita las rutas de gráficos y PDF
+para que cada worker cargue las librerías pesadas, como en producción. Después suma la
+memoria del maestro y los workers leyendo /proc/<pid>/smaps_rollup:
+
+- RSS: cuenta varias veces las páginas compartidas (sobreestima el total),
+- PSS: reparte cada página compartida entre los procesos que la usan (la medida justa),
+- USS: memoria privada de cada proceso (lo que se libera al matarlo).
+
+    python benchmarks/memoria.py --workers 4 --email admin@alcaldia.gov.co --password secreto \\
+        --salida memoria.json
+
+Sólo funciona en Linux.
+"""
+import argparse
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from carga import commit_actual, obtener_token  # noqa: E402
+
+DIRECTORIO_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODOS = {'preload': '1', 'sin-preload': '0'}
+
+
+def memoria_proceso(pid):
+    """
+    {'rss', 'pss', 'uss'} en MB a partir de smaps_rollup
+    """
+    valores = {'Rss': 0, 'Pss': 0, 'Private_Clean': 0, 'Private_Dirty': 0}
+    with open(f'/proc/{pid}/smaps_rollup') as smaps:
+        for linea in smaps:
+            clave, _, resto = linea.partition(':')
+            if clave in valores:
+                valores[clave] = int(resto.split()[0])
+    return {
+        'rss': valores['Rss'] / 1024,
+        'pss': valores['Pss'] / 1024,
+        'uss': (valores['Private_Clean'] + valores['Private_Dirty']) / 1024,
+    }
+
+
+def hijos(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as archivo:
+        return [int(hijo) for hijo in archivo.read().split()]
+
+
+def esperar_workers(maestro, url, workers, limite=120):
+    inicio = time.monotonic()
+    while time.monotonic() - inicio < limite:
+        if maestro.poll() is not None:
+            raise SystemExit("gunicorn terminó antes de estar listo")
+        try:
+            if len(hijos(maestro.pid)) >= workers and requests.get(f"{url}/healthz/", timeout=2).ok:
+                return
+        except (OSError, requests.RequestException):
+            pass
+        time.sleep(0.5)
+    raise SystemExit("gunicorn no quedó listo a tiempo")
+
+
+def ejercitar(url, args):
+    """
+    Reparte peticiones de gráficos y PDF entre los workers para que carguen
+    pandas, matplotlib y reportlab
+    """
+    sesion = requests.Session()
+    sesion.headers['Authorization'] = f'Bearer {obtener_token(url, args.email, args.password)}'
+    peticiones = [
+        ('archivos/generar-grafico/', {'tipo_grafico': 'dependencia', 'filtros': {}}),
+        ('reportes/generar-pdf/', {'titulo': 'Memoria', 'filtros': {}, 'incluir_graficos': True}),
+    ]
+
+    def una(indice):
+        ruta, cuerpo = peticiones[indice % len(peticiones)]
+        try:
+            sesion.post(f"{url}/api/{ruta}", json=cuerpo, timeout=120)
+        except requests.RequestException:
+            pass
+
+    with ThreadPoolExecutor(max_workers=args.workers * 2) as pool:
+        list(pool.map(una, range(args.workers * args.peticiones_por_worker)))
+
+
+def medir_modo(modo, args):
+    puerto = str(args.puerto)
+    url = f"http://127.0.0.1:{puerto}"
+    entorno = dict(os.environ, PORT=puerto, WEB_CONCURRENCY=str(args.workers), GUNICORN_PRELOAD=MODOS[modo])
+
+    maestro = subprocess.Popen(
+        ['gunicorn', '--config', 'gunicorn.conf.py', 'config.wsgi:application'],
+        cwd=DIRECTORIO_BACKEND, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        arranque = time.monotonic()
+        esperar_workers(maestro, url, args.workers)
+        segundos_arranque = time.monotonic() - arranque
+
+        if args.email:
+            ejercitar(url, args)
+        time.sleep(1)
+
+        procesos = {'maestro': memoria_proceso(maestro.pid)}
+        for indice, pid in enumerate(hijos(maestro.pid)):
+            procesos[f'worker_{indice + 1}'] = memoria_proceso(pid)
+    finally:
+        maestro.send_signal(signal.SIGTERM)
+        maestro.wait(timeout=60)
+
+    return {
+        'segundos_arranque': round(segundos_arranque, 2),
+        'rss_total_mb': round(sum(p['rss'] for p in procesos.values()), 1),
+        'pss_total_mb': round(sum(p['pss'] for p in procesos.values()), 1),
+        'uss_total_mb': round(sum(p['uss'] for p in procesos.values()), 1),
+        'procesos': {nombre: {k: round(v, 1) for k, v in datos.items()} for nombre, datos in procesos.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--modos', default=','.join(MODOS))
+    parser.add_argument('--email', help='Usuario para ejercitar los workers (opcional)')
+    parser.add_argument('--password')
+    parser.add_argument('--peticiones-por-worker', type=int, default=4)
+    parser.add_argument('--salida', help='Ruta del reporte JSON')
+    args = parser.parse_args()
+
+    modos = [m.strip() for m in args.modos.split(',') if m.strip()]
+    desconocidos = set(modos) - set(MODOS)
+    if desconocidos:
+        parser.error(f"Modos desconocidos: {', '.join(sorted(desconocidos))}")
+
+    resultados = {}
+    print(f"{'modo':<14}{'arranque s':>12}{'RSS MB':>10}{'PSS MB':>10}{'USS MB':>10}")
+    for modo in modos:
+        datos = medir_modo(modo, args)
+        resultados[modo] = datos
+        print(f"{modo:<14}{datos['segundos_arranque']:>12.1f}{datos['rss_total_mb']:>10.1f}"
+              f"{datos['pss_total_mb']:>10.1f}{datos['uss_total_mb']:>10.1f}")
+
+    if 'preload' in resultados and 'sin-preload' in resultados:
+        antes, ahora = resultados['sin-preload']['pss_total_mb'], resultados['preload']['pss_total_mb']
+        print(f"\nPSS total con preload: {ahora} MB frente a {antes} MB ({(ahora - antes) / antes * 100:+.1f}%)")
+
+    if args.salida:
+        reporte = {
+            'version': 1,
+            'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': commit_actual(),
+            'entorno': {'python': platform.python_version(), 'plataforma': platform.platform()},
+            'parametros': {k: v for k, v in vars(args).items() if k not in ('password', 'salida')},
+            'modos': resultados,
+        }
+        with open(args.salida, 'w', encoding='utf-8') as salida:
+            json.dump(reporte, salida, ensure_ascii=False, indent=2)
+        print(f"Reporte guardado en {args.salida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+registros_datos plana frente a particionada por archivo: latencia de las consultas de
+un archivo y de la eliminación de un archivo completo.
+
+Crea dos tablas de prueba con la forma de registros_datos (mismas columnas e índices
+que crea Django) en la base de datos de DJANGO_SETTINGS_MODULE, las llena con
+generate_series y mide:
+
+- consultas de un archivo al azar: conteo, una página ordenada por numero_fila y una
+  agregación por dependencia,
+- eliminación de archivos: DELETE en la tabla plana (más las filas muertas que quedan
+  para VACUUM) frente a DROP de la partición,
+- tamaño total de cada tabla con sus índices.
+
+No toca registros_datos; las tablas de prueba se eliminan al terminar.
+
+    python benchmarks/particiones.py --filas 10000000 --archivos 200 --salida particiones.json
+
+Requiere PostgreSQL.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from carga import commit_actual, percentil  # noqa: E402
+
+TABLA_PLANA = 'bench_registros_plana'
+TABLA_PARTICIONADA = 'bench_registros_particionada'
+
+COLUMNAS = """
+    id bigint GENERATED BY DEFAULT AS IDENTITY,
+    archivo_id bigint NOT NULL,
+    numero_fila integer NOT NULL,
+    datos jsonb NOT NULL,
+    anio integer,
+    dependencia varchar(200),
+    indicador varchar(300),
+    valor numeric(15, 2),
+    fecha_creacion timestamptz NOT NULL
+"""
+
+# Mismos índices que el modelo RegistroDato (más el de la FK que agrega Django)
+INDICES = ('archivo_id', 'archivo_id, numero_fila', 'anio', 'dependencia', 'indicador')
+
+CONSULTAS = {
+    'conteo': "SELECT count(*) FROM {tabla} WHERE archivo_id = %s",
+    'pagina': "SELECT * FROM {tabla} WHERE archivo_id = %s ORDER BY numero_fila LIMIT 50 OFFSET 500",
+    'agregacion': "SELECT dependencia, sum(valor), count(*) FROM {tabla} WHERE archivo_id = %s GROUP BY dependencia",
+}
+
+INSERTAR = """
+INSERT INTO {tabla} (archivo_id, numero_fila, datos, anio, dependencia, indicador, valor, fecha_creacion)
+SELECT %(archivo)s, n,
+       jsonb_build_object('Año', 2019 + n %% 5, 'Dependencia', 'Dependencia ' || n %% 12,
+                          'Indicador', 'Indicador ' || n %% 40, 'Valor', (n * 37) %% 100000,
+                          'Observación', md5(n::text)),
+       2019 + n %% 5, 'Dependencia ' || n %% 12, 'Indicador ' || n %% 40, (n * 37) %% 100000, now()
+FROM generate_series(1, %(filas)s) AS n
+"""
+
+
+def crear_tablas(cursor, archivos, filas_por_archivo):
+    cursor.execute(f"CREATE TABLE {TABLA_PLANA} ({COLUMNAS}, PRIMARY KEY (id))")
+    cursor.execute(f"CREATE TABLE {TABLA_PARTICIONADA} ({COLUMNAS}, PRIMARY KEY (id, archivo_id)) "
+                   f"PARTITION BY LIST (archivo_id)")
+    cursor.execute(f"CREATE TABLE {TABLA_PARTICIONADA}_default PARTITION OF {TABLA_PARTICIONADA} DEFAULT")
+    for archivo in range(1, archivos + 1):
+        cursor.execute(f"CREATE TABLE {TABLA_PARTICIONADA}_a{archivo} "
+                       f"PARTITION OF {TABLA_PARTICIONADA} FOR VALUES IN ({archivo})")
+
+    for tabla in (TABLA_PLANA, TABLA_PARTICIONADA):
+        inicio = time.perf_counter()
+        for archivo in range(1, archivos + 1):
+            cursor.execute(INSERTAR.format(tabla=tabla), {'archivo': archivo, 'filas': filas_por_archivo})
+            print(f"  {tabla}: {archivo}/{archivos} archivos", end='\r')
+        for posicion, columnas in enumerate(INDICES):
+            cursor.execute(f"CREATE INDEX {tabla}_i{posicion} ON {tabla} ({columnas})")
+        cursor.execute(f"VACUUM ANALYZE {tabla}")
+        print(f"  {tabla}: cargada en {time.perf_counter() - inicio:.1f} s" + ' ' * 20)
+
+
+def tamano_mb(cursor, tabla):
+    # pg_total_relation_size de la tabla padre no incluye las particiones
+    cursor.execute(
+        "SELECT COALESCE(sum(pg_total_relation_size(c.oid)), 0) FROM pg_class c "
+        "WHERE c.oid = %s::regclass OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)",
+        [tabla, tabla]
+    )
+    return round(cursor.fetchone()[0] / 1024 ** 2, 1)
+
+
+def medir_consultas(cursor, tabla, archivos, repeticiones):
+    resultados = {}
+    for nombre, sql in CONSULTAS.items():
+        tiempos = []
+        for _ in range(repeticiones):
+            archivo = random.randint(1, archivos)
+            inicio = time.perf_counter()
+            cursor.execute(sql.format(tabla=tabla), [archivo])
+            cursor.fetchall()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        resultados[nombre] = {
+            'p50_ms': round(statistics.median(tiempos), 2),
+            'p99_ms': round(percentil(tiempos, 0.99), 2),
+        }
+    return resultados
+
+
+def medir_eliminacion(cursor, archivos_a_eliminar):
+    plana, particionada = [], []
+    # Cada fila borrada con DELETE queda como tupla muerta hasta el próximo VACUUM
+    muertas = 0
+    for archivo in archivos_a_eliminar:
+        inicio = time.perf_counter()
+        cursor.execute(f"DELETE FROM {TABLA_PLANA} WHERE archivo_id = %s", [archivo])
+        plana.append((time.perf_counter() - inicio) * 1000)
+        muertas += cursor.rowcount
+
+        inicio = time.perf_counter()
+        cursor.execute(f"DROP TABLE {TABLA_PARTICIONADA}_a{archivo}")
+        particionada.append((time.perf_counter() - inicio) * 1000)
+
+    return {
+        'plana_delete_ms_p50': round(statistics.median(plana), 1),
+        'plana_delete_ms_max': round(max(plana), 1),
+        'plana_filas_muertas': muertas,
+        'particionada_drop_ms_p50': round(statistics.median(particionada), 1),
+        'particionada_drop_ms_max': round(max(particionada), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', default=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+    parser.add_argument('--filas', type=int, default=10_000_000, help='Filas totales en cada tabla')
+    parser.add_argument('--archivos', type=int, default=200)
+    parser.add_argument('--repeticiones', type=int, default=200, help='Consultas por tipo')
+    parser.add_argument('--eliminar', type=int, default=5, help='Archivos a eliminar')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--conservar', action='store_true', help='No eliminar las tablas de prueba al terminar')
+    parser.add_argument('--salida', help='Ruta del reporte JSON')
+    args = parser.parse_args()
+
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+    import django
+    django.setup()
+    from django.db import connection
+
+    if connection.vendor != 'postgresql':
+        raise SystemExit('Este benchmark requiere PostgreSQL')
+
+    random.seed(args.semilla)
+    filas_por_archivo = args.filas // args.archivos
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLA_PLANA}, {TABLA_PARTICIONADA} CASCADE")
+        try:
+            print(f"Cargando {filas_por_archivo * args.archivos} filas en {args.archivos} archivos por tabla...")
+            crear_tablas(cursor, args.archivos, filas_por_archivo)
+
+            datos = {
+                'tamano_mb': {'plana': tamano_mb(cursor, TABLA_PLANA),
+                              'particionada': tamano_mb(cursor, TABLA_PARTICIONADA)},
+                'consultas': {'plana': medir_consultas(cursor, TABLA_PLANA, args.archivos, args.repeticiones),
+                              'particionada': medir_consultas(cursor, TABLA_PARTICIONADA, args.archivos,
+                                                              args.repeticiones)},
+                'eliminacion': medir_eliminacion(cursor, random.sample(range(1, args.archivos + 1), args.eliminar)),
+            }
+        finally:
+            if not args.conservar:
+                cursor.execute(f"DROP TABLE IF EXISTS {TABLA_PLANA}, {TABLA_PARTICIONADA} CASCADE")
+
+    print(f"\nTamaño: plana {datos['tamano_mb']['plana']} MB, particionada {datos['tamano_mb']['particionada']} MB")
+    print(f"{'consulta':<14}{'plana p50':>12}{'p99':>10}{'partic. p50':>14}{'p99':>10}")
+    for nombre in CONSULTAS:
+        plana, particionada = datos['consultas']['plana'][nombre], datos['consultas']['particionada'][nombre]
+        print(f"{nombre:<14}{plana['p50_ms']:>12.2f}{plana['p99_ms']:>10.2f}"
+              f"{particionada['p50_ms']:>14.2f}{particionada['p99_ms']:>10.2f}")
+    eliminacion = datos['eliminacion']
+    print(f"Eliminar un archivo: DELETE {eliminacion['plana_delete_ms_p50']} ms "
+          f"({eliminacion['plana_filas_muertas']} filas muertas para VACUUM), "
+          f"DROP de la partición {eliminacion['particionada_drop_ms_p50']} ms")
+
+    if args.salida:
+        reporte = {
+            'version': 1,
+            'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': commit_actual(),
+            'entorno': {'python': platform.python_version(), 'plataforma': platform.platform()},
+            'parametros': {k: v for k, v in vars(args).items() if k != 'salida'},
+            'resultados': datos,
+        }
+        with open(args.salida, 'w', encoding='utf-8') as salida:
+            json.dump(reporte, salida, ensure_ascii=False, indent=2)
+        print(f"Reporte guardado en {args.salida}")
+
+
+if __name__ == '__main__':
+    main()
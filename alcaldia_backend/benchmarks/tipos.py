@@ -0,0 +1,184 @@
+"""
+Filtros por rango sobre columnas de la fila: valores tipados al cargar (ver
+apps/archivos/tipos.py) frente a valores guardados como texto y convertidos en la
+consulta.
+
+Carga las mismas filas sintéticas (apps/archivos/sinteticos.py) dos veces en la base
+de datos de DJANGO_SETTINGS_MODULE:
+
+- tipado: con los tipos inferidos; el filtro compara el JSON directamente
+  (apps/archivos/condiciones.py, en PostgreSQL datos -> 'col' >= '5000'),
+- texto: todos los valores como texto, como se guardaban las fechas y las columnas
+  numéricas con alguna celda de texto; el filtro hace CAST del texto.
+
+Mide un rango numérico y uno de fechas sobre cada archivo y comprueba que los dos
+devuelven las mismas filas. Los archivos de prueba se eliminan al terminar.
+
+    python benchmarks/tipos.py --filas 200000 --salida tipos.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import date, datetime, timezone
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from carga import commit_actual, percentil  # noqa: E402
+
+COLUMNA_NUMERO = 'Columna 2'
+COLUMNA_FECHA = 'Columna 3'
+
+
+def cargar(modo, usuario, args):
+    import pandas as pd
+    from apps.archivos.models import ArchivoExcel
+    from apps.archivos.sinteticos import generar_filas
+    from apps.archivos.utils import ExcelProcessor
+
+    archivo = ArchivoExcel.objects.create(
+        nombre_archivo=f'Benchmark tipos ({modo})',
+        descripcion='benchmarks/tipos.py',
+        usuario_subida=usuario,
+    )
+    processor = ExcelProcessor(archivo)
+    filas = generar_filas(args.filas, columnas_extra=args.columnas, semilla=args.semilla)
+
+    insertadas = 0
+    while True:
+        bloque = list(islice(filas, 50000))
+        if not bloque:
+            break
+        if modo == 'texto':
+            # Como se guardaba antes: fechas "2024-03-01 00:00:00" y números como texto
+            bloque = [{columna: str(valor) for columna, valor in fila.items()} for fila in bloque]
+        processor.df = pd.DataFrame(bloque, index=range(insertadas, insertadas + len(bloque)))
+        if insertadas == 0:
+            processor._extraer_metadatos_comunes()
+            if modo == 'texto':
+                archivo.tipos_columnas = {}
+            archivo.columnas_disponibles = list(processor.df.columns)
+            archivo.save()
+        insertadas += processor.insertar_registros()
+
+    archivo.total_filas = insertadas
+    archivo.procesado = True
+    archivo.save()
+    return archivo
+
+
+def consultas(archivo, modo):
+    from django.db.models import DateField, FloatField
+    from django.db.models.functions import Cast
+    from apps.archivos.almacenamiento import AlmacenamientoRegistros
+    from apps.archivos.condiciones import CondicionesJSON
+    from apps.archivos.models import RegistroDato
+
+    registros = RegistroDato.objects.filter(archivo_id=archivo.id)
+    anio = archivo.anio or datetime.now().year
+    desde, hasta = f'{anio - 2}-03-01', f'{anio - 2}-09-30'
+
+    if modo == 'tipado':
+        return {
+            'rango_numero': lambda: registros.filter(CondicionesJSON.compilar(
+                [{'campo': COLUMNA_NUMERO, 'op': 'between', 'valor': [2500, 5000]}], [archivo.id]
+            )).count(),
+            'rango_fecha': lambda: registros.filter(CondicionesJSON.compilar(
+                [{'campo': COLUMNA_FECHA, 'op': 'between', 'valor': [desde, hasta]}], [archivo.id]
+            )).count(),
+        }
+
+    texto = AlmacenamientoRegistros.expresion_texto
+    return {
+        'rango_numero': lambda: registros.alias(
+            numero=Cast(texto(COLUMNA_NUMERO, [archivo.id]), FloatField())
+        ).filter(numero__gte=2500, numero__lte=5000).count(),
+        'rango_fecha': lambda: registros.alias(
+            fecha=Cast(texto(COLUMNA_FECHA, [archivo.id]), DateField())
+        ).filter(fecha__gte=date.fromisoformat(desde), fecha__lte=date.fromisoformat(hasta)).count(),
+    }
+
+
+def medir(operaciones, repeticiones):
+    resultados = {}
+    for nombre, operacion in operaciones.items():
+        filas = operacion()
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            operacion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        resultados[nombre] = {
+            'filas': filas,
+            'p50_ms': round(statistics.median(tiempos), 2),
+            'p90_ms': round(percentil(tiempos, 0.90), 2),
+        }
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', default=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+    parser.add_argument('--filas', type=int, default=200_000, help='Filas de cada archivo')
+    parser.add_argument('--columnas', type=int, default=6, help='Columnas adicionales a Año/Dependencia/Indicador/Valor')
+    parser.add_argument('--repeticiones', type=int, default=10)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--conservar', action='store_true', help='No eliminar los archivos de prueba al terminar')
+    parser.add_argument('--salida', help='Ruta del reporte JSON')
+    args = parser.parse_args()
+
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+    import django
+    django.setup()
+    from django.db import connection
+    from apps.archivos.models import ArchivoExcel
+    from apps.authentication.models import CustomUser
+
+    usuario = CustomUser.objects.order_by('id').first()
+    if usuario is None:
+        raise SystemExit('Se necesita al menos un usuario para asignar los archivos de prueba')
+
+    datos = {}
+    archivos = []
+    try:
+        for modo in ('tipado', 'texto'):
+            print(f"Cargando {args.filas} filas ({modo})...")
+            archivo = cargar(modo, usuario, args)
+            archivos.append(archivo)
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE registros_datos")
+            datos[modo] = medir(consultas(archivo, modo), args.repeticiones)
+    finally:
+        if not args.conservar:
+            for archivo in archivos:
+                ArchivoExcel.todos.filter(pk=archivo.pk).delete()
+
+    print(f"\n{'filtro':<16}{'tipado p50':>12}{'texto+CAST p50':>16}{'filas':>10}  coinciden")
+    for nombre in datos['tipado']:
+        tipado, texto = datos['tipado'][nombre], datos['texto'][nombre]
+        print(f"{nombre:<16}{tipado['p50_ms']:>12.2f}{texto['p50_ms']:>16.2f}{tipado['filas']:>10}  "
+              f"{'sí' if tipado['filas'] == texto['filas'] else 'NO'}")
+
+    if args.salida:
+        reporte = {
+            'version': 1,
+            'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': commit_actual(),
+            'entorno': {'python': platform.python_version(), 'plataforma': platform.platform(),
+                        'base_datos': connection.vendor},
+            'parametros': {k: v for k, v in vars(args).items() if k != 'salida'},
+            'resultados': datos,
+        }
+        with open(args.salida, 'w', encoding='utf-8') as salida:
+            json.dump(reporte, salida, ensure_ascii=False, indent=2)
+        print(f"Reporte guardado en {args.salida}")
+
+
+if __name__ == '__main__':
+    main()
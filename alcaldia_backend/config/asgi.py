@@ -13,4 +13,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
+# Bajo ASGI cada petición usa un hilo nuevo, así que una conexión persistente nunca
+# se reutiliza y sólo quedaría abierta ocupando un lugar en Postgres
+os.environ.setdefault('DATABASE_CONN_MAX_AGE', '0')
+
 application = get_asgi_application()
\ No newline at end of file
@@ -30,15 +30,20 @@ LOCAL_APPS = [
     'apps.authentication',
     'apps.archivos',
     'apps.reportes',
+    'apps.core',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 # Middleware
 MIDDLEWARE = [
+    'apps.core.middleware.CorrelacionMiddleware',
+    'apps.core.middleware.InstrumentacionMiddleware',
+    'apps.core.middleware.PerfiladoMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware'
+    'apps.core.middleware.CompresionMiddleware',
+    'apps.core.middleware.ArchivosEstaticosMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -77,9 +82,18 @@ DATABASES = {
         'PASSWORD': config('DATABASE_PASSWORD', default='bocato0731'),
         'HOST': config('DATABASE_HOST', default='localhost'),
         'PORT': config('DATABASE_PORT', default='5432'),
+        # Conexiones persistentes: con gunicorn gthread cada hilo conserva la suya, así que
+        # cada instancia mantiene como máximo WEB_CONCURRENCY × GUNICORN_THREADS conexiones
+        # (ver when_ready en gunicorn.conf.py). 0 vuelve a abrir una conexión por petición
+        'CONN_MAX_AGE': config('DATABASE_CONN_MAX_AGE', default=600, cast=int),
+        # Verifica la conexión reutilizada antes de la primera consulta de cada petición
+        'CONN_HEALTH_CHECKS': config('DATABASE_CONN_HEALTH_CHECKS', default=True, cast=bool),
     }
 }
 
+# Conexiones que el servidor Postgres admite para esta aplicación (0 = sin verificar)
+DATABASE_MAX_CONEXIONES = config('DATABASE_MAX_CONEXIONES', default=0, cast=int)
+
 # Validación de contraseñas
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -146,3 +160,114 @@ CORS_ALLOW_CREDENTIALS = True
 # Límite de archivos
 MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
 ALLOWED_EXTENSIONS = ['.xlsx', '.xls']
+
+
+# Gráficos (incrustar SVG en los PDF requiere tener instalado svglib)
+GRAFICOS_VECTORIALES_PDF = config('GRAFICOS_VECTORIALES_PDF', default=False, cast=bool)
+# Procesos dedicados al renderizado de gráficos (0 = renderizar en el hilo de la petición)
+GRAFICOS_PROCESOS = config('GRAFICOS_PROCESOS', default=0, cast=int)
+GRAFICOS_TIMEOUT = config('GRAFICOS_TIMEOUT', default=30, cast=int)
+
+# Caché (por defecto en memoria del proceso; las claves incluyen la versión de los datos)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='alcaldia'),
+    }
+}
+CACHE_GRAFICOS_SEGUNDOS = config('CACHE_GRAFICOS_SEGUNDOS', default=300, cast=int)
+# s-maxage de las respuestas públicas con ETag (0 = los proxies siempre revalidan)
+CACHE_HTTP_PUBLICO_SEGUNDOS = config('CACHE_HTTP_PUBLICO_SEGUNDOS', default=0, cast=int)
+
+# Descargas: con X-Accel-Redirect Django sólo autoriza y nginx transmite el archivo
+# desde la ubicación interna DESCARGAS_X_ACCEL_PREFIJO (ver alcaldia_frontend/nginx.conf)
+DESCARGAS_X_ACCEL = config('DESCARGAS_X_ACCEL', default=False, cast=bool)
+DESCARGAS_X_ACCEL_PREFIJO = config('DESCARGAS_X_ACCEL_PREFIJO', default='/media-protegido/')
+# Vigencia (en segundos) de las URLs firmadas de descarga de archivos Excel
+DESCARGAS_URL_EXPIRACION = config('DESCARGAS_URL_EXPIRACION', default=3600, cast=int)
+
+# Eliminación de archivos: hasta ELIMINACION_FILAS_SINCRONA registros se borran en la
+# misma petición; los archivos más grandes, en segundo plano y por lotes (ver apps/archivos/eliminacion.py)
+ELIMINACION_FILAS_SINCRONA = config('ELIMINACION_FILAS_SINCRONA', default=50000, cast=int)
+ELIMINACION_TAMANO_LOTE = config('ELIMINACION_TAMANO_LOTE', default=20000, cast=int)
+# Con False los archivos grandes sólo se ocultan y los purga el comando purgar_archivos (cron)
+ELIMINACION_PURGA_EN_HILO = config('ELIMINACION_PURGA_EN_HILO', default=True, cast=bool)
+
+# Almacenamiento de las filas de los archivos nuevos: 'json' (un objeto con los nombres de
+# columna por fila) o 'compacto' (esquema en el archivo y valores por posición, ver
+# apps/archivos/almacenamiento.py). Los archivos ya cargados conservan su modo.
+REGISTROS_ALMACENAMIENTO = config('REGISTROS_ALMACENAMIENTO', default='json')
+
+# Inferencia de tipos de columna al cargar (ver apps/archivos/tipos.py): filas de la
+# muestra, fracción mínima de celdas que deben encajar en el tipo, celdas que no encajan
+# que se toleran siempre (para archivos pequeños) y máximo de valores distintos para
+# considerar una columna de texto como categoría
+INFERENCIA_TIPOS_MUESTRA = config('INFERENCIA_TIPOS_MUESTRA', default=10000, cast=int)
+INFERENCIA_TIPOS_UMBRAL = config('INFERENCIA_TIPOS_UMBRAL', default=0.95, cast=float)
+INFERENCIA_TIPOS_TOLERANCIA = config('INFERENCIA_TIPOS_TOLERANCIA', default=1, cast=int)
+INFERENCIA_CATEGORIAS_MAXIMO = config('INFERENCIA_CATEGORIAS_MAXIMO', default=100, cast=int)
+
+# Compresión de respuestas (zstd y br se usan si están instalados zstandard / brotli)
+COMPRESION_MINIMO_BYTES = config('COMPRESION_MINIMO_BYTES', default=1024, cast=int)
+COMPRESION_NIVEL_GZIP = config('COMPRESION_NIVEL_GZIP', default=6, cast=int)
+COMPRESION_NIVEL_BROTLI = config('COMPRESION_NIVEL_BROTLI', default=4, cast=int)
+COMPRESION_NIVEL_ZSTD = config('COMPRESION_NIVEL_ZSTD', default=3, cast=int)
+
+# Respuestas MessagePack (Accept: application/msgpack); requiere instalar msgpack
+API_MSGPACK = config('API_MSGPACK', default=False, cast=bool)
+if API_MSGPACK:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'apps.core.renderers.MessagePackRenderer',
+    ]
+
+# Instrumentación por petición (Server-Timing, /metrics y log de peticiones lentas)
+INSTRUMENTACION_ACTIVA = config('INSTRUMENTACION_ACTIVA', default=True, cast=bool)
+INSTRUMENTACION_SERVER_TIMING = config('INSTRUMENTACION_SERVER_TIMING', default=True, cast=bool)
+INSTRUMENTACION_LENTO_MS = config('INSTRUMENTACION_LENTO_MS', default=1000, cast=int)
+INSTRUMENTACION_TOP_CONSULTAS = config('INSTRUMENTACION_TOP_CONSULTAS', default=5, cast=int)
+# Token Bearer exigido por /metrics (vacío = sin autenticación, p. ej. red interna)
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')
+
+# Perfilado de CPU por petición, guardado en MEDIA_ROOT/profiles/ y visible en el admin.
+# Con PERFILADO_ACTIVO=False el middleware ni siquiera se carga. Activo, un administrador
+# lo pide con la cabecera X-Perfilar: 1 y PERFILADO_MUESTREO perfila una fracción de PERFILADO_RUTAS
+PERFILADO_ACTIVO = config('PERFILADO_ACTIVO', default=False, cast=bool)
+PERFILADO_MUESTREO = config('PERFILADO_MUESTREO', default=0.0, cast=float)
+PERFILADO_RUTAS = config(
+    'PERFILADO_RUTAS',
+    default='/api/reportes/generar-pdf/,/api/archivos/generar-grafico/,/api/reportes/generar-grafico/'
+).split(',')
+# 'cprofile' (biblioteca estándar) o 'pyinstrument' (si está instalado)
+PERFILADO_MOTOR = config('PERFILADO_MOTOR', default='cprofile')
+
+# Con gunicorn preload_app, importar también pandas/matplotlib/reportlab en el maestro
+# para compartirlos entre workers (ver apps/core/calentamiento.py)
+CALENTAR_LIBRERIAS = config('CALENTAR_LIBRERIAS', default=True, cast=bool)
+
+# Logging estructurado: JSON en stdout a través de una cola, con id de correlación
+LOG_NIVEL = config('LOG_NIVEL', default='INFO')
+# Fracción de eventos DEBUG que se conservan (sólo aplica con LOG_NIVEL=DEBUG)
+LOG_MUESTREO_DEBUG = config('LOG_MUESTREO_DEBUG', default=0.01, cast=float)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'correlacion': {'()': 'apps.core.registro.FiltroCorrelacion'},
+        'muestreo': {'()': 'apps.core.registro.FiltroMuestreo', 'tasa': LOG_MUESTREO_DEBUG},
+    },
+    'handlers': {
+        'json': {
+            'class': 'apps.core.registro.ManejadorColaJSON',
+            'filters': ['muestreo', 'correlacion'],
+        },
+    },
+    'root': {'handlers': ['json'], 'level': 'WARNING'},
+    'loggers': {
+        'apps': {'handlers': ['json'], 'level': LOG_NIVEL, 'propagate': False},
+        'alcaldia': {'handlers': ['json'], 'level': LOG_NIVEL, 'propagate': False},
+        'django': {'handlers': ['json'], 'level': 'WARNING', 'propagate': False},
+    },
+}
@@ -0,0 +1,31 @@
+"""
+Ajustes para las pruebas (pytest): SQLite en memoria y archivos en un directorio
+temporal, para poder ejecutarlas sin PostgreSQL.
+
+    pytest
+"""
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='alcaldia_pruebas_')
+STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pruebas',
+    }
+}
+
+PERFILADO_ACTIVO = False
+CALENTAR_LIBRERIAS = False
+GRAFICOS_PROCESOS = 0
@@ -4,6 +4,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.shortcuts import redirect
 from apps.authentication.views import welcome_view
+from apps.core.metricas import metricas_view
 from django.http import HttpResponse
 urlpatterns = [
     path('', welcome_view),
@@ -12,8 +13,10 @@ urlpatterns = [
     path('api/archivos/', include('apps.archivos.urls')),
     path('api/reportes/', include('apps.reportes.urls')),
     path("healthz/", lambda r: HttpResponse("ok")),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path("metrics/", metricas_view, name='metricas'),
+]
 
-# Servir archivos media en desarrollo
+# Servir archivos media sólo en desarrollo; en producción los archivos se entregan
+# con URLs firmadas (archivos/<id>/descargar/) o X-Accel-Redirect desde nginx
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -0,0 +1,20 @@
+"""
+Worker ASGI de gunicorn para servir config.asgi con uvicorn (event loop).
+
+    GUNICORN_WORKER_CLASS=config.workers.WorkerAsgi gunicorn -c gunicorn.conf.py config.asgi:application
+
+Bajo ASGI cada petición en curso ejecuta sus consultas en un hilo propio y con su
+propia conexión a la base de datos, así que GUNICORN_ASGI_CONCURRENCIA (peticiones
+simultáneas por worker; el resto recibe 503) también limita las conexiones abiertas.
+"""
+import os
+
+from uvicorn.workers import UvicornWorker
+
+
+class WorkerAsgi(UvicornWorker):
+    CONFIG_KWARGS = {
+        # Django no implementa el protocolo lifespan
+        'lifespan': 'off',
+        'limit_concurrency': int(os.getenv('GUNICORN_ASGI_CONCURRENCIA', '100')),
+    }
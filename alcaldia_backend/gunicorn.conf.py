@@ -1,9 +1,88 @@
-import multiprocessing, os
+import gc, multiprocessing, os
 
 bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
 workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
-threads = 2
+threads = int(os.getenv("GUNICORN_THREADS", "2"))
 timeout = 120
 accesslog = "-"
 errorlog = "-"
-worker_class = "gthread"
+# gthread sirve config.wsgi; para servir config.asgi con un event loop por worker:
+#   GUNICORN_WORKER_CLASS=config.workers.WorkerAsgi gunicorn -c gunicorn.conf.py config.asgi:application
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+ASGI = worker_class == "config.workers.WorkerAsgi" or "uvicorn" in worker_class.lower()
+
+# Perfil de producción: la aplicación se carga y calienta una vez en el maestro y los
+# workers la heredan con fork (páginas compartidas). GUNICORN_PRELOAD=0 vuelve a cargar
+# la aplicación en cada worker (necesario p. ej. para recargar código con HUP)
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+# Reciclaje de workers: por número de peticiones (con jitter para que no se reinicien
+# todos a la vez) y por memoria privada (GUNICORN_MEMORIA_MAXIMA_MB, 0 = sin límite).
+# Los workers ASGI respetan max_requests pero no ejecutan post_request
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+MEMORIA_MAXIMA_MB = int(os.getenv("GUNICORN_MEMORIA_MAXIMA_MB", "0"))
+# La memoria se revisa cada tantas peticiones (leer smaps_rollup no es gratis)
+MEMORIA_REVISAR_CADA = 20
+
+
+def memoria_privada_mb():
+    """
+    Memoria privada (USS) del proceso: las páginas compartidas con el maestro no cuentan
+    """
+    try:
+        with open("/proc/self/smaps_rollup") as smaps:
+            privada_kb = sum(int(linea.split()[1]) for linea in smaps if linea.startswith("Private_"))
+        return privada_kb / 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from apps.core.calentamiento import calentar
+
+        calentar()
+        # Lo cargado hasta aquí queda fuera del GC: las recolecciones de los workers
+        # no tocan esos objetos y sus páginas no se copian
+        gc.collect()
+        gc.freeze()
+        server.log.info("Aplicación precargada; %d objetos congelados para el GC", gc.get_freeze_count())
+
+    maximo = int(os.getenv("DATABASE_MAX_CONEXIONES", "0"))
+    if ASGI:
+        # Una conexión por petición en curso, hasta el límite de concurrencia de cada worker
+        concurrencia = int(os.getenv("GUNICORN_ASGI_CONCURRENCIA", "100"))
+        conexiones = server.cfg.workers * concurrencia
+        server.log.info("Conexiones a la base de datos: hasta %d (%d workers x %d peticiones)",
+                        conexiones, server.cfg.workers, concurrencia)
+        ajuste = "WEB_CONCURRENCY o GUNICORN_ASGI_CONCURRENCIA"
+    else:
+        # Con CONN_MAX_AGE cada hilo de cada worker conserva una conexión a Postgres
+        conexiones = server.cfg.workers * server.cfg.threads
+        server.log.info("Conexiones persistentes a la base de datos: hasta %d (%d workers x %d hilos)",
+                        conexiones, server.cfg.workers, server.cfg.threads)
+        ajuste = "WEB_CONCURRENCY o GUNICORN_THREADS, o use DATABASE_CONN_MAX_AGE=0"
+    if maximo and conexiones > maximo:
+        server.log.warning("%d conexiones superan DATABASE_MAX_CONEXIONES=%d: reduzca %s",
+                           conexiones, maximo, ajuste)
+
+
+def post_request(worker, req, environ, resp):
+    if not MEMORIA_MAXIMA_MB or worker.nr % MEMORIA_REVISAR_CADA:
+        return
+
+    memoria = memoria_privada_mb()
+    if memoria > MEMORIA_MAXIMA_MB and worker.alive:
+        # Igual que max_requests: termina las peticiones en curso y el maestro lo reemplaza
+        worker.log.info("Reiniciando worker %s: %.0f MB de memoria privada superan %d MB",
+                        worker.pid, memoria, MEMORIA_MAXIMA_MB)
+        worker.alive = False
+
+
+def child_exit(server, worker):
+    # Con PROMETHEUS_MULTIPROC_DIR, descarta las métricas en vivo del worker que terminó
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -118,39 +118,32 @@ document.addEventListener("DOMContentLoaded", () => {
       return;
     }
 
-    const filtros = {};
+    const params = new URLSearchParams({ campo: columna, top: 20 });
 
     if (archivoId) {
-      filtros.archivo_id = parseInt(archivoId);
+      params.set("archivo_id", parseInt(archivoId));
     }
 
     if (valorBuscado) {
-      filtros.busqueda_texto = {
-        campo: columna,
-        valor: valorBuscado
-      };
+      params.set("buscar_campo", columna);
+      params.set("buscar_valor", valorBuscado);
     }
 
-    const payload = {
-      tipo_grafico: `por_${columna.toLowerCase().replace(/\s+/g, "_")}`,
-      filtros
-    };
-
-    console.log("Payload enviado:", payload);
+    console.log("Parámetros enviados:", params.toString());
 
     try {
-      const res = await fetch("http://localhost:8000/api/archivos/generar-grafico/", {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-          Authorization: `Bearer ${token}`
-        },
-        body: JSON.stringify(payload)
+      const res = await fetch(`http://localhost:8000/api/archivos/datos-grafico/?${params}`, {
+        headers: { Authorization: `Bearer ${token}` }
       });
 
       const data = await res.json();
       console.log("Datos recibidos:", data);
 
+      // Formato compacto: labels + series [{ nombre, valores }]
+      const serie = data.series?.[0];
+      data.values = serie?.valores || [];
+      data.title = data.titulo || serie?.nombre;
+
       graficosDiv.innerHTML = '<div class="title-graficos"><h2>Gráficos</h2></div>';
 
       if (data.labels?.length > 0 && data.values?.length > 0) {